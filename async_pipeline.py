@@ -0,0 +1,199 @@
+"""
+RUSSD Async Pipeline
+Runs collection, export, metadata and packaging as asyncio stages connected by queues
+"""
+
+import asyncio
+import time
+
+from config import DEFAULT_CURRENCY, CURRENCIES, get_excel_headers
+from metrics import span, flush as flush_metrics
+from orchastrator import (
+    log_debug, run_collection, export_to_excel, store_rows, record_package,
+    COLLECTION_ENGINE, COLLECTION_WORKERS, IN_MEMORY_PACKAGE
+)
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+STAGE_QUEUE_SIZE = 8  # Rows buffered between scraping and packaging; bounds memory on long backfills
+ASYNC_BACKFILL_CHUNK_DAYS = 31  # Smaller than backfill.BACKFILL_CHUNK_DAYS so packaging starts sooner
+
+
+# =============================================================================
+# BLOCKING STAGE BODIES (run in worker threads)
+# =============================================================================
+def render_data(row, headers, in_memory):
+    """RUSSD_DATA as (name, bytes) in memory, or written to disk and returned as a path."""
+    from package_creator import render_data_file
+    if in_memory: return render_data_file([row], row['trade_date'], headers)
+    return export_to_excel(row, headers)
+
+def assemble_package(data, meta, trade_date, in_memory):
+    """Zips the rendered members; on disk, RUSSD_META is only written now that its date is confirmed."""
+    from package_creator import create_package, write_package
+    if in_memory:
+        zip_file = write_package([data, meta], trade_date)
+    else:
+        meta_file, content = meta
+        with open(meta_file, 'wb') as f: f.write(content)
+        print(f"✅ Metadata file created: {meta_file}")
+        zip_file = create_package(data, meta_file)
+    record_package(zip_file, trade_date)
+    return zip_file
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+class MetadataTasks:
+    """
+    Metadata only needs the trade date and config, so it is rendered in memory
+    as soon as a date is known - for the daily run that is before collection
+    finishes. A task for a date that never arrives is cancelled at the end.
+    """
+
+    def __init__(self, headers):
+        self.headers = headers; self.tasks = {}
+
+    def start(self, trade_date):
+        from metadata_writer import render_metadata_file
+        if trade_date not in self.tasks:
+            log_debug(f"Starting metadata for {trade_date}")
+            self.tasks[trade_date] = asyncio.create_task(asyncio.to_thread(render_metadata_file, trade_date, self.headers))
+
+    async def get(self, trade_date):
+        self.start(trade_date)
+        return await self.tasks.pop(trade_date)
+
+    def drop(self, trade_date):
+        task = self.tasks.pop(trade_date, None)
+        if task: task.cancel()
+
+    def cancel_rest(self):
+        for task in self.tasks.values(): task.cancel()
+
+
+async def package_stage(queue, headers, in_memory, metadata, packaged):
+    """Consumes data rows until the None sentinel: stores, exports, validates and packages each trade date."""
+    from validation import gate_rows
+    while True:
+        row = await queue.get()
+        if row is None: return
+        trade_date = row['trade_date']
+        metadata.start(trade_date)
+        try:
+            with span('package_stage'):
+                _, passed = await asyncio.gather(asyncio.to_thread(store_rows, [row], headers),
+                                                 asyncio.to_thread(gate_rows, [row], headers))
+                if not passed: metadata.drop(trade_date); continue  # gate_rows logged why
+                # Only rendered once the gate passed, so a rejected date leaves no RUSSD_DATA file behind
+                data = await asyncio.to_thread(render_data, row, headers, in_memory)
+                meta = await metadata.get(trade_date)
+                packaged.append(await asyncio.to_thread(assemble_package, data, meta, trade_date, in_memory))
+            log_debug(f"Packaged {trade_date}", "SUCCESS")
+        except Exception as e:
+            # Keep draining the queue so the producer thread never blocks on a full queue
+            log_debug(f"Packaging {trade_date} failed: {e}", "ERROR")
+
+async def produce_rows(queue, row_batches):
+    """Runs a blocking iterator of row batches in a thread and feeds its rows into the queue."""
+    loop = asyncio.get_running_loop()
+    def produce():
+        try:
+            for rows in row_batches():
+                for row in rows:
+                    if row.get('trade_date'): asyncio.run_coroutine_threadsafe(queue.put(row), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+    await asyncio.to_thread(produce)
+
+async def run_stages(row_batches, headers, in_memory, known_date=None):
+    """
+    Wires a producer of row batches to the packaging stage
+
+    Args:
+        row_batches: Zero-argument callable returning an iterable of row lists (runs in a thread)
+        headers: Excel headers for the collected currencies
+        in_memory: Render DATA/META into the ZIP instead of writing them to disk
+        known_date: Optional zero-argument callable returning the expected trade date early
+
+    Returns:
+        List of ZIP files written, in trade date order of arrival
+    """
+    queue = asyncio.Queue(STAGE_QUEUE_SIZE); metadata = MetadataTasks(headers); packaged = []
+
+    async def discover():
+        trade_date = await asyncio.to_thread(known_date)
+        if trade_date: metadata.start(trade_date)
+
+    stages = [produce_rows(queue, row_batches), package_stage(queue, headers, in_memory, metadata, packaged)]
+    if known_date: stages.append(discover())
+    try:
+        await asyncio.gather(*stages)
+    finally:
+        metadata.cancel_rest()
+    return packaged
+
+
+# =============================================================================
+# ENTRY POINTS
+# =============================================================================
+async def run_daily(engine=COLLECTION_ENGINE, workers=COLLECTION_WORKERS, currencies=(DEFAULT_CURRENCY,),
+                    in_memory=IN_MEMORY_PACKAGE, resume=False):
+    """
+    Latest trade date: the probe's date starts metadata while the tables are still being collected
+
+    With `resume` only the cells missing from the checkpoint are collected, and
+    metadata starts for the checkpointed trade date instead.
+    """
+    from checkpoint import get_checkpoint
+    from probe import fetch_max_available_date
+    headers = get_excel_headers(list(currencies))
+    known_date = (lambda: get_checkpoint().trade_date) if resume else fetch_max_available_date
+    with span('run', engine=engine, mode='async') as timing:
+        packaged = await run_stages(lambda: [[run_collection(list(currencies), engine, workers, resume) or {}]],
+                                    headers, in_memory, known_date)
+        timing['ok'] = bool(packaged)
+    flush_metrics(success=bool(packaged))
+    return packaged
+
+async def run_backfill_pipeline(date_from, date_to, currency=DEFAULT_CURRENCY, engine='selenium',
+                                in_memory=IN_MEMORY_PACKAGE, chunk_days=ASYNC_BACKFILL_CHUNK_DAYS):
+    """One package per trade date; a chunk is packaged while the next one is being scraped."""
+    from backfill import iter_backfill_chunks
+    headers = get_excel_headers([currency])
+    with span('backfill', engine=engine, currency=currency, mode='async') as timing:
+        packaged = await run_stages(lambda: iter_backfill_chunks(date_from, date_to, currency, engine, chunk_days),
+                                    headers, in_memory)
+        timing['ok'] = bool(packaged)
+    flush_metrics(success=bool(packaged))
+    return packaged
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RUSSD pipeline with overlapping collection and packaging stages")
+    parser.add_argument('--engine', choices=['selenium', 'http', 'fetch'], default=COLLECTION_ENGINE,
+                        help="'fetch' applies to daily only; backfill treats it as selenium")
+    parser.add_argument('--in-memory', action='store_true', default=IN_MEMORY_PACKAGE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    daily = sub.add_parser('daily', help="Collect and package the latest trade date")
+    daily.add_argument('--workers', type=int, default=COLLECTION_WORKERS)
+    daily.add_argument('--currencies', nargs='+', choices=list(CURRENCIES), default=[DEFAULT_CURRENCY])
+    daily.add_argument('--resume', action='store_true', help="Re-collect only the tables missing from the checkpoint")
+    fill = sub.add_parser('backfill', help="Collect a date range and package every trade date")
+    fill.add_argument('--from', dest='date_from', required=True, help="First trade date (YYYY-MM-DD)")
+    fill.add_argument('--to', dest='date_to', required=True, help="Last trade date (YYYY-MM-DD)")
+    fill.add_argument('--currency', choices=list(CURRENCIES), default=DEFAULT_CURRENCY)
+    fill.add_argument('--chunk-days', type=int, default=ASYNC_BACKFILL_CHUNK_DAYS)
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.command == 'daily':
+        packaged = asyncio.run(run_daily(args.engine, args.workers, args.currencies, args.in_memory, args.resume))
+    else:
+        packaged = asyncio.run(run_backfill_pipeline(args.date_from, args.date_to, args.currency, args.engine,
+                                                     args.in_memory, args.chunk_days))
+    print(f"\n{'✅' if packaged else '❌'} {len(packaged)} package(s) written in {time.time() - start_time:.2f} seconds")
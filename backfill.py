@@ -0,0 +1,174 @@
+"""
+RUSSD Historical Backfill
+Collects every table row over a date range in one session per source
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from config import (
+    DATA_SOURCES, CURRENCIES, DEFAULT_CURRENCY, SOURCE_DATE_FORMAT,
+    OUTPUT_DATE_FORMAT, DATE_INT_FORMAT, get_data_columns, get_excel_headers
+)
+from metrics import span, flush as flush_metrics
+from orchastrator import (
+    log_debug, setup_driver, close_driver, load_page, set_currency, set_date_range,
+    set_settlement, get_table_html, parse_table_rows, cache_lookup, cache_store,
+    export_to_excel, export_rows_to_excel, store_rows
+)
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+BACKFILL_CHUNK_DAYS = 366  # Width of each datepicker range applied on the page
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+def iter_date_chunks(date_from: str, date_to: str, chunk_days: int = BACKFILL_CHUNK_DAYS):
+    """
+    Splits a YYYY-MM-DD range into datepicker ranges
+
+    Yields:
+        (from, to) tuples in SOURCE_DATE_FORMAT (dd.mm.yyyy)
+    """
+    start = datetime.strptime(date_from, OUTPUT_DATE_FORMAT)
+    end = datetime.strptime(date_to, OUTPUT_DATE_FORMAT)
+    while start <= end:
+        chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+        yield start.strftime(SOURCE_DATE_FORMAT), chunk_end.strftime(SOURCE_DATE_FORMAT)
+        start = chunk_end + timedelta(days=1)
+
+def merge_rows(rows: dict, source_rows: dict, columns: list):
+    """Merges {trade_date: {col: value}} from one source/settlement into the full rows."""
+    for trade_date, data in source_rows.items():
+        rows.setdefault(trade_date, {col: None for col in columns}).update(data)
+
+def to_data_rows(rows: dict):
+    """Turns {trade_date: {col: value}} into a date-ordered list of export rows."""
+    return [{'trade_date': trade_date, **rows[trade_date]} for trade_date in sorted(rows)]
+
+
+# =============================================================================
+# COLLECTION
+# =============================================================================
+def collect_range_from_source(driver, source_key, currency, date_from, date_to):
+    """Loads a source once and applies one datepicker range per chunk."""
+    source_info = DATA_SOURCES[source_key]; url = source_info['url']
+    log_debug(f"\n{'='*80}\nBackfilling from: {source_key} at {url}\n{'='*80}")
+    load_page(driver, url, source_key)
+    if not set_currency(driver, currency):
+        log_debug(f"Halting backfill from {source_key} due to setup failure", "ERROR"); return {}
+    rows = {}; columns = get_data_columns([currency])
+    for chunk_from, chunk_to in iter_date_chunks(date_from, date_to):
+        date_range = f"{chunk_from}-{chunk_to}"
+        cached = {s: cache_lookup(source_key, currency, s, date_range) for s in source_info['settlements']}
+        if not all(r is not None for r in cached.values()) and not set_date_range(driver, chunk_from, chunk_to): continue
+        for settlement in source_info['settlements']:
+            settlement_rows = cached[settlement]
+            if settlement_rows is None:
+                if not set_settlement(driver, settlement): continue
+                html = get_table_html(driver)
+                if html is None: continue
+                settlement_rows = parse_table_rows(html, source_key, settlement, currency)
+                cache_store(source_key, currency, settlement, date_range, html, settlement_rows)
+            merge_rows(rows, settlement_rows, columns)
+    return rows
+
+def run_backfill(date_from: str, date_to: str, currency: str = DEFAULT_CURRENCY, engine: str = 'selenium',
+                 user_data_dir: str = None):
+    """
+    Collects all trade dates between date_from and date_to (YYYY-MM-DD, inclusive)
+
+    A `user_data_dir` gives the run its own Chrome profile, and with it its own
+    browser instead of the shared warm one.
+
+    Returns:
+        List of data rows ordered by trade date
+    """
+    log_debug("\n" + "="*80 + f"\nSTARTING BACKFILL {date_from} - {date_to}\n" + "="*80)
+    rows = {}; columns = get_data_columns([currency])
+    if engine == 'http':
+        from http_collector import create_session, collect_range_from_source_http
+        with create_session() as session:
+            for source_key in DATA_SOURCES:
+                for chunk_from, chunk_to in iter_date_chunks(date_from, date_to):
+                    merge_rows(rows, collect_range_from_source_http(session, source_key, currency, chunk_from, chunk_to), columns)
+        return to_data_rows(rows)
+
+    driver = None
+    try:
+        driver = setup_driver(user_data_dir, use_daemon=user_data_dir is None)
+        for source_key in DATA_SOURCES:
+            merge_rows(rows, collect_range_from_source(driver, source_key, currency, date_from, date_to), columns)
+    except Exception as e:
+        log_debug(f"A critical error occurred during backfill: {e}", "ERROR")
+    finally:
+        if driver: close_driver(driver)
+    return to_data_rows(rows)
+
+def iter_backfill_chunks(date_from: str, date_to: str, currency: str = DEFAULT_CURRENCY, engine: str = 'selenium',
+                         chunk_days: int = BACKFILL_CHUNK_DAYS):
+    """
+    Collects the range one chunk at a time across all sources, so each chunk's
+    rows are complete (and can be exported) before the next chunk is scraped
+
+    Yields:
+        Date-ordered data rows of one chunk
+    """
+    columns = get_data_columns([currency])
+    chunks = list(iter_date_chunks(date_from, date_to, chunk_days))
+    if engine == 'http':
+        from http_collector import create_session, collect_range_from_source_http
+        with create_session() as session:
+            for chunk_from, chunk_to in chunks:
+                rows = {}
+                for source_key in DATA_SOURCES:
+                    merge_rows(rows, collect_range_from_source_http(session, source_key, currency, chunk_from, chunk_to), columns)
+                yield to_data_rows(rows)
+        return
+
+    driver = setup_driver()
+    try:
+        for chunk_from, chunk_to in chunks:
+            first, last = (datetime.strptime(d, SOURCE_DATE_FORMAT).strftime(OUTPUT_DATE_FORMAT) for d in (chunk_from, chunk_to))
+            rows = {}
+            for source_key in DATA_SOURCES:
+                merge_rows(rows, collect_range_from_source(driver, source_key, currency, first, last), columns)
+            yield to_data_rows(rows)
+    finally:
+        close_driver(driver)
+
+def write_backfill(data_rows: list, date_from: str, date_to: str, per_date: bool = False, currency: str = DEFAULT_CURRENCY):
+    """Writes one multi-row RUSSD_DATA file for the range, or one file per trade date."""
+    if not data_rows:
+        log_debug("No rows collected, nothing to write.", "WARNING"); return []
+    headers = get_excel_headers([currency])
+    if per_date:
+        return [f for f in (export_to_excel(row, headers) for row in data_rows) if f]
+    stamp_from = datetime.strptime(date_from, OUTPUT_DATE_FORMAT).strftime(DATE_INT_FORMAT)
+    stamp_to = datetime.strptime(date_to, OUTPUT_DATE_FORMAT).strftime(DATE_INT_FORMAT)
+    filename = export_rows_to_excel(data_rows, f"RUSSD_DATA_{stamp_from}_{stamp_to}.xlsx", headers)
+    return [filename] if filename else []
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RUSSD historical backfill")
+    parser.add_argument('--from', dest='date_from', required=True, help="First trade date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', required=True, help="Last trade date (YYYY-MM-DD)")
+    parser.add_argument('--currency', choices=list(CURRENCIES), default=DEFAULT_CURRENCY)
+    parser.add_argument('--engine', choices=['selenium', 'http'], default='selenium')
+    parser.add_argument('--per-date', action='store_true', help="Write one RUSSD_DATA file per trade date")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    with span('backfill', engine=args.engine, currency=args.currency):
+        data_rows = run_backfill(args.date_from, args.date_to, args.currency, args.engine)
+        store_rows(data_rows, get_excel_headers([args.currency]))
+        files = write_backfill(data_rows, args.date_from, args.date_to, args.per_date, args.currency)
+    flush_metrics(success=bool(data_rows))
+    print(f"\n✅ Backfilled {len(data_rows)} trade dates into {len(files)} file(s)")
+    print(f"⏱️  Total backfill time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,202 @@
+"""
+RUSSD Browser Daemon
+Keeps one warm undetected Chrome alive between runs and hands it out over a local socket
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # Memory checks are skipped without psutil
+    psutil = None
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 9322
+BROWSER_PROFILE_DIR = os.path.abspath('.russd_profile')  # Cookies and profile state survive restarts
+MAX_BROWSER_RSS_MB = 1500  # Browser is restarted between leases once its process tree grows past this
+HEALTH_CHECK_INTERVAL = 60
+LEASE_TIMEOUT = 900  # A lease not released within this many seconds is reclaimed
+SOCKET_TIMEOUT = 5
+
+
+# =============================================================================
+# DAEMON SIDE
+# =============================================================================
+class WarmBrowser:
+    """Owns the long-lived driver and the single exclusive lease on it."""
+
+    def __init__(self):
+        self.driver = None
+        self.lease_id = None
+        self.lease_started = None
+        self.started_at = None
+        self.lock = threading.RLock()
+
+    def start(self):
+        from orchastrator import log_debug, setup_driver
+        with self.lock:
+            self.driver = setup_driver(user_data_dir=BROWSER_PROFILE_DIR, use_daemon=False)
+            self.started_at = time.time()
+            log_debug(f"Warm browser started (pid {self.driver.browser_pid})", "SUCCESS")
+
+    def stop(self):
+        with self.lock:
+            if self.driver:
+                try: self.driver.quit()
+                except Exception: pass
+            self.driver = None; self.lease_id = None
+
+    def restart(self, reason):
+        from orchastrator import log_debug
+        log_debug(f"Restarting warm browser: {reason}", "WARNING")
+        self.stop(); self.start()
+
+    def rss_mb(self):
+        """Resident memory of Chrome and all its child processes, or None without psutil."""
+        if not psutil or not self.driver: return None
+        try:
+            root = psutil.Process(self.driver.browser_pid)
+            return sum(p.memory_info().rss for p in [root] + root.children(recursive=True)) / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def is_alive(self):
+        try: return bool(self.driver and self.driver.window_handles)
+        except Exception: return False
+
+    def health(self):
+        with self.lock:
+            return {
+                'alive': self.is_alive(), 'rss_mb': self.rss_mb(), 'leased': self.lease_id is not None,
+                'uptime': round(time.time() - self.started_at, 1) if self.started_at else None
+            }
+
+    def check(self):
+        """Restarts a dead or bloated browser; only runs while no client holds the lease."""
+        with self.lock:
+            if self.lease_id and time.time() - self.lease_started > LEASE_TIMEOUT:
+                self.lease_id = None
+            if self.lease_id: return
+            if not self.is_alive(): self.restart("browser not responding")
+            elif (self.rss_mb() or 0) > MAX_BROWSER_RSS_MB: self.restart(f"memory above {MAX_BROWSER_RSS_MB} MB")
+
+    def acquire(self):
+        with self.lock:
+            self.check()
+            if self.lease_id: return {'ok': False, 'error': 'browser is leased'}
+            self.lease_id = os.urandom(8).hex(); self.lease_started = time.time()
+            capabilities = self.driver.capabilities
+            return {
+                'ok': True, 'lease': self.lease_id,
+                'debugger_address': capabilities['goog:chromeOptions']['debuggerAddress'],
+                'chromedriver': self.driver.patcher.executable_path
+            }
+
+    def release(self, lease):
+        with self.lock:
+            if lease != self.lease_id: return {'ok': False, 'error': 'unknown lease'}
+            self.lease_id = None
+        self.check()
+        return {'ok': True}
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        browser = self.server.browser
+        for line in self.rfile:
+            request = json.loads(line)
+            command = request.get('cmd')
+            if command == 'health': response = {'ok': True, **browser.health()}
+            elif command == 'acquire': response = browser.acquire()
+            elif command == 'release': response = browser.release(request.get('lease'))
+            elif command == 'restart': browser.restart("requested by client"); response = {'ok': True}
+            elif command == 'shutdown':
+                response = {'ok': True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else: response = {'ok': False, 'error': f"unknown command: {command}"}
+            self.wfile.write((json.dumps(response) + '\n').encode()); self.wfile.flush()
+
+
+def serve(host=DAEMON_HOST, port=DAEMON_PORT):
+    """Runs the daemon until a shutdown command arrives."""
+    from orchastrator import log_debug
+    browser = WarmBrowser(); browser.start()
+
+    def health_loop():
+        while True:
+            time.sleep(HEALTH_CHECK_INTERVAL)
+            try: browser.check()
+            except Exception as e: log_debug(f"Health check failed: {e}", "ERROR")
+
+    threading.Thread(target=health_loop, daemon=True).start()
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer((host, port), DaemonHandler) as server:
+        server.browser = browser
+        log_debug(f"Browser daemon listening on {host}:{port}", "SUCCESS")
+        try: server.serve_forever()
+        finally: browser.stop()
+
+
+# =============================================================================
+# CLIENT SIDE
+# =============================================================================
+def send_command(address, cmd, **kwargs):
+    host, port = address.rsplit(':', 1)
+    with socket.create_connection((host, int(port)), timeout=SOCKET_TIMEOUT) as sock:
+        sock.sendall((json.dumps({'cmd': cmd, **kwargs}) + '\n').encode())
+        return json.loads(sock.makefile().readline())
+
+def attach_driver(address):
+    """
+    Attaches a new WebDriver session to the daemon's warm browser
+
+    Returns:
+        The driver, or None if the daemon is unreachable or already leased
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from orchastrator import log_debug
+    try:
+        lease = send_command(address, 'acquire')
+    except OSError as e:
+        log_debug(f"Browser daemon at {address} unreachable: {e}", "WARNING"); return None
+    if not lease.get('ok'):
+        log_debug(f"Browser daemon unavailable: {lease.get('error')}", "WARNING"); return None
+    options = webdriver.ChromeOptions(); options.debugger_address = lease['debugger_address']
+    try:
+        driver = webdriver.Chrome(service=Service(lease['chromedriver']), options=options)
+    except Exception as e:
+        log_debug(f"Could not attach to warm browser: {e}", "ERROR")
+        send_command(address, 'release', lease=lease['lease']); return None
+    driver.russd_daemon = (address, lease['lease'])
+    log_debug(f"Attached to warm browser at {lease['debugger_address']}", "SUCCESS")
+    return driver
+
+def detach_driver(driver):
+    """Stops the local chromedriver and hands the browser back; the browser itself keeps running."""
+    address, lease = driver.russd_daemon
+    try: driver.service.stop()
+    finally: send_command(address, 'release', lease=lease)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RUSSD warm browser daemon")
+    parser.add_argument('command', choices=['serve', 'health', 'restart', 'shutdown'])
+    parser.add_argument('--address', default=f"{DAEMON_HOST}:{DAEMON_PORT}")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        host, port = args.address.rsplit(':', 1)
+        serve(host, int(port))
+    else:
+        print(send_command(args.address, args.command))
@@ -0,0 +1,142 @@
+"""
+RUSSD Browser Fetch
+Collects every table variant with concurrent fetch() calls issued from inside one loaded CBR page
+"""
+
+from urllib.parse import urlencode
+
+from config import DATA_SOURCES, SELECTORS, get_data_columns
+from checkpoint import get_checkpoint, collect_with_retry, all_cells
+from http_collector import build_query, parse_max_available_date
+from metrics import span
+from orchastrator import (
+    log_debug, setup_driver, close_driver, load_page, parse_table_html, parse_date_to_standard,
+    cache_lookup, cache_store, collect_settlement
+)
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+FETCH_CONCURRENCY = 8  # fetch() calls in flight inside the page at once
+FETCH_TIMEOUT = 60  # Seconds one batch may take before Selenium gives up on the script
+
+# Runs in the page, so every request carries the browser's cookies and anti-bot state.
+# Fetches each URL with at most `limit` in flight and returns, per URL, the outerHTML of
+# the first element matching `selector` ({html}) or the reason there is none ({error}).
+FETCH_SCRIPT = """
+const [urls, selector, limit, done] = arguments;
+const results = new Array(urls.length);
+let next = 0;
+async function worker() {
+    while (next < urls.length) {
+        const i = next++;
+        try {
+            const response = await fetch(urls[i], {credentials: 'include'});
+            if (!response.ok) { results[i] = {error: 'HTTP ' + response.status}; continue; }
+            const page = new DOMParser().parseFromString(await response.text(), 'text/html');
+            const element = page.querySelector(selector);
+            results[i] = element ? {html: element.outerHTML} : {error: 'no ' + selector + ' in response'};
+        } catch (e) {
+            results[i] = {error: String(e)};
+        }
+    }
+}
+Promise.all(Array.from({length: Math.min(limit, urls.length)}, worker)).then(() => done(results));
+"""
+
+
+# =============================================================================
+# IN-PAGE REQUESTS
+# =============================================================================
+def query_url(source_key, currency, settlement, date):
+    """The filtered table URL the CBR form would request for one cell and date (dd.mm.yyyy)."""
+    return f"{DATA_SOURCES[source_key]['url']}?{urlencode(build_query(currency, settlement, date, date))}"
+
+def fetch_batch(driver, urls, selector, concurrency=FETCH_CONCURRENCY, timeout=FETCH_TIMEOUT, **labels):
+    """
+    Fetches `urls` concurrently from the loaded page, timed as one 'navigate' span
+
+    Returns:
+        The matching fragment of each response, in order; None where the request failed
+    """
+    if not urls: return []
+    driver.set_script_timeout(timeout)
+    with span('navigate', engine='fetch', mode='batch', what=f"{len(urls)} requests", **labels) as timing:
+        results = driver.execute_async_script(FETCH_SCRIPT, urls, selector, concurrency) or []
+        timing['ok'] = len(results) == len(urls) and all(r and r.get('html') for r in results)
+    fragments = []
+    for i, url in enumerate(urls):
+        result = results[i] if i < len(results) else None
+        if not result or not result.get('html'):
+            log_debug(f"In-page fetch of {url} failed: {result.get('error') if result else 'no result'}", "WARNING")
+        fragments.append(result.get('html') if result else None)
+    return fragments
+
+
+# =============================================================================
+# COLLECTION WORKFLOW
+# =============================================================================
+def collect_in_page(driver, currencies):
+    """
+    Collects every currency/source/settlement table through the page loaded on `driver`
+
+    One batch reads each source's latest date, a second fetches every table that
+    is not cached. Tables whose request failed fall back to the click-through
+    collection with retries.
+    """
+    checkpoint = get_checkpoint(); sources = list(DATA_SOURCES)
+    load_page(driver, DATA_SOURCES[sources[0]]['url'], sources[0])
+    pickers = fetch_batch(driver, [DATA_SOURCES[s]['url'] for s in sources], SELECTORS['datepicker'])
+    max_dates = {s: parse_max_available_date(html) if html else None for s, html in zip(sources, pickers)}
+    log_debug(f"Latest available dates: {max_dates}")
+
+    collected, to_fetch, failed = {}, [], []
+    for cell in all_cells(currencies):
+        source_key, settlement, currency = cell; max_date = max_dates[source_key]
+        if not max_date: failed.append(cell); continue
+        data = cache_lookup(source_key, currency, settlement, max_date)
+        if data: collected[cell] = data
+        else: to_fetch.append(cell)
+
+    log_debug(f"Fetching {len(to_fetch)} table(s) in page, {len(collected)} already cached")
+    fragments = fetch_batch(driver, [query_url(s, c, st, max_dates[s]) for s, st, c in to_fetch], SELECTORS['data_table'])
+    for cell, html in zip(to_fetch, fragments):
+        source_key, settlement, currency = cell
+        if html is None: failed.append(cell); continue
+        with span('extract', source=source_key, settlement=settlement, currency=currency):
+            data = parse_table_html(html, source_key, settlement, currency)
+        if data: cache_store(source_key, currency, settlement, max_dates[source_key], html, data)
+        collected[cell] = data
+
+    for cell in failed:
+        source_key, settlement, currency = cell
+        data = collect_with_retry(checkpoint, source_key, f"{source_key} + {settlement} ({currency})",
+                                  lambda attempt: collect_settlement(driver, *cell))
+        if data is not None: collected[cell] = data
+
+    for (source_key, settlement, currency), data in collected.items():
+        max_date = max_dates[source_key]
+        trade_date = data.get('trade_date') or (max_date and parse_date_to_standard(max_date))
+        if trade_date: checkpoint.record(trade_date, source_key, settlement, currency, data)
+    return collected
+
+def run_fetch_collection(currencies):
+    """
+    Collects the latest trade date with one browser session and in-page fetch() batches
+
+    Returns:
+        Data row keyed by DATA_COLUMNS plus 'trade_date', or None on failure
+    """
+    if isinstance(currencies, str): currencies = [currencies]
+    log_debug("\n" + "="*80 + "\nSTARTING IN-PAGE FETCH COLLECTION\n" + "="*80)
+    driver = None
+    try:
+        driver = setup_driver()
+        data_row = {col: None for col in get_data_columns(currencies)}
+        for data in collect_in_page(driver, currencies).values(): data_row.update(data)
+        log_debug("\n" + "="*80 + "\nIN-PAGE FETCH COLLECTION COMPLETE\n" + "="*80)
+        return data_row
+    except Exception as e:
+        log_debug(f"A critical error occurred in the in-page fetch collection: {e}", "ERROR"); return None
+    finally:
+        if driver: close_driver(driver)
@@ -0,0 +1,167 @@
+"""
+RUSSD Browser Pool
+Collects source/settlement combinations concurrently on a bounded set of drivers
+"""
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import DATA_SOURCES, get_data_columns
+from checkpoint import get_checkpoint, collect_with_retry
+from orchastrator import log_debug, setup_driver, close_driver, collect_settlement
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+POOL_WORKERS = 4
+TASK_TIMEOUT = 120  # Seconds one source/settlement task may take before its driver is discarded
+TASK_REQUEUES = 1  # Times a timed-out task is resubmitted on a new driver before it is given up
+ACQUIRE_POLL = 1  # Seconds a waiting task sleeps before checking whether a discarded driver freed a slot
+
+
+# =============================================================================
+# DRIVER POOL
+# =============================================================================
+class DriverPool:
+    """
+    Bounded pool of WebDriver instances created on demand
+
+    undetected_chromedriver patches the chromedriver binary on startup, so
+    driver creation is serialized; the drivers themselves are used in parallel.
+    """
+
+    def __init__(self, size=POOL_WORKERS, factory=setup_driver):
+        self.size = size
+        self.factory = factory
+        self._idle = queue.Queue()
+        self._created = 0
+        self._all = []
+        self._discarded = set()  # Quit drivers a timed-out task may still try to hand back
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._created < self.size:
+                    driver = self.factory()
+                    self._created += 1; self._all.append(driver)
+                    return driver
+            # A discarded driver frees its slot without waking anyone, so look again now and then
+            try: return self._idle.get(timeout=ACQUIRE_POLL)
+            except queue.Empty: pass
+
+    def release(self, driver):
+        with self._lock:
+            if driver in self._discarded: return  # Already quit after its task timed out
+        self._idle.put(driver)
+
+    def discard(self, driver):
+        """Quits a driver that is stuck or broken and frees its slot."""
+        with self._lock:
+            if driver in self._discarded: return
+            self._discarded.add(driver)
+            if driver in self._all:
+                self._all.remove(driver); self._created -= 1
+        try: close_driver(driver)
+        except Exception as e: log_debug(f"Error quitting discarded driver: {e}", "WARNING")
+
+    def close(self):
+        with self._lock:
+            drivers, self._all, self._created = self._all, [], 0
+        for driver in drivers:
+            try: close_driver(driver)
+            except Exception as e: log_debug(f"Error quitting driver: {e}", "WARNING")
+
+
+# =============================================================================
+# TASKS
+# =============================================================================
+def run_parallel_collection(currencies, workers=POOL_WORKERS, task_timeout=TASK_TIMEOUT, factory=setup_driver):
+    """
+    Collects every currency/source/settlement combination on a pool of drivers
+
+    A task that runs past task_timeout is abandoned: its driver is quit, its
+    thread is no longer waited for and the task is resubmitted (up to
+    TASK_REQUEUES times) to run on a new driver.
+
+    Args:
+        currencies: Currency codes from config.CURRENCIES
+        workers: Maximum number of concurrent drivers
+        task_timeout: Seconds before a task is abandoned and its driver quit
+        factory: Creates a driver for the pool
+
+    Returns:
+        Data row keyed by DATA_COLUMNS plus 'trade_date', or None on failure
+    """
+    if isinstance(currencies, str): currencies = [currencies]
+    log_debug("\n" + "="*80 + f"\nSTARTING PARALLEL DATA COLLECTION ({workers} workers)\n" + "="*80)
+    tasks = [(source_key, settlement, currency) for currency in currencies
+             for source_key, info in DATA_SOURCES.items() for settlement in info['settlements']]
+    pool = DriverPool(min(workers, len(tasks)), factory)
+    in_use = {}  # lease -> (task, driver, start time); a requeued task runs under a new lease
+    leases = itertools.count()
+    abandoned = {}  # lease -> Event set once the task has timed out, so its thread stops retrying
+    checkpoint = get_checkpoint()
+
+    def run_task(task, lease):
+        driver = pool.acquire()
+        in_use[lease] = (task, driver, time.monotonic())
+        try:
+            result = collect_with_retry(checkpoint, task[0], ' + '.join(task), lambda attempt: collect_settlement(driver, *task),
+                                        cancelled=abandoned[lease])
+        finally:
+            in_use.pop(lease, None)
+        if result is None: pool.discard(driver)  # Every try failed; do not hand a possibly broken driver on
+        else: pool.release(driver)
+        return result
+
+    data_row = {col: None for col in get_data_columns(currencies)}
+    trade_dates = set()
+    # Abandoned tasks keep their threads until the quit driver makes them fail, so requeues need threads of their own
+    executor = ThreadPoolExecutor(max_workers=pool.size + len(tasks) * TASK_REQUEUES)
+    pending = {}  # future -> (task, lease, requeues so far)
+
+    def submit(task, requeues=0):
+        lease = next(leases); abandoned[lease] = threading.Event()
+        pending[executor.submit(run_task, task, lease)] = (task, lease, requeues)
+
+    try:
+        for task in tasks: submit(task)
+        while pending:
+            done, _ = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, _, _ = pending.pop(future)
+                data = future.result()
+                if data:
+                    trade_dates.add(data.get('trade_date')); data_row.update(data)
+                    checkpoint.record(data.get('trade_date'), *task, data)
+                    log_debug(f"Successfully collected data for {' + '.join(task)}", "SUCCESS")
+            now = time.monotonic()
+            for lease, (task, driver, started) in list(in_use.items()):
+                if now - started <= task_timeout: continue
+                future = next((f for f, (_, l, _) in pending.items() if l == lease), None)
+                if future is None or future.done(): continue  # Finished while we were looking
+                log_debug(f"[{' + '.join(task)}] Timed out after {task_timeout}s, discarding driver", "ERROR")
+                abandoned[lease].set(); in_use.pop(lease, None); pool.discard(driver)
+                # The stuck thread cannot be interrupted; stop waiting for it and ignore whatever it returns
+                future.cancel(); _, _, requeues = pending.pop(future)
+                if requeues < TASK_REQUEUES:
+                    log_debug(f"[{' + '.join(task)}] Requeued on a new driver", "WARNING"); submit(task, requeues + 1)
+                else:
+                    log_debug(f"[{' + '.join(task)}] Giving up after {requeues + 1} timeouts", "ERROR")
+        if len(trade_dates) > 1:
+            log_debug(f"Sources returned different trade dates: {sorted(d for d in trade_dates if d)}", "WARNING")
+        log_debug("\n" + "="*80 + "\nPARALLEL DATA COLLECTION COMPLETE\n" + "="*80)
+        return data_row
+    except Exception as e:
+        log_debug(f"A critical error occurred in the parallel collection process: {e}", "ERROR"); return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        pool.close()
@@ -0,0 +1,74 @@
+"""
+RUSSD CBR Calendar
+Business days of the Bank of Russia: weekdays except Russian public holidays, plus transferred working Saturdays
+"""
+
+from datetime import date, datetime, timedelta
+
+from config import OUTPUT_DATE_FORMAT
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+# Public holidays (month, day) of the Labour Code; used for years without a decree below
+FIXED_HOLIDAYS = [(1, 1), (1, 2), (1, 3), (1, 4), (1, 5), (1, 6), (1, 7), (1, 8),
+                  (2, 23), (3, 8), (5, 1), (5, 9), (6, 12), (11, 4)]
+
+# Per year, from the government's holiday transfer decree: weekdays off and Saturdays worked.
+# Add the next year here once the decree is published.
+NON_WORKING_DAYS = {
+    2024: ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08',
+           '2024-02-23', '2024-03-08', '2024-04-29', '2024-04-30', '2024-05-01', '2024-05-09',
+           '2024-05-10', '2024-06-12', '2024-11-04', '2024-12-30', '2024-12-31'],
+    2025: ['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-06', '2025-01-07', '2025-01-08',
+           '2025-05-01', '2025-05-02', '2025-05-08', '2025-05-09', '2025-06-12', '2025-06-13',
+           '2025-11-03', '2025-11-04', '2025-12-31'],
+    2026: ['2026-01-01', '2026-01-02', '2026-01-05', '2026-01-06', '2026-01-07', '2026-01-08',
+           '2026-01-09', '2026-02-23', '2026-03-09', '2026-05-01', '2026-05-11', '2026-06-12',
+           '2026-11-04', '2026-12-31'],
+}
+WORKING_SATURDAYS = {
+    2024: ['2024-04-27', '2024-11-02', '2024-12-28'],
+    2025: ['2025-11-01'],
+    2026: [],
+}
+
+_NON_WORKING = {datetime.strptime(d, OUTPUT_DATE_FORMAT).date() for days in NON_WORKING_DAYS.values() for d in days}
+_WORKING_SATURDAYS = {datetime.strptime(d, OUTPUT_DATE_FORMAT).date() for days in WORKING_SATURDAYS.values() for d in days}
+
+
+def _as_date(day):
+    if isinstance(day, str): return datetime.strptime(day, OUTPUT_DATE_FORMAT).date()
+    return day.date() if isinstance(day, datetime) else day
+
+def is_business_day(day):
+    """Whether CBR works on `day` (date, datetime or YYYY-MM-DD)."""
+    day = _as_date(day)
+    if day.year in NON_WORKING_DAYS:
+        return day in _WORKING_SATURDAYS or (day.weekday() < 5 and day not in _NON_WORKING)
+    return day.weekday() < 5 and (day.month, day.day) not in FIXED_HOLIDAYS
+
+def next_business_day(day):
+    """First CBR business day strictly after `day`, as a date."""
+    day = _as_date(day) + timedelta(days=1)
+    while not is_business_day(day): day += timedelta(days=1)
+    return day
+
+def business_days(date_from, date_to):
+    """CBR business days from `date_from` to `date_to` inclusive, as dates."""
+    day, last = _as_date(date_from), _as_date(date_to)
+    days = []
+    while day <= last:
+        if is_business_day(day): days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List CBR business days in a range")
+    parser.add_argument('--from', dest='date_from', default=date.today().strftime(OUTPUT_DATE_FORMAT))
+    parser.add_argument('--to', dest='date_to', default=(date.today() + timedelta(days=14)).strftime(OUTPUT_DATE_FORMAT))
+    args = parser.parse_args()
+    for day in business_days(args.date_from, args.date_to): print(day.strftime(f"{OUTPUT_DATE_FORMAT} %a"))
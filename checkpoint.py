@@ -0,0 +1,156 @@
+"""
+RUSSD Checkpoint
+Per (source, settlement, currency) checkpoint of a run, with retry backoff and a circuit breaker
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+from config import DATA_SOURCES, STATE_DIR, get_data_columns
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+CHECKPOINT_FILE = os.path.join(STATE_DIR, 'checkpoint.json')
+RETRY_ATTEMPTS = 3  # Tries per cell, the first included
+RETRY_BASE_DELAY = 2.0  # Seconds before the second try; doubled for every further try
+RETRY_MAX_DELAY = 30.0
+BREAKER_THRESHOLD = 3  # Consecutive cells of one source page given up on before its breaker opens
+BREAKER_COOLDOWN = 10 * 60  # Seconds an open breaker skips the source before allowing another try
+
+
+def cell_key(source, settlement, currency):
+    return f"{source}|{settlement}|{currency}"
+
+def all_cells(currencies):
+    """Every (source, settlement, currency) a run over `currencies` has to collect."""
+    return [(source, settlement, currency) for currency in currencies
+            for source, info in DATA_SOURCES.items() for settlement in info['settlements']]
+
+
+class Checkpoint:
+    """
+    Collected cells of the current trade date, saved after every cell
+
+    Cells recorded for a different trade date than the stored one start a new
+    checkpoint, so a resume never mixes data from two CBR releases.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f: self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+        self.state.setdefault('trade_date', None)
+        self.state.setdefault('cells', {})
+        self.state.setdefault('breakers', {})
+
+    @property
+    def trade_date(self):
+        return self.state['trade_date']
+
+    def record(self, trade_date, source, settlement, currency, data):
+        """
+        Stores one collected cell for `trade_date` (YYYY-MM-DD); data is {column letter: value}
+
+        An empty table is not recorded, so --resume tries the cell again.
+        """
+        if not data: return
+        with self.lock:
+            if trade_date != self.state['trade_date']:
+                self.state.update(trade_date=trade_date, cells={})
+            self.state['cells'][cell_key(source, settlement, currency)] = data
+            self._save()
+
+    def get(self, trade_date, source, settlement, currency):
+        """The checkpointed data of a cell for `trade_date` (YYYY-MM-DD), or None."""
+        if trade_date != self.state['trade_date']: return None
+        return self.state['cells'].get(cell_key(source, settlement, currency))
+
+    def missing(self, currencies):
+        """Cells of `currencies` not collected for the checkpointed trade date."""
+        return [cell for cell in all_cells(currencies) if not self.state['cells'].get(cell_key(*cell))]
+
+    def data_row(self, currencies):
+        """The data row assembled from checkpointed cells; missing columns are None."""
+        row = {col: None for col in get_data_columns(currencies)}
+        for source, settlement, currency in all_cells(currencies):
+            row.update(self.state['cells'].get(cell_key(source, settlement, currency), {}))
+        if self.state['trade_date']: row['trade_date'] = self.state['trade_date']
+        return row
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f: json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # -------------------------------------------------------------------------
+    # Circuit breaker, one per source page; persisted so the next run honours it
+    # -------------------------------------------------------------------------
+    def breaker_allows(self, source, now=None):
+        breaker = self.state['breakers'].get(source)
+        if not breaker or breaker['failures'] < BREAKER_THRESHOLD: return True
+        return (now or time.time()) - breaker['opened_at'] >= BREAKER_COOLDOWN  # Half-open: one more try
+
+    def breaker_failure(self, source):
+        with self.lock:
+            breaker = self.state['breakers'].setdefault(source, {'failures': 0, 'opened_at': None})
+            breaker['failures'] += 1
+            if breaker['failures'] >= BREAKER_THRESHOLD: breaker['opened_at'] = time.time()
+            self._save()
+
+    def breaker_success(self, source):
+        with self.lock:
+            if self.state['breakers'].pop(source, None): self._save()
+
+
+_checkpoint = None
+
+def get_checkpoint():
+    """Process-wide checkpoint, loaded on first use."""
+    global _checkpoint
+    if _checkpoint is None: _checkpoint = Checkpoint()
+    return _checkpoint
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff before try number `attempt` (2, 3, ...)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 2)))
+
+def collect_with_retry(checkpoint, source, description, attempt_fn, attempts=RETRY_ATTEMPTS, sleep=time.sleep,
+                       cancelled=None):
+    """
+    Calls attempt_fn(attempt) until it returns something other than None,
+    backing off between tries
+
+    A cell that fails all its tries counts once against the source's circuit
+    breaker; once it is open other cells of that source are skipped. Once the
+    `cancelled` event is set (the caller abandoned the cell) no further tries
+    are made and nothing is counted.
+
+    Returns:
+        The first result that is not None ({} for an empty table), or None
+    """
+    from orchastrator import log_debug
+    for attempt in range(1, attempts + 1):
+        if not checkpoint.breaker_allows(source):
+            log_debug(f"Circuit open for {source}, skipping {description}", "WARNING"); return None
+        if attempt > 1:
+            delay = backoff_delay(attempt)
+            log_debug(f"Retrying {description} (try {attempt}/{attempts}) in {delay:.1f}s", "WARNING"); sleep(delay)
+        if cancelled is not None and cancelled.is_set(): return None
+        try:
+            data = attempt_fn(attempt)
+        except Exception as e:
+            if cancelled is not None and cancelled.is_set(): return None
+            log_debug(f"{description} failed: {e}", "ERROR"); data = None
+        if data is not None:
+            checkpoint.breaker_success(source); return data
+    checkpoint.breaker_failure(source)
+    log_debug(f"Giving up on {description} after {attempts} tries", "ERROR")
+    return None
@@ -3,16 +3,37 @@
 # =============================================================================
 # DATA SOURCES CONFIGURATION
 # =============================================================================
+# Each series is (code template, description suffix, header keywords, type, unit),
+# in the order of the table's value cells after the date column.
+# - In the code template {settlement} and {currency} are substituted, and {tag}
+#   becomes '.<currency>' for every currency except DEFAULT_CURRENCY, which keeps
+#   the legacy codes. The unit may use {currency} as well.
+# - The header keywords locate the series' cell by the table header label that
+#   contains all of them; the series position is the fallback.
+# - The type selects the cell converter: 'number' or 'date' (YYYYMMDD integer).
 DATA_SOURCES = {
     'swapinfosellvol': {
         'url': 'https://www.cbr.ru/eng/hd_base/swap_info/swapinfosellvol/',
         'description': 'Volume of Foreign Currency/RUB sell/buy FX Swaps',
         'settlements': ['TODTOM', 'TOMSPT'],
+        'series': [
+            ('VOLUMEFXSWAPS.{settlement}.{currency}', '', ('currency',), 'number', 'Millions of {currency}'),
+            ('VOLUMEFXSWAPS.{settlement}{tag}.RUB', '. Rubles', ('rub',), 'number', 'Millions of RUB'),
+        ],
     },
     'swap_info_sell': {
         'url': 'https://www.cbr.ru/eng/hd_base/swap_info/sell/',
         'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps',
         'settlements': ['TODTOM', 'TOMSPT'],
+        'series': [
+            ('TERMSFXSWAPS.{settlement}{tag}.FCSELLDATE', '. FC sell date', ('fc', 'sell'), 'date', 'Date (YYYYMMDD)'),
+            ('TERMSFXSWAPS.{settlement}{tag}.RUBSELLDATE', '. RUB sell date', ('rub', 'sell'), 'date', 'Date (YYYYMMDD)'),
+            ('TERMSFXSWAPS.{settlement}{tag}.RUBINTERESTRATE', '. RUB interest rate (% p.a.)', ('rub', 'interest'), 'number', '% per annum'),
+            ('TERMSFXSWAPS.{settlement}{tag}.FCINTERESTRATE', '. FC interest rate (% p.a.)', ('fc', 'interest'), 'number', '% per annum'),
+            ('TERMSFXSWAPS.{settlement}{tag}.BASESWAPRATE', '. Base swap rate RUB/FC', ('base', 'swap'), 'number', '% per annum'),
+            ('TERMSFXSWAPS.{settlement}{tag}.SWAPPOINTSRUB', '. Swap points (rubles)', ('points',), 'number', 'Rubles'),
+            ('TERMSFXSWAPS.{settlement}{tag}.MAXALLOTMENTAMOUNT', '. Maximum allotment amount (billions of FC)', ('allotment',), 'number', 'Billions of FC'),
+        ],
     }
 }
 
@@ -31,6 +52,23 @@ SETTLEMENTS = {
     'TOMSPT': {'name': 'Tomorrow-Spot', 'value': '1', 'id': 'UniDbQuery_P1_2'}
 }
 
+# =============================================================================
+# HTTP QUERY PARAMETERS (UniDbQuery form used by the swap_info pages)
+# =============================================================================
+QUERY_PARAMS = {
+    'posted': 'UniDbQuery.Posted',
+    'currency': 'UniDbQuery.Cur',
+    'settlement': 'UniDbQuery.P1',
+    'date_from': 'UniDbQuery.From',
+    'date_to': 'UniDbQuery.To'
+}
+
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+
 # =============================================================================
 # DATE FORMATS
 # =============================================================================
@@ -49,51 +87,93 @@ SELECTORS = {
     'date_to_input': 'input.datepicker-filter_input-to',
     'datepicker_apply': 'button.datepicker-filter_apply-btn',
     'data_table': 'table.data',
+    'datepicker': 'div.datepicker-filter',
     'cookie_accept_button': 'button.js-cookie-accept'
 }
 
 # =============================================================================
 # EXCEL OUTPUT CONFIGURATION
 # =============================================================================
-EXCEL_HEADERS = {
-    'B': {'code': 'RUSSD.VOLUMEFXSWAPS.TODTOM.USD.B', 'description': 'Volume of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD'},
-    'C': {'code': 'RUSSD.VOLUMEFXSWAPS.TODTOM.RUB.B', 'description': 'Volume of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. Rubles'},
-    'D': {'code': 'RUSSD.VOLUMEFXSWAPS.TOMSPT.USD.B', 'description': 'Volume of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD'},
-    'E': {'code': 'RUSSD.VOLUMEFXSWAPS.TOMSPT.RUB.B', 'description': 'Volume of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. Rubles'},
-    'F': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.FCSELLDATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. FC sell date'},
-    'G': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.RUBSELLDATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. RUB sell date'},
-    'H': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.RUBINTERESTRATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. RUB interest rate (% p.a.)'},
-    'I': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.FCINTERESTRATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. FC interest rate (% p.a.)'},
-    'J': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.BASESWAPRATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. Base swap rate RUB/FC'},
-    'K': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.SWAPPOINTSRUB.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. Swap points (rubles)'},
-    'L': {'code': 'RUSSD.TERMSFXSWAPS.TODTOM.MAXALLOTMENTAMOUNT.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TODTOM. USD. Maximum allotment amount (billions of FC)'},
-    'M': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.FCSELLDATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. FC sell date'},
-    'N': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.RUBSELLDATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. RUB sell date'},
-    'O': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.RUBINTERESTRATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. RUB interest rate (% p.a.)'},
-    'P': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.FCINTERESTRATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. FC interest rate (% p.a.)'},
-    'Q': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.BASESWAPRATE.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. Base swap rate RUB/FC'},
-    'R': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.SWAPPOINTSRUB.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. Swap points (rubles)'},
-    'S': {'code': 'RUSSD.TERMSFXSWAPS.TOMSPT.MAXALLOTMENTAMOUNT.B', 'description': 'Terms of Foreign Currency/RUB sell/buy FX Swaps. TOMSPT. USD. Maximum allotment amount (billions of FC)'}
-}
+def column_letter(index: int) -> str:
+    """Converts a 1-based column index to an Excel column letter (1 -> A, 28 -> AB)."""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def build_excel_headers(currencies):
+    """
+    Generates the Excel headers for the currency x source x settlement matrix
+
+    Columns start at B (A holds the trade date) and run currency by currency,
+    then source, settlement and series, so a single-currency run spans B-S.
+    """
+    headers = {}
+    for currency in currencies:
+        tag = '' if currency == DEFAULT_CURRENCY else f'.{currency}'
+        for source, source_info in DATA_SOURCES.items():
+            for settlement in source_info['settlements']:
+                for code_template, description_suffix, _, value_type, unit in source_info['series']:
+                    code = code_template.format(settlement=settlement, currency=currency, tag=tag)
+                    headers[column_letter(len(headers) + 2)] = {
+                        'code': f'RUSSD.{code}.B',
+                        'description': f"{source_info['description']}. {settlement}. {currency}{description_suffix}",
+                        'currency': currency, 'source': source, 'settlement': settlement,
+                        'type': value_type, 'unit': unit.format(currency=currency)
+                    }
+    return headers
+
+EXCEL_HEADERS = build_excel_headers([DEFAULT_CURRENCY])
+MATRIX_EXCEL_HEADERS = build_excel_headers(list(CURRENCIES))
+MATRIX_DATA_COLUMNS = list(MATRIX_EXCEL_HEADERS.keys())
 
 DATA_COLUMNS = list(EXCEL_HEADERS.keys())
 
+# =============================================================================
+# COMPILED SCHEMA (index tables built once from the headers above)
+# =============================================================================
+# (source, settlement, currency) -> matrix columns in series order
+COLUMN_INDEX = {}
+for _col, _info in MATRIX_EXCEL_HEADERS.items():
+    COLUMN_INDEX.setdefault((_info['source'], _info['settlement'], _info['currency']), []).append(_col)
+COLUMN_INDEX = {key: tuple(cols) for key, cols in COLUMN_INDEX.items()}
+
+# currency -> its matrix columns, in matrix order
+CURRENCY_COLUMNS = {currency: tuple(col for col, info in MATRIX_EXCEL_HEADERS.items() if info['currency'] == currency)
+                    for currency in CURRENCIES}
+
+# source -> [(header keywords, type, fallback cell index)] in series order
+SOURCE_SERIES = {source: [(keywords, value_type, position)
+                          for position, (_, _, keywords, value_type, _) in enumerate(info['series'], start=1)]
+                 for source, info in DATA_SOURCES.items()}
+
+# =============================================================================
+# RUN STATE
+# =============================================================================
+STATE_DIR = '.russd_state'  # Response cache and other state kept between runs
+
 # =============================================================================
 # METADATA CONFIGURATION
 # =============================================================================
 DATA_FREQUENCY = 'Daily'
 DATA_SOURCE_NAME = 'Central Bank of Russia'
 
-def get_column_mapping_by_source(source: str, settlement: str):
-    """Gets the list of Excel columns for a given source and settlement type."""
-    mapping = {
-        'swapinfosellvol': {
-            'TODTOM': ['B', 'C'],
-            'TOMSPT': ['D', 'E']
-        },
-        'swap_info_sell': {
-            'TODTOM': ['F', 'G', 'H', 'I', 'J', 'K', 'L'],
-            'TOMSPT': ['M', 'N', 'O', 'P', 'Q', 'R', 'S']
-        }
-    }
-    return mapping.get(source, {}).get(settlement, [])
\ No newline at end of file
+def get_column_mapping_by_source(source: str, settlement: str, currency: str = DEFAULT_CURRENCY):
+    """Gets the matrix Excel columns (a tuple, in series order) for a given source, settlement type and currency."""
+    return COLUMN_INDEX.get((source, settlement, currency), ())
+
+def get_data_columns(currencies):
+    """Gets the matrix Excel columns collected for the given currencies."""
+    return [col for currency in CURRENCIES if currency in currencies for col in CURRENCY_COLUMNS[currency]]
+
+def get_excel_headers(currencies):
+    """
+    Headers of the selected currencies only, keyed by their matrix columns
+
+    The default currency alone keeps the legacy B-S layout; the export, the
+    store and validation all follow the same column set, so a subset never
+    carries blank columns of currencies that were not collected.
+    """
+    if list(currencies) == [DEFAULT_CURRENCY]: return EXCEL_HEADERS
+    return {col: MATRIX_EXCEL_HEADERS[col] for col in get_data_columns(currencies)}
\ No newline at end of file
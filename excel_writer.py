@@ -0,0 +1,72 @@
+"""
+RUSSD Excel Writer
+Streams RUSSD_DATA rows into an openpyxl write-only workbook without an intermediate DataFrame
+"""
+
+import zipfile
+
+from openpyxl import Workbook
+from openpyxl.writer.excel import ExcelWriter
+
+from config import EXCEL_HEADERS
+
+SHEET_NAME = 'Sheet1'  # Same sheet name the previous pandas export produced
+
+
+def iter_sheet_rows(data_rows, headers=EXCEL_HEADERS):
+    """
+    Yields the sheet layout row by row: codes, descriptions, then one row per data row
+
+    Column A holds the trade date (blank in the two header rows); the data
+    columns follow in header order, 18 per selected currency.
+    """
+    columns = list(headers)
+    yield [''] + [headers[col]['code'] for col in columns]
+    yield [''] + [headers[col]['description'] for col in columns]
+    for data_row in data_rows:
+        yield [data_row.get('trade_date', '')] + [data_row.get(col) for col in columns]
+
+class StampedZipFile(zipfile.ZipFile):
+    """ZipFile that gives every member the same timestamp, so equal content zips to equal bytes."""
+
+    def __init__(self, target, date_time, **kwargs):
+        super().__init__(target, 'w', zipfile.ZIP_DEFLATED, **kwargs)
+        self.date_time = date_time
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if not isinstance(zinfo_or_arcname, zipfile.ZipInfo):
+            zinfo_or_arcname = zipfile.ZipInfo(zinfo_or_arcname, self.date_time)
+            zinfo_or_arcname.compress_type = self.compression
+            zinfo_or_arcname.external_attr = 0o600 << 16
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        with open(filename, 'rb') as f: self.writestr(arcname or filename, f.read(), compress_type, compresslevel)
+
+
+def write_data_workbook(data_rows, target, headers=EXCEL_HEADERS, timestamp=None):
+    """
+    Writes a RUSSD_DATA workbook in constant memory
+
+    Args:
+        data_rows: Iterable of data rows keyed by column letter plus 'trade_date';
+            a generator is consumed lazily
+        target: Filename or binary file-like object
+        headers: Excel headers (config.get_excel_headers of the selected currencies)
+        timestamp: Optional datetime stamped on the document properties and
+            every part instead of the current time, making the bytes reproducible
+
+    Returns:
+        Number of data rows written
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    count = -2
+    for row in iter_sheet_rows(data_rows, headers):
+        ws.append(row); count += 1
+    if timestamp is None:
+        wb.save(target); return count
+    wb.properties.created = wb.properties.modified = timestamp
+    archive = StampedZipFile(target, timestamp.timetuple()[:6], allowZip64=True)
+    ExcelWriter(wb, archive).save()
+    return count
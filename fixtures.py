@@ -0,0 +1,322 @@
+"""
+RUSSD Fixtures
+Records CBR table HTML for offline replay and benchmarks the parsing and export stages on it
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import (
+    DATA_SOURCES, CURRENCIES, DEFAULT_CURRENCY,
+    get_data_columns, get_excel_headers
+)
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures')  # Independent of the working directory
+MANIFEST_NAME = 'manifest.json'
+BENCH_ROUNDS = 5
+BACKFILL_ROWS = 5000  # Rows in the synthetic backfill tables
+REGRESSION_THRESHOLD = 1.25  # --compare fails when a stage's median is this much slower than the baseline
+
+
+# =============================================================================
+# RECORDING
+# =============================================================================
+def fixture_name(source, settlement, currency, date_range=None):
+    suffix = f"__{date_range.replace('.', '')}" if date_range else ''
+    return f"{source}__{settlement}__{currency}{suffix}.html"
+
+def load_manifest(directory=FIXTURE_DIR):
+    """{file name: {'source', 'settlement', 'currency', 'max_date', 'date_range', 'recorded'}}"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_fixture(directory, manifest, html, source, settlement, currency, max_date, date_range=None):
+    os.makedirs(directory, exist_ok=True)
+    name = fixture_name(source, settlement, currency, date_range)
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as f: f.write(html)
+    manifest[name] = {'source': source, 'settlement': settlement, 'currency': currency, 'max_date': max_date,
+                      'date_range': date_range, 'recorded': datetime.now().isoformat(timespec='seconds')}
+    with open(os.path.join(directory, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return name
+
+def record_http(currencies, directory=FIXTURE_DIR, date_from=None, date_to=None, sources=DATA_SOURCES):
+    """
+    Saves the table HTML of every source/settlement/currency using the HTTP engine
+
+    Args:
+        currencies: Currency codes from config.CURRENCIES
+        directory: Fixture directory
+        date_from, date_to: Optional dd.mm.yyyy range; defaults to the latest available date
+        sources: Source mapping, overridable to point at a local stub server
+
+    Returns:
+        List of fixture file names written
+    """
+    from http_collector import create_session, fetch_page, build_query, parse_max_available_date
+    from orchastrator import log_debug
+    manifest = load_manifest(directory); written = []
+    with create_session() as session:
+        for source, source_info in sources.items():
+            max_date = parse_max_available_date(fetch_page(session, source_info['url']))
+            if not max_date: log_debug(f"No max date for {source}, skipping", "ERROR"); continue
+            first, last = date_from or max_date, date_to or max_date
+            date_range = f"{first}-{last}" if (date_from or date_to) else None
+            for currency in currencies:
+                for settlement in source_info['settlements']:
+                    html = fetch_page(session, source_info['url'], build_query(currency, settlement, first, last))
+                    written.append(save_fixture(directory, manifest, html, source, settlement, currency, max_date, date_range))
+                    log_debug(f"Recorded {written[-1]}", "SUCCESS")
+    return written
+
+def record_selenium(currencies, directory=FIXTURE_DIR):
+    """Saves the `table.data` outerHTML of every source/settlement/currency from a live browser session."""
+    from orchastrator import (
+        setup_driver, close_driver, load_page, get_max_available_date, set_currency,
+        set_date_to_latest, set_settlement, get_table_html, log_debug
+    )
+    manifest = load_manifest(directory); written = []
+    driver = setup_driver()
+    try:
+        for source, source_info in DATA_SOURCES.items():
+            load_page(driver, source_info['url'], source)
+            max_date = get_max_available_date(driver)
+            for currency in currencies:
+                if not set_currency(driver, currency) or not set_date_to_latest(driver):
+                    log_debug(f"Could not set up {source} for {currency}, skipping", "ERROR"); continue
+                for settlement in source_info['settlements']:
+                    if not set_settlement(driver, settlement): continue
+                    html = get_table_html(driver)
+                    if html is None: continue
+                    written.append(save_fixture(directory, manifest, html, source, settlement, currency, max_date))
+                    log_debug(f"Recorded {written[-1]}", "SUCCESS")
+    finally:
+        close_driver(driver)
+    return written
+
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+class FixtureElement:
+    def __init__(self, html):
+        self.html = html
+
+    def get_attribute(self, name):
+        return self.html if name == 'outerHTML' else None
+
+
+class FixtureDriver:
+    """
+    Stands in for a WebDriver whose page shows one recorded table, so the
+    unchanged orchastrator extraction code runs against it without a browser.
+    """
+
+    def __init__(self, html):
+        self.html = html
+
+    def find_element(self, by, selector):
+        return FixtureElement(self.html)
+
+    def find_elements(self, by, selector):
+        return [FixtureElement(self.html)]
+
+
+def iter_fixtures(directory=FIXTURE_DIR, currency=None, ranges=False):
+    """Yields (file name, manifest entry, html) for the recorded latest-date (or range) tables."""
+    for name, entry in sorted(load_manifest(directory).items()):
+        if currency and entry['currency'] != currency: continue
+        if bool(entry.get('date_range')) != ranges: continue
+        with open(os.path.join(directory, name), encoding='utf-8') as f: yield name, entry, f.read()
+
+def replay(currencies=(DEFAULT_CURRENCY,), directory=FIXTURE_DIR):
+    """
+    Rebuilds the collected data row from fixtures through extract_table_data
+
+    Returns:
+        Data row keyed by column letter plus 'trade_date', as main() would export it
+    """
+    from orchastrator import extract_table_data
+    data_row = {col: None for col in get_data_columns(currencies)}
+    for currency in currencies:
+        for _, entry, html in iter_fixtures(directory, currency):
+            data = extract_table_data(FixtureDriver(html), entry['source'], entry['settlement'], currency)
+            if data: data_row.update(data)
+    return data_row
+
+@contextmanager
+def scratch_dir():
+    """Runs the file-writing stages in a throwaway working directory."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try: yield tmp
+        finally: os.chdir(cwd)
+
+def replay_pipeline(currencies=(DEFAULT_CURRENCY,), directory=FIXTURE_DIR):
+    """Runs extraction, Excel export, metadata and packaging on fixtures; returns the ZIP's file listing."""
+    import zipfile
+    from orchastrator import export_to_excel
+    from metadata_writer import create_metadata_file
+    from package_creator import create_package
+    directory = os.path.abspath(directory)
+    data_row = replay(currencies, directory)
+    if not data_row.get('trade_date'): return None
+    headers = get_excel_headers(list(currencies))
+    with scratch_dir():
+        zip_file = create_package(export_to_excel(data_row, headers), create_metadata_file(data_row['trade_date'], headers))
+        with zipfile.ZipFile(zip_file) as zf: return zf.namelist()
+
+
+# =============================================================================
+# BENCHMARK SUITE
+# =============================================================================
+def time_stage(func, rounds=BENCH_ROUNDS):
+    """Calls func once to warm up, then `rounds` times; returns timing stats in milliseconds."""
+    func(); samples = []
+    for _ in range(rounds):
+        start = time.perf_counter(); func(); samples.append((time.perf_counter() - start) * 1000)
+    return {'min': min(samples), 'median': statistics.median(samples), 'mean': statistics.mean(samples),
+            'max': max(samples), 'rounds': rounds}
+
+def synthetic_rows(html_by_source, currency=DEFAULT_CURRENCY):
+    """Merges the parsed synthetic tables into backfill-style data rows."""
+    from table_parser import parse_table
+    rows = {}
+    for source, html in html_by_source.items():
+        for settlement in DATA_SOURCES[source]['settlements']:
+            for trade_date, data in parse_table(html, source, settlement, currency).items():
+                rows.setdefault(trade_date, {'trade_date': trade_date}).update(data)
+    return [rows[d] for d in sorted(rows)]
+
+def build_stages(directory=FIXTURE_DIR, backfill_rows=BACKFILL_ROWS):
+    """
+    Returns {stage name: zero-argument callable}
+
+    Recorded fixtures (if any) cover the daily path; synthetic backfill tables
+    from table_parser cover the large multi-row path.
+    """
+    import io
+    from table_parser import parse_typed_rows, parse_table, build_synthetic_table
+    from excel_writer import write_data_workbook
+    from orchastrator import extract_table_data, export_to_excel, parse_number, parse_date_to_integer
+    from metadata_writer import create_metadata_file
+    from package_creator import create_package, create_package_from_rows
+
+    stages = {}
+    fixtures = list(iter_fixtures(directory))
+    if fixtures:
+        stages['fixtures.parse'] = lambda: [parse_typed_rows(html, e['source']) for _, e, html in fixtures]
+        stages['fixtures.map_rows'] = lambda: [parse_table(html, e['source'], e['settlement'], e['currency']) for _, e, html in fixtures]
+        stages['fixtures.extract'] = lambda: [extract_table_data(FixtureDriver(html), e['source'], e['settlement'], e['currency'])
+                                              for _, e, html in fixtures]
+
+    synthetic = {source: build_synthetic_table(source, backfill_rows) for source in DATA_SOURCES}
+    for source, html in synthetic.items():
+        stages[f"backfill.parse[{source}]"] = lambda html=html, source=source: parse_typed_rows(html, source)
+        stages[f"backfill.map_rows[{source}]"] = lambda html=html, source=source: parse_table(html, source, 'TODTOM')
+    data_rows = synthetic_rows(synthetic)
+    numbers = [f"{i * 1.5:,.2f}" for i in range(backfill_rows)]
+    dates = [f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.{2000 + i % 25}" for i in range(backfill_rows)]
+    stages['convert.parse_number'] = lambda: [parse_number(v) for v in numbers]
+    stages['convert.parse_date_to_integer'] = lambda: [parse_date_to_integer(v) for v in dates]
+    stages['excel.backfill'] = lambda: write_data_workbook(data_rows, io.BytesIO())
+
+    latest = data_rows[-1]
+    def export_meta_zip():
+        with scratch_dir():
+            create_package(export_to_excel(latest), create_metadata_file(latest['trade_date']))
+    stages['excel.daily'] = lambda: _in_scratch(export_to_excel, latest)
+    stages['metadata.daily'] = lambda: _in_scratch(create_metadata_file, latest['trade_date'])
+    stages['package.daily'] = export_meta_zip
+    stages['package.memory'] = lambda: _in_scratch(create_package_from_rows, [latest], latest['trade_date'])
+    return stages
+
+def _in_scratch(func, *args):
+    with scratch_dir(): return func(*args)
+
+def run_benchmarks(directory=FIXTURE_DIR, rounds=BENCH_ROUNDS, backfill_rows=BACKFILL_ROWS, only=None):
+    """Times every stage (or those whose name contains `only`) and prints a results table."""
+    import orchastrator
+    orchastrator.DEBUG_MODE = False  # Logging would dominate the timings
+    results = {}
+    print(f"{'stage':<36} {'min ms':>10} {'median ms':>10} {'mean ms':>10} {'max ms':>10}")
+    for name, func in build_stages(directory, backfill_rows).items():
+        if only and only not in name: continue
+        stats = results[name] = time_stage(_quiet(func), rounds)
+        print(f"{name:<36} {stats['min']:10.2f} {stats['median']:10.2f} {stats['mean']:10.2f} {stats['max']:10.2f}")
+    return results
+
+def _quiet(func):
+    """Silences the print() progress output of the metadata and package writers."""
+    def run():
+        stdout = sys.stdout; sys.stdout = open(os.devnull, 'w')
+        try: return func()
+        finally: sys.stdout.close(); sys.stdout = stdout
+    return run
+
+def compare_results(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Returns [(stage, baseline median, current median)] for stages slower than threshold x baseline."""
+    return [(name, baseline[name]['median'], stats['median']) for name, stats in results.items()
+            if name in baseline and stats['median'] > baseline[name]['median'] * threshold]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record CBR table fixtures, replay them offline and benchmark the hot paths")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help="Save table HTML for every source/settlement/currency")
+    rec.add_argument('--engine', choices=['selenium', 'http'], default='http')
+    rec.add_argument('--currencies', default=DEFAULT_CURRENCY, help="Comma-separated, e.g. USD,EUR,CNY")
+    rec.add_argument('--from', dest='date_from', help="dd.mm.yyyy; records a range table (http engine only)")
+    rec.add_argument('--to', dest='date_to', help="dd.mm.yyyy")
+    rec.add_argument('--dir', default=FIXTURE_DIR)
+    rep = sub.add_parser('replay', help="Run extraction, export, metadata and packaging on recorded fixtures")
+    rep.add_argument('--currencies', default=DEFAULT_CURRENCY)
+    rep.add_argument('--dir', default=FIXTURE_DIR)
+    bench = sub.add_parser('bench', help="Time each pipeline stage on fixtures and synthetic backfill tables")
+    bench.add_argument('--dir', default=FIXTURE_DIR)
+    bench.add_argument('--rounds', type=int, default=BENCH_ROUNDS)
+    bench.add_argument('--rows', type=int, default=BACKFILL_ROWS)
+    bench.add_argument('-k', dest='only', help="Only run stages whose name contains this")
+    bench.add_argument('--save', help="Write the results as JSON")
+    bench.add_argument('--compare', help="Baseline JSON from --save; exits 1 on a regression")
+    bench.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command in ('record', 'replay'):
+        currencies = [c.strip().upper() for c in args.currencies.split(',') if c.strip()]
+        unknown = [c for c in currencies if c not in CURRENCIES]
+        if unknown: parser.error(f"Unknown currencies: {', '.join(unknown)}")
+
+    if args.command == 'record':
+        if args.engine == 'http': written = record_http(currencies, args.dir, args.date_from, args.date_to)
+        elif args.date_from or args.date_to: parser.error("--from/--to need --engine http")
+        else: written = record_selenium(currencies, args.dir)
+        print(f"Recorded {len(written)} fixture(s) in {args.dir}")
+    elif args.command == 'replay':
+        listing = replay_pipeline(currencies, args.dir)
+        if not listing: print(f"❌ No usable fixtures in {args.dir}; run `python fixtures.py record` first"); sys.exit(1)
+        print(f"✅ Replayed package contents: {', '.join(listing)}")
+    else:
+        results = run_benchmarks(args.dir, args.rounds, args.rows, args.only)
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f: json.dump(results, f, indent=2)
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as f: baseline = json.load(f)
+            regressions = compare_results(results, baseline, args.threshold)
+            for name, before, after in regressions:
+                print(f"❌ {name}: median {before:.2f} ms -> {after:.2f} ms")
+            sys.exit(1 if regressions else 0)
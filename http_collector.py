@@ -0,0 +1,138 @@
+"""
+RUSSD HTTP Collector
+Browserless collection engine for the CBR swap_info pages
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+
+from config import (
+    DATA_SOURCES, CURRENCIES, SETTLEMENTS, SELECTORS, QUERY_PARAMS, HTTP_HEADERS,
+    get_data_columns
+)
+from checkpoint import get_checkpoint
+from metrics import span
+from orchastrator import log_debug, parse_table_html, parse_table_rows, cache_lookup, cache_store, WAIT_TIMEOUT
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+HTTP_POOL_SIZE = 4
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+
+
+# =============================================================================
+# SESSION AND REQUEST HELPERS
+# =============================================================================
+def create_session():
+    """Creates a pooled HTTP session with retries for transient CBR errors."""
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    retry = Retry(total=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount('https://', adapter); session.mount('http://', adapter)
+    return session
+
+def build_query(currency, settlement, date_from, date_to):
+    """Builds the UniDbQuery parameters the CBR filter form submits."""
+    return {
+        QUERY_PARAMS['posted']: 'True',
+        QUERY_PARAMS['currency']: CURRENCIES[currency]['value'],
+        QUERY_PARAMS['settlement']: SETTLEMENTS[settlement]['value'],
+        QUERY_PARAMS['date_from']: date_from,
+        QUERY_PARAMS['date_to']: date_to
+    }
+
+def fetch_page(session, url, params=None, **labels):
+    """GETs a page, timed as a 'navigate' span labelled with the source/settlement/currency."""
+    with span('navigate', engine='http', **labels):
+        response = session.get(url, params=params, timeout=WAIT_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+
+def parse_max_available_date(html):
+    """Reads `data-max-date` from the datepicker on an unfiltered page."""
+    datepicker = BeautifulSoup(html, 'html.parser').select_one(SELECTORS['datepicker'])
+    if datepicker: return datepicker.get('data-max-date')
+    log_debug("Could not find datepicker element", "WARNING"); return None
+
+
+# =============================================================================
+# COLLECTION WORKFLOW
+# =============================================================================
+def collect_data_from_source_http(session, source_key, currency, sources=DATA_SOURCES):
+    """
+    HTTP counterpart of orchastrator.collect_data_from_source
+
+    Args:
+        session: Session returned by create_session()
+        source_key: Key into `sources`
+        currency: Currency code from config.CURRENCIES
+        sources: Source mapping, overridable to point at a local stub server
+    """
+    source_info = sources[source_key]; url = source_info['url']
+    log_debug(f"\n{'='*80}\nCollecting (HTTP) from: {source_key} at {url}\n{'='*80}")
+    try:
+        max_date = parse_max_available_date(fetch_page(session, url, source=source_key))
+    except requests.RequestException as e:
+        log_debug(f"Request for {source_key} failed: {e}", "ERROR"); return None
+    if not max_date:
+        log_debug(f"Halting collection from {source_key} due to missing max date", "ERROR"); return None
+    combined_data = {}
+    for settlement in source_info['settlements']:
+        log_debug(f"\n--- Collecting data for settlement: {settlement} ---")
+        data = cache_lookup(source_key, currency, settlement, max_date)
+        if not data:
+            try:
+                html = fetch_page(session, url, build_query(currency, settlement, max_date, max_date),
+                                  source=source_key, settlement=settlement, currency=currency)
+            except requests.RequestException as e:
+                log_debug(f"Request for {source_key} + {settlement} failed: {e}", "ERROR"); continue
+            data = parse_table_html(html, source_key, settlement, currency)
+            if data: cache_store(source_key, currency, settlement, max_date, html, data)
+        if data:
+            get_checkpoint().record(data.get('trade_date'), source_key, settlement, currency, data)
+            combined_data.update(data); log_debug(f"Successfully collected data for {settlement}", "SUCCESS")
+    return combined_data
+
+def collect_range_from_source_http(session, source_key, currency, date_from, date_to, sources=DATA_SOURCES):
+    """Collects every row between two dd.mm.yyyy dates, keyed by trade date."""
+    source_info = sources[source_key]; url = source_info['url']
+    log_debug(f"Collecting (HTTP) {source_key} range {date_from} - {date_to}")
+    rows = {}; date_range = f"{date_from}-{date_to}"
+    for settlement in source_info['settlements']:
+        settlement_rows = cache_lookup(source_key, currency, settlement, date_range)
+        if settlement_rows is None:
+            try:
+                html = fetch_page(session, url, build_query(currency, settlement, date_from, date_to),
+                                  source=source_key, settlement=settlement, currency=currency)
+            except requests.RequestException as e:
+                log_debug(f"Request for {source_key} + {settlement} failed: {e}", "ERROR"); continue
+            settlement_rows = parse_table_rows(html, source_key, settlement, currency)
+            cache_store(source_key, currency, settlement, date_range, html, settlement_rows)
+        for trade_date, data in settlement_rows.items():
+            rows.setdefault(trade_date, {}).update(data)
+    return rows
+
+def run_http_collection(currencies, sources=DATA_SOURCES):
+    if isinstance(currencies, str): currencies = [currencies]
+    log_debug("\n" + "="*80 + "\nSTARTING HTTP DATA COLLECTION\n" + "="*80)
+    try:
+        with create_session() as session:
+            data_row = {col: None for col in get_data_columns(currencies)}
+            for currency in currencies:
+                for source_key in sources:
+                    source_data = collect_data_from_source_http(session, source_key, currency, sources)
+                    if source_data: data_row.update(source_data)
+        log_debug("\n" + "="*80 + "\nHTTP DATA COLLECTION COMPLETE\n" + "="*80)
+        return data_row
+    except Exception as e:
+        log_debug(f"A critical error occurred in the HTTP collection process: {e}", "ERROR"); return None
+
+
+if __name__ == "__main__":
+    # Example usage
+    print(run_http_collection(['USD']))
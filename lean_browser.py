@@ -0,0 +1,131 @@
+"""
+RUSSD Lean Browser
+Headless Chrome profile that blocks images, fonts and trackers (and optionally stylesheets) on cbr.ru pages
+"""
+
+import os
+
+try:
+    import psutil
+except ImportError:  # Memory figures are skipped without psutil
+    psutil = None
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+BLOCKED_RESOURCE_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',  # Images
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',  # Fonts
+    '*.mp4', '*.webm', '*.mp3',  # Media
+]
+BLOCKED_STYLESHEET_PATTERNS = ['*.css']
+BLOCKED_TRACKER_PATTERNS = [
+    '*mc.yandex.ru*', '*yandex.ru/metrika*', '*google-analytics.com*', '*googletagmanager.com*',
+    '*doubleclick.net*', '*top-fwz1.mail.ru*', '*counter.yadro.ru*', '*sputnik.ru*', '*vk.com/rtrg*'
+]
+# Opt-in (also RUSSD_LEAN_BLOCK_CSS=1): without page CSS the dropdowns and datepicker may never become
+# visible or clickable, so the visibility/clickability waits can behave differently than on the full page
+BLOCK_STYLESHEETS = False
+
+LEAN_CHROME_ARGUMENTS = [
+    '--headless=new',
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-notifications',
+    '--mute-audio',
+    '--no-first-run',
+    '--metrics-recording-only',
+    '--renderer-process-limit=2',
+    '--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication,InterestFeedContentSuggestions',
+]
+
+# Bytes transferred and timing of the current page, from the Resource Timing API
+PAGE_WEIGHT_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    bytes: (nav ? nav.transferSize : 0) + resources.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+    requests: resources.length + 1,
+    load_ms: nav ? nav.loadEventEnd - nav.startTime : null
+};
+"""
+
+
+def blocks_stylesheets():
+    return BLOCK_STYLESHEETS or os.environ.get('RUSSD_LEAN_BLOCK_CSS') == '1'
+
+def blocked_url_patterns():
+    return BLOCKED_RESOURCE_PATTERNS + (BLOCKED_STYLESHEET_PATTERNS if blocks_stylesheets() else []) + BLOCKED_TRACKER_PATTERNS
+
+def add_lean_arguments(options):
+    """Adds the headless, reduced-feature switches to ChromeOptions."""
+    for argument in LEAN_CHROME_ARGUMENTS: options.add_argument(argument)
+
+def apply_lean_profile(driver):
+    """Blocks unneeded resources and trackers for every request of the driver's page via CDP."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
+
+def page_weight(driver):
+    """{'bytes', 'requests', 'load_ms'} of the page currently loaded in the driver."""
+    return driver.execute_script(PAGE_WEIGHT_SCRIPT)
+
+def browser_rss_mb(driver):
+    """Resident memory of Chrome and its child processes, or None without psutil."""
+    pid = getattr(driver, 'browser_pid', None)
+    if not psutil or not pid: return None
+    try:
+        root = psutil.Process(pid)
+        return sum(p.memory_info().rss for p in [root] + root.children(recursive=True)) / (1024 * 1024)
+    except psutil.Error:
+        return None
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+def measure_profile(lean, repeat=3):
+    """Loads every source page `repeat` times with one profile and averages its weight."""
+    from config import DATA_SOURCES
+    from orchastrator import setup_driver, close_driver, load_page
+    driver = setup_driver(use_daemon=False, lean=lean)
+    try:
+        samples = []
+        for _ in range(repeat):
+            for source_key, info in DATA_SOURCES.items():
+                load_page(driver, info['url'], source_key); samples.append(page_weight(driver))
+        return {
+            'bytes': sum(s['bytes'] for s in samples) / len(samples),
+            'requests': sum(s['requests'] for s in samples) / len(samples),
+            'load_ms': sum(s['load_ms'] or 0 for s in samples) / len(samples),
+            'rss_mb': browser_rss_mb(driver)
+        }
+    finally:
+        close_driver(driver)
+
+def compare_profiles(repeat=3):
+    """Prints the per-page bytes, requests, load time and browser memory of the full and lean profiles."""
+    full, lean = measure_profile(False, repeat), measure_profile(True, repeat)
+    print(f"{'per page':<12} {'full':>12} {'lean':>12} {'saved':>8}")
+    for key, unit in (('bytes', 'KB'), ('requests', ''), ('load_ms', 'ms'), ('rss_mb', 'MB')):
+        if full[key] is None or lean[key] is None: continue
+        scale = 1024 if key == 'bytes' else 1
+        saved = 100 * (1 - lean[key] / full[key]) if full[key] else 0
+        print(f"{key:<12} {full[key] / scale:10.1f}{unit:>2} {lean[key] / scale:10.1f}{unit:>2} {saved:7.1f}%")
+    return full, lean
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare page weight of the full and lean Chrome profiles on cbr.ru")
+    parser.add_argument('--repeat', type=int, default=3, help="Loads of each source page per profile")
+    parser.add_argument('--block-css', action='store_true', help="Also block stylesheets in the lean profile")
+    args = parser.parse_args()
+    if args.block_css: os.environ['RUSSD_LEAN_BLOCK_CSS'] = '1'
+    compare_profiles(args.repeat)
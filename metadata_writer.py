@@ -3,21 +3,116 @@ RUSSD Metadata File Generator
 Creates the metadata file required by the data engineering team
 """
 
+import io
+import os
 from datetime import datetime
+from itertools import repeat
 import xlwt
 
-from config import EXCEL_HEADERS, DATA_COLUMNS, DATA_FREQUENCY, DATA_SOURCE_NAME
+from config import EXCEL_HEADERS, DATA_FREQUENCY, DATA_SOURCE_NAME, OUTPUT_DATE_FORMAT
+from cbr_calendar import next_business_day
+from metrics import timed
 
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+META_HEADERS = ['CODE', 'DESCRIPTION', 'FREQUENCY', 'UNIT', 'SOURCE', 'LAST_UPDATE', 'NEXT_RELEASE_DATE']
+NEXT_RELEASE_TIME = '10:00:00'  # Time stamped on the next CBR business day after the trade date
+METADATA_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_DATES = 500  # Dates per worker process; one file takes 1-3 ms, so smaller batches stay in-process
 
-def create_metadata_file(trade_date_str):
+
+@timed('metadata')
+def create_metadata_file(trade_date_str, headers=EXCEL_HEADERS, output_dir=None):
     """
     Create RUSSD_META_YYYYMMDD.xls file
     
     Args:
         trade_date_str: Trade date in YYYY-MM-DD format
+        headers: Excel headers of the data file (config.get_excel_headers of the selected currencies)
+        output_dir: Directory to write into (default: the working directory)
+    """
+    filename, wb = build_metadata_workbook(trade_date_str, headers)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        filename = os.path.join(output_dir, filename)
+    
+    # Save file
+    wb.save(filename)
+    print(f"✅ Metadata file created: {filename}")
+    
+    return filename
+
+
+@timed('metadata', mode='batch')
+def create_metadata_files(trade_dates, headers=EXCEL_HEADERS, output_dir='.', workers=METADATA_WORKERS):
+    """
+    Creates RUSSD_META_YYYYMMDD.xls for many trade dates in one pass
+    
+    The per-series columns are computed once for the whole batch. Batches of at
+    least 2 * PARALLEL_MIN_DATES dates are split into contiguous chunks across
+    worker processes.
+    
+    Returns:
+        Paths of the written files, in trade date order
+    """
+    trade_dates = sorted(trade_dates)
+    series = series_metadata(headers)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, len(trade_dates) // PARALLEL_MIN_DATES))
+    if workers == 1:
+        paths = write_metadata_files(trade_dates, series, output_dir)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        size = -(-len(trade_dates) // workers)
+        chunks = [trade_dates[i:i + size] for i in range(0, len(trade_dates), size)]
+        with ProcessPoolExecutor(len(chunks)) as executor:
+            paths = [path for chunk in executor.map(write_metadata_files, chunks, repeat(series), repeat(output_dir))
+                     for path in chunk]
+    print(f"✅ {len(paths)} metadata files created in {output_dir}")
+    return paths
+
+
+def write_metadata_files(trade_dates, series, output_dir):
+    """Writes one metadata file per trade date from precomputed series rows; returns their paths."""
+    paths = []
+    for trade_date_str in trade_dates:
+        filename, wb = build_metadata_workbook(trade_date_str, series=series)
+        paths.append(os.path.join(output_dir, filename))
+        wb.save(paths[-1])
+    return paths
+
+
+@timed('metadata', mode='memory')
+def render_metadata_file(trade_date_str, headers=EXCEL_HEADERS):
+    """
+    Renders RUSSD_META_YYYYMMDD.xls into memory instead of the working directory
+    
+    Returns:
+        (file name, workbook bytes)
     """
+    filename, wb = build_metadata_workbook(trade_date_str, headers)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return filename, buffer.getvalue()
+
+
+def series_metadata(headers=EXCEL_HEADERS):
+    """Date-independent (code, description, frequency, unit, source) of each series, in column order."""
+    # The unit is the one declared for the series in config.DATA_SOURCES
+    return [(info['code'], info['description'], DATA_FREQUENCY, info.get('unit', 'Number'), DATA_SOURCE_NAME)
+            for info in headers.values()]
+
+
+def next_release_date(trade_date_str):
+    """Release timestamp of the next CBR business day after the trade date."""
+    return f"{next_business_day(trade_date_str).strftime(OUTPUT_DATE_FORMAT)}T{NEXT_RELEASE_TIME}"
+
+
+def build_metadata_workbook(trade_date_str, headers=EXCEL_HEADERS, series=None):
+    """Builds the metadata workbook; returns (file name, unsaved xlwt workbook)."""
     # Parse trade date
-    trade_date = datetime.strptime(trade_date_str, '%Y-%m-%d')
+    trade_date = datetime.strptime(trade_date_str, OUTPUT_DATE_FORMAT)
     timestamp = trade_date.strftime('%Y%m%d')
     filename = f'RUSSD_META_{timestamp}.xls'
     
@@ -25,54 +120,17 @@ def create_metadata_file(trade_date_str):
     wb = xlwt.Workbook(encoding='utf-8')
     ws = wb.add_sheet('Metadata')
     
-    # Headers
-    headers = ['CODE', 'DESCRIPTION', 'FREQUENCY', 'UNIT', 'SOURCE', 'LAST_UPDATE', 'NEXT_RELEASE_DATE']
-    
     # Write headers
-    for col_idx, header in enumerate(headers):
+    for col_idx, header in enumerate(META_HEADERS):
         ws.write(0, col_idx, header)
     
-    # Write metadata for each column
-    row_idx = 1
-    for col_letter in DATA_COLUMNS:
-        col_info = EXCEL_HEADERS[col_letter]
-        
-        # Determine unit based on data type
-        if 'date' in col_info['description'].lower():
-            unit = 'Date (YYYYMMDD)'
-        elif 'rate' in col_info['description'].lower() or '%' in col_info['description']:
-            unit = '% per annum'
-        elif 'volume' in col_info['description'].lower():
-            if 'rubles' in col_info['description'].lower():
-                unit = 'Millions of RUB'
-            else:
-                unit = 'Millions of USD'
-        elif 'amount' in col_info['description'].lower():
-            unit = 'Billions of FC'
-        elif 'points' in col_info['description'].lower():
-            unit = 'Rubles'
-        else:
-            unit = 'Number'
-        
-        # Next release date (tomorrow at 10:00 UTC)
-        next_release = datetime.now().strftime('%Y-%m-%dT10:00:00')
-        
-        # Write row
-        ws.write(row_idx, 0, col_info['code'])
-        ws.write(row_idx, 1, col_info['description'])
-        ws.write(row_idx, 2, DATA_FREQUENCY)
-        ws.write(row_idx, 3, unit)
-        ws.write(row_idx, 4, DATA_SOURCE_NAME)
-        ws.write(row_idx, 5, trade_date_str)
-        ws.write(row_idx, 6, next_release)
-        
-        row_idx += 1
-    
-    # Save file
-    wb.save(filename)
-    print(f"✅ Metadata file created: {filename}")
+    # Write metadata for each column; only the last two fields depend on the date
+    dated = (trade_date_str, next_release_date(trade_date_str))
+    for row_idx, row in enumerate(series_metadata(headers) if series is None else series, start=1):
+        for col_idx, value in enumerate(row + dated):
+            ws.write(row_idx, col_idx, value)
     
-    return filename
+    return filename, wb
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+"""
+RUSSD Metrics
+Timed spans for each pipeline stage, exported as JSON-lines and a Prometheus textfile
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from config import STATE_DIR
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+METRICS_DIR = os.path.join(STATE_DIR, 'metrics')
+SPAN_LOG = os.environ.get('RUSSD_SPAN_LOG', os.path.join(METRICS_DIR, 'spans.jsonl'))
+# Point this at node_exporter's --collector.textfile.directory to scrape it
+PROMETHEUS_TEXTFILE = os.environ.get('RUSSD_PROM_TEXTFILE', os.path.join(METRICS_DIR, 'russd.prom'))
+METRIC_PREFIX = 'russd'
+
+RUN_ID = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+SPANS = []  # Every finished span in this process, in completion order
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# =============================================================================
+# SPANS
+# =============================================================================
+def record_span(name, seconds, ok=True, start=None, **labels):
+    """Records an already measured span; labels identify the source, settlement, filter, etc."""
+    stack = getattr(_local, 'stack', [])
+    entry = {'run': RUN_ID, 'span': name, 'start': start or time.time() - seconds, 'seconds': round(seconds, 6),
+             'ok': bool(ok), 'parent': stack[-1] if stack else None, 'thread': threading.current_thread().name,
+             **{k: v for k, v in labels.items() if v is not None}}
+    with _lock: SPANS.append(entry)
+    return entry
+
+@contextmanager
+def span(name, **labels):
+    """
+    Times the enclosed block as one span
+
+    Yields a dict whose 'ok' the block may set to False for failures reported by
+    return value; an exception marks the span failed and records its type.
+    """
+    state = {'ok': True}
+    stack = _local.__dict__.setdefault('stack', [])
+    start, started = time.time(), time.perf_counter()
+    stack.append(name)
+    try:
+        yield state
+    except BaseException as e:
+        state['ok'] = False; labels['error'] = type(e).__name__; raise
+    finally:
+        stack.pop()
+        record_span(name, time.perf_counter() - started, state['ok'], start, **labels)
+
+def timed(name, **labels):
+    """Decorator form of span() for whole functions."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels): return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def summarize(spans=None):
+    """{span name: (count, total seconds, failures)} over the given spans (default: this process)."""
+    summary = {}
+    for entry in SPANS if spans is None else spans:
+        count, total, failures = summary.get(entry['span'], (0, 0.0, 0))
+        summary[entry['span']] = (count + 1, total + entry['seconds'], failures + (not entry['ok']))
+    return summary
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+LABEL_KEYS = ('source', 'settlement', 'currency', 'filter', 'engine', 'mode')  # Bounded-cardinality labels
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(entry, **extra):
+    pairs = list(extra.items()) + [(k, entry[k]) for k in LABEL_KEYS if k in entry]
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+def prometheus_text(spans=None, success=None):
+    """Renders per-stage duration sums, counts, maxima and failures of the last run in text exposition format."""
+    groups = {}
+    for entry in SPANS if spans is None else spans:
+        key = _labels(entry, stage=entry['span'])
+        count, total, peak, failures = groups.get(key, (0, 0.0, 0.0, 0))
+        groups[key] = (count + 1, total + entry['seconds'], max(peak, entry['seconds']), failures + (not entry['ok']))
+    lines = []
+    for metric, kind, help_text, pick in (
+            ('stage_duration_seconds_sum', 'gauge', 'Total time spent in the stage during the last run', lambda g: g[1]),
+            ('stage_duration_seconds_count', 'gauge', 'Number of spans of the stage during the last run', lambda g: g[0]),
+            ('stage_duration_seconds_max', 'gauge', 'Slowest single span of the stage during the last run', lambda g: g[2]),
+            ('stage_failures', 'gauge', 'Failed spans of the stage during the last run', lambda g: g[3])):
+        lines += [f"# HELP {METRIC_PREFIX}_{metric} {help_text}", f"# TYPE {METRIC_PREFIX}_{metric} {kind}"]
+        lines += [f"{METRIC_PREFIX}_{metric}{{{key}}} {pick(group):.6g}" for key, group in sorted(groups.items())]
+    lines += [f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds Unix time the last run finished",
+              f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+              f"{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.3f}"]
+    if success is not None:
+        lines += [f"# HELP {METRIC_PREFIX}_last_run_success Whether the last run produced a package",
+                  f"# TYPE {METRIC_PREFIX}_last_run_success gauge",
+                  f"{METRIC_PREFIX}_last_run_success {int(bool(success))}"]
+    return '\n'.join(lines) + '\n'
+
+def write_span_log(path=SPAN_LOG, spans=None):
+    """Appends spans as JSON lines."""
+    spans = SPANS if spans is None else spans
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for entry in spans: f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+def write_prometheus(path=PROMETHEUS_TEXTFILE, spans=None, success=None):
+    """Writes the textfile atomically so the exporter never reads a partial file."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f: f.write(prometheus_text(spans, success))
+    os.replace(tmp_path, path)
+
+def drain():
+    """Removes and returns every span recorded so far, e.g. to hand them from a worker process to its parent."""
+    with _lock:
+        spans = list(SPANS); SPANS.clear()
+    return spans
+
+def flush(success=None):
+    """Exports every span recorded since the last flush and clears them."""
+    spans = drain()
+    if not spans: return
+    write_span_log(spans=spans)
+    write_prometheus(spans=spans, success=success)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize recorded RUSSD spans per stage")
+    parser.add_argument('--log', default=SPAN_LOG)
+    parser.add_argument('--run', help="Run id to summarize (default: the most recent run)")
+    args = parser.parse_args()
+
+    with open(args.log, encoding='utf-8') as f: entries = [json.loads(line) for line in f if line.strip()]
+    run = args.run or (entries[-1]['run'] if entries else None)
+    entries = [e for e in entries if e['run'] == run]
+    print(f"Run {run}: {len(entries)} spans")
+    print(f"{'stage':<20} {'count':>6} {'total s':>9} {'failed':>7}")
+    for name, (count, total, failures) in sorted(summarize(entries).items(), key=lambda item: -item[1][1]):
+        print(f"{name:<20} {count:6d} {total:9.2f} {failures:7d}")
+    slowest = sorted(entries, key=lambda e: -e['seconds'])[:10]
+    print("\nSlowest spans:")
+    for e in slowest:
+        where = ' '.join(str(e[k]) for k in LABEL_KEYS + ('what',) if k in e)
+        print(f"  {e['seconds']:8.2f}s  {e['span']:<12} {where}")
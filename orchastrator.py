@@ -3,21 +3,17 @@ RUSSD Data Collection - Main Web Scraper
 Bank of Russia (CBR) FX Swaps Data Extraction
 """
 
+import os
 import time
+from contextlib import nullcontext
 from datetime import datetime
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
-import undetected_chromedriver as uc
-import pandas as pd  # <-- ADDED for Excel export
 
 from config import (
-    DATA_SOURCES, EXCEL_HEADERS, DATA_COLUMNS, CURRENCIES, SETTLEMENTS,
+    DATA_SOURCES, EXCEL_HEADERS, CURRENCIES, SETTLEMENTS,
     DEFAULT_CURRENCY, SELECTORS, SOURCE_DATE_FORMAT, OUTPUT_DATE_FORMAT,
-    DATE_INT_FORMAT, get_column_mapping_by_source
+    DATE_INT_FORMAT, get_data_columns, get_excel_headers
 )
+from metrics import span, record_span, summarize, flush as flush_metrics
 
 # =============================================================================
 # SCRIPT CONFIGURATION
@@ -25,7 +21,15 @@ from config import (
 HEADLESS_MODE = False
 DEBUG_MODE = True
 WAIT_TIMEOUT = 15
-PAGE_LOAD_DELAY = 2
+READINESS_TIMEOUT = 15  # Ceiling for each page readiness wait
+READINESS_POLL = 0.1
+NETWORK_QUIET_MS = 300  # No new network requests for this long counts as quiescent
+COLLECTION_ENGINE = 'selenium'  # 'selenium', 'http' or 'fetch' (in-page fetch() batches on one browser)
+COLLECTION_WORKERS = 1  # >1 collects source/settlement pages concurrently on a driver pool
+IN_MEMORY_PACKAGE = False  # Render DATA/META straight into a deterministic ZIP instead of writing them to disk
+BROWSER_DAEMON_ADDRESS = os.environ.get('RUSSD_BROWSER_DAEMON')  # e.g. '127.0.0.1:9322', see browser_daemon.py
+LEAN_BROWSER = False  # Headless, no images/fonts/trackers (also RUSSD_LEAN_BROWSER=1), see lean_browser.py
+DRIVER_STARTUP_LOCK = None  # Lock shared by processes that start Chrome concurrently (sharded backfill workers)
 
 # =============================================================================
 # UTILITY FUNCTIONS (Unchanged)
@@ -33,33 +37,74 @@ PAGE_LOAD_DELAY = 2
 def log_debug(message: str, prefix: str = "INFO"):
     if DEBUG_MODE: print(f"[{datetime.now().strftime('%H:%M:%S.%f')[:-3]}] [{prefix}] {message}")
 
-def setup_driver():
-    log_debug("Setting up Chrome WebDriver...")
+def setup_driver(user_data_dir=None, use_daemon=True, lean=None):
+    import undetected_chromedriver as uc
+    if lean is None: lean = LEAN_BROWSER or os.environ.get('RUSSD_LEAN_BROWSER') == '1'
+    if use_daemon and BROWSER_DAEMON_ADDRESS:
+        from browser_daemon import attach_driver
+        with span('driver_startup', mode='daemon') as timing:
+            driver = attach_driver(BROWSER_DAEMON_ADDRESS); timing['ok'] = bool(driver)
+        if driver:
+            if lean:
+                from lean_browser import apply_lean_profile
+                apply_lean_profile(driver)
+            return driver
+        log_debug("Falling back to a fresh Chrome instance", "WARNING")
+    log_debug(f"Setting up {'lean ' if lean else ''}Chrome WebDriver...")
     options = uc.ChromeOptions(); options.add_argument("--window-size=1920,1080"); options.add_argument("--lang=en-US")
-    if HEADLESS_MODE: options.add_argument("--headless=new")
+    if lean:
+        from lean_browser import add_lean_arguments
+        add_lean_arguments(options)
+    elif HEADLESS_MODE: options.add_argument("--headless=new")
     try:
-        driver = uc.Chrome(options=options)
+        with span('driver_startup', mode='lean' if lean else 'fresh'):
+            # undetected_chromedriver patches one shared chromedriver binary while starting up
+            with DRIVER_STARTUP_LOCK or nullcontext():
+                driver = uc.Chrome(options=options, user_data_dir=user_data_dir)
+            if lean:
+                from lean_browser import apply_lean_profile
+                apply_lean_profile(driver)
         log_debug("WebDriver initialized successfully", "SUCCESS"); return driver
     except Exception as e:
         log_debug(f"Error creating driver: {str(e)}", "ERROR"); raise
 
+def close_driver(driver):
+    """Quits a driver, or hands a browser attached from the daemon back to it."""
+    if hasattr(driver, 'russd_daemon'):
+        from browser_daemon import detach_driver
+        log_debug("Releasing warm browser..."); detach_driver(driver)
+    else:
+        log_debug("Closing WebDriver..."); driver.quit()
+
 def wait_for_clickable(driver, by, selector, timeout=WAIT_TIMEOUT):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
     try: return WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((by, selector)))
     except TimeoutException: log_debug(f"Timeout waiting for clickable element: {selector}", "WARNING"); return None
 
 def wait_for_visible(driver, by, selector, timeout=WAIT_TIMEOUT):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
     try: return WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((by, selector)))
     except TimeoutException: log_debug(f"Timeout waiting for element visibility: {selector}", "WARNING"); return None
         
 def safe_click(driver, element, description="element"):
-    try:
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", element)
-        time.sleep(0.5); element.click(); log_debug(f"Clicked {description}"); return True
-    except Exception as e:
-        log_debug(f"Error clicking {description}: {str(e)}", "ERROR"); return False
+    from selenium.webdriver.support import expected_conditions as EC
+    with span('click', what=description) as timing:
+        try:
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", element)
+            wait_until(driver, EC.element_to_be_clickable(element), f"{description} clickable")
+            element.click(); log_debug(f"Clicked {description}"); return True
+        except Exception as e:
+            timing['ok'] = False; log_debug(f"Error clicking {description}: {str(e)}", "ERROR"); return False
         
 # ... other utility functions remain the same ...
 def wait_for_element(driver, by, selector, timeout=WAIT_TIMEOUT):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
     try: return WebDriverWait(driver, timeout).until(EC.presence_of_element_located((by, selector)))
     except TimeoutException: log_debug(f"Timeout waiting for element: {selector}", "WARNING"); return None
 def parse_number(value_str):
@@ -75,15 +120,87 @@ def parse_date_to_integer(date_str):
     try: return int(datetime.strptime(date_str, SOURCE_DATE_FORMAT).strftime(DATE_INT_FORMAT))
     except ValueError: log_debug(f"Could not parse date to integer: {date_str}", "WARNING"); return None
 def get_max_available_date(driver):
-    datepicker = wait_for_element(driver, By.CSS_SELECTOR, 'div.datepicker-filter')
+    from selenium.webdriver.common.by import By
+    datepicker = wait_for_element(driver, By.CSS_SELECTOR, SELECTORS['datepicker'])
     if datepicker: return datepicker.get_attribute('data-max-date')
     log_debug("Could not find datepicker element", "WARNING"); return None
 
 
+# =============================================================================
+# READINESS FUNCTIONS
+# =============================================================================
+def wait_until(driver, condition, description, timeout=READINESS_TIMEOUT):
+    """Waits for a readiness condition up to the ceiling and reports how long it actually took."""
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=READINESS_POLL,
+                               ignored_exceptions=[StaleElementReferenceException, NoSuchElementException]).until(condition)
+    except TimeoutException:
+        result = None
+    elapsed = time.monotonic() - start
+    record_span('wait', elapsed, result is not None, what=description)
+    if result is None: log_debug(f"Gave up waiting for {description} after {elapsed:.2f}s", "WARNING")
+    else: log_debug(f"Ready: {description} ({elapsed:.2f}s)", "TIMING")
+    return result
+
+class network_idle:
+    """Condition met once the document is complete and no new requests have started for `quiet_ms`."""
+    def __init__(self, quiet_ms=NETWORK_QUIET_MS):
+        self.quiet_ms = quiet_ms; self.last_count = None; self.since = None
+    def __call__(self, driver):
+        ready_state, resource_count, active_xhr = driver.execute_script(
+            "return [document.readyState, performance.getEntriesByType('resource').length, window.jQuery ? window.jQuery.active : 0];")
+        now = time.monotonic()
+        if ready_state != 'complete' or active_xhr or resource_count != self.last_count:
+            self.last_count = resource_count; self.since = now; return False
+        return (now - self.since) * 1000 >= self.quiet_ms
+
+def table_refreshed(old_table):
+    """Condition met once the previous `table.data` is detached or re-rendered and a table is present."""
+    from selenium.common.exceptions import StaleElementReferenceException
+    old_html = None
+    if old_table is not None:
+        try: old_html = old_table.get_attribute('outerHTML')
+        except StaleElementReferenceException: old_table = None
+    def condition(driver):
+        if old_table is not None:
+            try:
+                if old_table.get_attribute('outerHTML') == old_html: return False
+            except StaleElementReferenceException: pass
+        return current_table(driver) or False
+    return condition
+
+def button_text_is(keywords, expected):
+    """Condition met once the filter button labelled by `keywords` shows `expected`."""
+    def condition(driver):
+        button = find_filter_button(driver, keywords)
+        return bool(button) and button.text.strip() == expected
+    return condition
+
+def current_table(driver):
+    from selenium.webdriver.common.by import By
+    tables = driver.find_elements(By.CSS_SELECTOR, SELECTORS['data_table'])
+    return tables[0] if tables else None
+
+def find_filter_button(driver, keywords):
+    from selenium.webdriver.common.by import By
+    filter_div = next((f for f in driver.find_elements(By.CSS_SELECTOR, "div.filter") if any(kw in f.text for kw in keywords)), None)
+    return filter_div.find_element(By.CSS_SELECTOR, SELECTORS['filter_button']) if filter_div else None
+
+def wait_for_page_update(driver, old_table, description, *conditions):
+    """Waits for the table to re-render, any extra signals, then network quiescence."""
+    refreshed = wait_until(driver, table_refreshed(old_table), f"table refresh after {description}")
+    for condition in conditions: wait_until(driver, condition, f"filter state after {description}")
+    wait_until(driver, network_idle(), f"network idle after {description}")
+    return refreshed
+
+
 # =============================================================================
 # NEW EXCEL EXPORT FUNCTION
 # =============================================================================
-def export_to_excel(data_row: dict):
+def export_to_excel(data_row: dict, headers: dict = EXCEL_HEADERS):
     """Exports the collected data to an Excel file with the required format."""
     if not data_row.get('trade_date'):
         log_debug("No trade date found, skipping Excel export.", "WARNING")
@@ -92,184 +209,346 @@ def export_to_excel(data_row: dict):
     # Generate the filename with today's date
     trade_date_obj = datetime.strptime(data_row['trade_date'], OUTPUT_DATE_FORMAT)
     filename = f"RUSSD_DATA_{trade_date_obj.strftime('%Y%m%d')}.xlsx"
-    log_debug(f"Preparing to export data to {filename}...")
+    return export_rows_to_excel([data_row], filename, headers)
+
 
-    # Prepare the three rows for the DataFrame
-    header_codes = {'A': ''} # Column A is blank for headers
-    header_desc = {'A': ''}
-    for col_letter, headers in EXCEL_HEADERS.items():
-        header_codes[col_letter] = headers['code']
-        header_desc[col_letter] = headers['description']
+def export_rows_to_excel(data_rows, filename: str, headers: dict = EXCEL_HEADERS):
+    """Streams one or more data rows (each with a 'trade_date') under the two header rows."""
+    from excel_writer import write_data_workbook
+    log_debug(f"Preparing to export data to {filename}...")
+    try:
+        with span('excel_write'): count = write_data_workbook(data_rows, filename, headers)
+        log_debug(f"Successfully created Excel file: {filename} ({count} data row(s))", "SUCCESS")
+        return filename
+    except Exception as e:
+        log_debug(f"Failed to write Excel file: {e}", "ERROR")
 
-    # Format the data row, moving trade_date to column 'A'
-    output_data = data_row.copy()
-    output_data['A'] = output_data.pop('trade_date', '')
 
-    # Create DataFrame from the three rows
-    df = pd.DataFrame([header_codes, header_desc, output_data])
+def export_from_store(date_from: str, date_to: str = None, headers: dict = EXCEL_HEADERS):
+    """Renders one trade date, or a YYYY-MM-DD range, from the local time-series store."""
+    from timeseries_store import TimeSeriesStore
+    with TimeSeriesStore() as store:
+        if not date_to or date_to == date_from:
+            data_rows = store.get_rows(date_from, date_from, headers)
+            if not data_rows: log_debug(f"No stored data for {date_from}", "WARNING"); return None
+            return export_to_excel(data_rows[0], headers)
+        stamp_from, stamp_to = (datetime.strptime(d, OUTPUT_DATE_FORMAT).strftime(DATE_INT_FORMAT) for d in (date_from, date_to))
+        return export_rows_to_excel(store.iter_rows(date_from, date_to, headers), f"RUSSD_DATA_{stamp_from}_{stamp_to}.xlsx", headers)
 
-    # Ensure correct column order from A to S
-    column_order = ['A'] + DATA_COLUMNS
-    df = df[column_order]
 
+def store_rows(data_rows: list, headers: dict = EXCEL_HEADERS):
+    """Upserts collected rows into the local time-series store; failures never stop the run."""
+    from timeseries_store import TimeSeriesStore
     try:
-        # Write to Excel without pandas index or header
-        df.to_excel(filename, index=False, header=False, engine='openpyxl')
-        log_debug(f"Successfully created Excel file: {filename}", "SUCCESS")
+        with TimeSeriesStore() as store:
+            changed = store.upsert_rows(data_rows, headers)
+        log_debug(f"Time-series store updated ({changed} observations inserted or changed)", "SUCCESS")
     except Exception as e:
-        log_debug(f"Failed to write Excel file: {e}", "ERROR")
+        log_debug(f"Failed to update time-series store: {e}", "ERROR")
 
 
 # =============================================================================
 # PAGE INTERACTION FUNCTIONS (Unchanged)
 # =============================================================================
+CURRENCY_FILTER_KEYWORDS = ["Currency", "Валюта"]
+SETTLEMENT_FILTER_KEYWORDS = ["Settlement", "Сроки расчетов"]
+
+def load_page(driver, url, source=None):
+    """Navigates to a source page and waits for it to settle, timed as one 'navigate' span."""
+    with span('navigate', source=source): driver.get(url); handle_cookie_banner(driver)
+
 def handle_cookie_banner(driver):
-    cookie_button = wait_for_clickable(driver, By.CSS_SELECTOR, SELECTORS['cookie_accept_button'], timeout=5)
-    if cookie_button: log_debug("Cookie banner found."); safe_click(driver, cookie_button, "cookie accept button")
+    from selenium.webdriver.common.by import By
+    wait_until(driver, network_idle(), "initial page load")
+    cookie_buttons = [b for b in driver.find_elements(By.CSS_SELECTOR, SELECTORS['cookie_accept_button']) if b.is_displayed()]
+    if cookie_buttons: log_debug("Cookie banner found."); safe_click(driver, cookie_buttons[0], "cookie accept button")
     else: log_debug("No cookie banner found.")
 
+def select_filter_option(driver, name: str, keywords, value: str, label_id: str):
+    """Opens the filter dropdown labelled by `keywords`, picks `value` and waits for the page to update."""
+    with span('filter', filter=name, what=value) as timing:
+        timing['ok'] = _select_filter_option(driver, name, keywords, value, label_id)
+    return timing['ok']
+
+def _select_filter_option(driver, name, keywords, value, label_id):
+    from selenium.webdriver.common.by import By
+    button = wait_until(driver, lambda d: find_filter_button(d, keywords) or False, f"{name} filter")
+    if not button: log_debug(f"{name.capitalize()} filter container not found", "ERROR"); return False
+    if button.text.strip() == value: log_debug(f"{name.capitalize()} already set to {value}"); return True
+    old_table = current_table(driver)
+    if not safe_click(driver, button, f"{name} dropdown button"): return False
+    if not wait_for_visible(driver, By.CSS_SELECTOR, SELECTORS['dropdown_content_visible']): log_debug(f"{name.capitalize()} dropdown panel did not appear", "ERROR"); return False
+    label_element = wait_for_clickable(driver, By.CSS_SELECTOR, f"label[for='{label_id}']")
+    if label_element and safe_click(driver, label_element, f"'{value}' label"):
+        wait_for_page_update(driver, old_table, f"{name} {value}", button_text_is(keywords, value))
+        log_debug(f"Successfully set {name} to {value}", "SUCCESS"); return True
+    log_debug(f"Could not find or click label for {value}", "ERROR"); return False
+
 def set_currency(driver, currency: str):
     log_debug(f"Setting currency to {currency}...")
     currency_info = CURRENCIES.get(currency)
     if not currency_info: log_debug(f"Invalid currency: {currency}", "ERROR"); return False
     try:
-        wait_for_element(driver, By.CSS_SELECTOR, "div.filter_placeholder"); time.sleep(1)
-        all_filters = driver.find_elements(By.CSS_SELECTOR, "div.filter")
-        currency_filter_div = next((f for f in all_filters if any(kw in f.text for kw in ["Currency", "Валюта"])), None)
-        if not currency_filter_div: log_debug("Currency filter container not found", "ERROR"); return False
-        currency_button = currency_filter_div.find_element(By.CSS_SELECTOR, SELECTORS['filter_button'])
-        if currency_button.text.strip() == currency: log_debug(f"Currency already set to {currency}"); return True
-        if not safe_click(driver, currency_button, "currency dropdown button"): return False
-        if not wait_for_visible(driver, By.CSS_SELECTOR, SELECTORS['dropdown_content_visible']): log_debug("Currency dropdown panel did not appear", "ERROR"); return False
-        label_selector = f"label[for='{currency_info['id']}']"
-        label_element = wait_for_clickable(driver, By.CSS_SELECTOR, label_selector)
-        if label_element and safe_click(driver, label_element, f"'{currency}' label"):
-            time.sleep(PAGE_LOAD_DELAY); log_debug(f"Successfully set currency to {currency}", "SUCCESS"); return True
-        else:
-            log_debug(f"Could not find or click label for {currency}", "ERROR"); return False
+        return select_filter_option(driver, "currency", CURRENCY_FILTER_KEYWORDS, currency, currency_info['id'])
     except Exception as e:
         log_debug(f"An unexpected error in set_currency: {e}", "ERROR"); return False
 
-# ... other page interaction functions are unchanged ...
 def set_settlement(driver, settlement: str):
     log_debug(f"Setting settlement to {settlement}...")
     settlement_info = SETTLEMENTS.get(settlement)
     if not settlement_info: log_debug(f"Invalid settlement: {settlement}", "ERROR"); return False
     try:
-        wait_for_element(driver, By.CSS_SELECTOR, "div.filter_placeholder"); time.sleep(1)
-        all_filters = driver.find_elements(By.CSS_SELECTOR, "div.filter")
-        settlement_filter_div = next((f for f in all_filters if any(kw in f.text for kw in ["Settlement", "Сроки расчетов"])), None)
-        if not settlement_filter_div: log_debug("Settlement filter container not found", "ERROR"); return False
-        settlement_button = settlement_filter_div.find_element(By.CSS_SELECTOR, SELECTORS['filter_button'])
-        if settlement_button.text.strip() == settlement: log_debug(f"Settlement already set to {settlement}"); return True
-        if not safe_click(driver, settlement_button, "settlement dropdown button"): return False
-        if not wait_for_visible(driver, By.CSS_SELECTOR, SELECTORS['dropdown_content_visible']): log_debug("Settlement dropdown panel did not appear", "ERROR"); return False
-        label_selector = f"label[for='{settlement_info['id']}']"
-        label_element = wait_for_clickable(driver, By.CSS_SELECTOR, label_selector)
-        if label_element and safe_click(driver, label_element, f"'{settlement}' label"):
-            time.sleep(PAGE_LOAD_DELAY); log_debug(f"Successfully set settlement to {settlement}", "SUCCESS"); return True
-        else:
-            log_debug(f"Could not find or click label for {settlement}", "ERROR"); return False
+        return select_filter_option(driver, "settlement", SETTLEMENT_FILTER_KEYWORDS, settlement, settlement_info['id'])
     except Exception as e:
         log_debug(f"An unexpected error in set_settlement: {e}", "ERROR"); return False
-def set_date_to_latest(driver):
-    log_debug("Setting date to latest available...")
+def set_date_range(driver, date_from: str, date_to: str):
+    """Sets both datepicker inputs (dd.mm.yyyy) and applies the filter once."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    log_debug(f"Setting date range {date_from} - {date_to}...")
     try:
-        max_date = get_max_available_date(driver)
-        if not max_date: return None
         datepicker_button = wait_for_clickable(driver, By.CSS_SELECTOR, SELECTORS['datepicker_button'])
-        if not safe_click(driver, datepicker_button, "datepicker button"): return None
-        time.sleep(1)
-        date_to_input = wait_for_element(driver, By.CSS_SELECTOR, SELECTORS['date_to_input'])
-        if date_to_input: driver.execute_script(f"arguments[0].value = '{max_date}';", date_to_input)
+        if not safe_click(driver, datepicker_button, "datepicker button"): return False
+        date_to_input = wait_until(driver, EC.visibility_of_element_located((By.CSS_SELECTOR, SELECTORS['date_to_input'])), "datepicker inputs")
+        if date_to_input: driver.execute_script(f"arguments[0].value = '{date_to}';", date_to_input)
         date_from_input = wait_for_element(driver, By.CSS_SELECTOR, SELECTORS['date_from_input'])
-        if date_from_input: driver.execute_script(f"arguments[0].value = '{max_date}';", date_from_input)
-        time.sleep(1)
+        if date_from_input: driver.execute_script(f"arguments[0].value = '{date_from}';", date_from_input)
+        old_table = current_table(driver)
         apply_button = wait_for_clickable(driver, By.CSS_SELECTOR, SELECTORS['datepicker_apply'])
-        if safe_click(driver, apply_button, "Apply date button"):
-            time.sleep(PAGE_LOAD_DELAY); log_debug(f"Date successfully set to {max_date}", "SUCCESS"); return max_date
-        return None
+        with span('filter', filter='date', what=f"{date_from} - {date_to}") as timing:
+            timing['ok'] = safe_click(driver, apply_button, "Apply date button")
+            if timing['ok']: wait_for_page_update(driver, old_table, f"date range {date_from} - {date_to}")
+        if timing['ok']: log_debug(f"Date range successfully set to {date_from} - {date_to}", "SUCCESS")
+        return timing['ok']
     except Exception as e:
-        log_debug(f"An unexpected error in set_date: {e}", "ERROR"); return None
-def extract_table_data(driver, source, settlement):
+        log_debug(f"An unexpected error in set_date_range: {e}", "ERROR"); return False
+def set_date_to_latest(driver):
+    log_debug("Setting date to latest available...")
+    max_date = get_max_available_date(driver)
+    if not max_date: return None
+    return max_date if set_date_range(driver, max_date, max_date) else None
+def parse_table_html(html, source, settlement, currency=DEFAULT_CURRENCY):
+    """Parses the first data row of a `table.data` fragment (or a full page) into Excel columns."""
+    from table_parser import parse_first_row
+    data = parse_first_row(html, source, settlement, currency)
+    if not data: log_debug("No data rows found in table", "WARNING"); return {}
+    log_debug(f"Parsed latest row: {data}")
+    return data
+
+def parse_table_rows(html, source, settlement, currency=DEFAULT_CURRENCY):
+    """Parses every data row into Excel columns, keyed by trade date (YYYY-MM-DD)."""
+    from table_parser import parse_table
+    parsed = parse_table(html, source, settlement, currency)
+    log_debug(f"Parsed {len(parsed)} rows for {source} + {settlement}")
+    return parsed
+
+def get_table_html(driver):
+    from selenium.webdriver.common.by import By
+    table = wait_for_element(driver, By.CSS_SELECTOR, SELECTORS['data_table'])
+    if not table: log_debug("Data table not found", "ERROR"); return None
+    return table.get_attribute('outerHTML')
+
+def extract_table_data(driver, source, settlement, currency=DEFAULT_CURRENCY, date=None):
+    """Parses the current table; with the trade date known the result is also cached for reruns."""
     log_debug(f"Extracting table data for {source} + {settlement}...")
-    try:
-        table = wait_for_element(driver, By.CSS_SELECTOR, SELECTORS['data_table'])
-        if not table: log_debug("Data table not found", "ERROR"); return None
-        soup = BeautifulSoup(table.get_attribute('outerHTML'), 'html.parser')
-        rows = soup.select('tbody tr')
-        if not rows: log_debug("No data rows found in table", "WARNING"); return {}
-        cells = rows[0].find_all('td'); cell_values = [c.get_text(strip=True) for c in cells]
-        log_debug(f"Raw cell values extracted: {cell_values}")
-        mapping = get_column_mapping_by_source(source, settlement)
-        data = {'trade_date': parse_date_to_standard(cell_values[0])}
-        if source == 'swapinfosellvol' and len(cell_values) >= 3:
-            data[mapping[0]] = parse_number(cell_values[1]); data[mapping[1]] = parse_number(cell_values[2])
-        elif source == 'swap_info_sell' and len(cell_values) >= 8:
-            data[mapping[0]] = parse_date_to_integer(cell_values[1]); data[mapping[1]] = parse_date_to_integer(cell_values[2])
-            data[mapping[2]] = parse_number(cell_values[3]); data[mapping[3]] = parse_number(cell_values[4])
-            data[mapping[4]] = parse_number(cell_values[5]); data[mapping[5]] = parse_number(cell_values[6])
-            data[mapping[6]] = parse_number(cell_values[7])
-        return data
-    except Exception as e:
-        log_debug(f"An unexpected error during table extraction: {e}", "ERROR"); return None
+    with span('extract', source=source, settlement=settlement, currency=currency) as timing:
+        try:
+            html = get_table_html(driver)
+            if html is None: timing['ok'] = False; return None
+            data = parse_table_html(html, source, settlement, currency)
+            if date and data: cache_store(source, currency, settlement, date, html, data)
+            return data
+        except Exception as e:
+            timing['ok'] = False; log_debug(f"An unexpected error during table extraction: {e}", "ERROR"); return None
+
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+def cache_lookup(source, currency, settlement, date):
+    """Cached parsed rows for a table, or None on a miss or with the cache disabled."""
+    from response_cache import get_cache
+    cache = get_cache()
+    entry = cache.get(source, currency, settlement, date) if cache else None
+    if entry: log_debug(f"Serving {source} + {settlement} + {currency} ({date}) from cache", "SUCCESS")
+    return entry['rows'] if entry else None
+
+def cache_store(source, currency, settlement, date, html, rows):
+    """Caches a table under its date (or range)."""
+    from response_cache import get_cache
+    cache = get_cache()
+    if cache: cache.put(source, currency, settlement, date, html, rows)
+
+def cached_latest_row(currencies):
+    """
+    Full data row from the cache for CBR's current latest date, else None
+
+    Each source's data-max-date is read first with the cheap probe request, so
+    tables of an older trade date are never served after a new release.
+    """
+    from response_cache import get_cache
+    if not get_cache(): return None
+    from probe import fetch_max_available_date
+    data_row = {col: None for col in get_data_columns(currencies)}
+    for source_key, source_info in DATA_SOURCES.items():
+        max_date = fetch_max_available_date(source_info['url'])
+        if not max_date: return None
+        max_date = datetime.strptime(max_date, OUTPUT_DATE_FORMAT).strftime(SOURCE_DATE_FORMAT)
+        for currency in currencies:
+            for settlement in source_info['settlements']:
+                rows = cache_lookup(source_key, currency, settlement, max_date)
+                if not rows: return None
+                data_row.update(rows)
+    return data_row
 
 # =============================================================================
 # MAIN WORKFLOW (Unchanged)
 # =============================================================================
-def collect_data_from_source(driver, source_key, currency):
-    source_info = DATA_SOURCES[source_key]; url = source_info['url']
-    log_debug(f"\n{'='*80}\nCollecting from: {source_key} at {url}\n{'='*80}")
-    driver.get(url); handle_cookie_banner(driver)
+def collect_currency_on_page(driver, source_key, currency):
+    """Collects every settlement for one currency on an already loaded source page."""
+    from checkpoint import get_checkpoint, collect_with_retry
+    settlements = DATA_SOURCES[source_key]['settlements']; checkpoint = get_checkpoint()
+    max_date = get_max_available_date(driver); trade_date = parse_date_to_standard(max_date)
+    # Only the response cache is reused (never with --no-cache); the checkpoint is only read by --resume
+    cached = {s: cache_lookup(source_key, currency, s, max_date) for s in settlements} if max_date else {}
+    if cached and all(cached.values()):
+        for settlement, data in cached.items(): checkpoint.record(trade_date, source_key, settlement, currency, data)
+        return {k: v for rows in cached.values() for k, v in rows.items()}
     if not set_currency(driver, currency) or not set_date_to_latest(driver):
-        log_debug(f"Halting collection from {source_key} due to setup failure", "ERROR"); return None
+        log_debug(f"Halting {currency} collection from {source_key} due to setup failure", "ERROR"); return None
     combined_data = {}
-    for settlement in source_info['settlements']:
-        log_debug(f"\n--- Collecting data for settlement: {settlement} ---")
-        if not set_settlement(driver, settlement): continue
-        data = extract_table_data(driver, source_key, settlement)
+    for settlement in settlements:
+        log_debug(f"\n--- Collecting data for settlement: {settlement} ({currency}) ---")
+        def attempt_settlement(attempt):
+            # First try on the loaded page; retries reload it (one page load each)
+            if attempt > 1: return collect_settlement(driver, source_key, settlement, currency)
+            if not set_settlement(driver, settlement): return None
+            return extract_table_data(driver, source_key, settlement, currency, max_date)
+        data = cached.get(settlement)
+        if not data:
+            data = collect_with_retry(checkpoint, source_key, f"{source_key} + {settlement} ({currency})", attempt_settlement)
         if data is not None:
+            checkpoint.record(data.get('trade_date') or trade_date, source_key, settlement, currency, data)
             combined_data.update(data); log_debug(f"Successfully collected data for {settlement}", "SUCCESS")
     return combined_data
 
-def run_full_collection(currency):
+def collect_settlement(driver, source_key, settlement, currency):
+    """Collects a single source/settlement/currency table with one page load."""
+    url = DATA_SOURCES[source_key]['url']
+    log_debug(f"[{source_key} + {settlement} + {currency}] Navigating to {url}")
+    load_page(driver, url, source_key)
+    max_date = get_max_available_date(driver)
+    cached = cache_lookup(source_key, currency, settlement, max_date) if max_date else None
+    if cached: return cached
+    if not set_currency(driver, currency) or not set_date_to_latest(driver) or not set_settlement(driver, settlement):
+        log_debug(f"[{source_key} + {settlement} + {currency}] Setup failed", "ERROR"); return None
+    return extract_table_data(driver, source_key, settlement, currency, max_date)
+
+def resume_collection(currencies):
+    """
+    Re-collects only the cells missing from the checkpoint, one page load each
+
+    Returns:
+        The data row rebuilt from the checkpoint, or None when there is nothing
+        to resume or CBR has published a newer trade date in the meantime
+    """
+    from checkpoint import get_checkpoint, collect_with_retry
+    checkpoint = get_checkpoint()
+    if not checkpoint.trade_date: log_debug("No checkpoint to resume", "WARNING"); return None
+    missing = checkpoint.missing(currencies)
+    log_debug(f"Resuming {checkpoint.trade_date}: {len(missing)} missing cell(s) {missing}")
+    if missing:
+        driver = setup_driver()
+        try:
+            for source_key, settlement, currency in missing:
+                data = collect_with_retry(checkpoint, source_key, f"{source_key} + {settlement} ({currency})",
+                                          lambda attempt: collect_settlement(driver, source_key, settlement, currency))
+                if data is None: continue
+                if data.get('trade_date') != checkpoint.trade_date:
+                    log_debug(f"CBR now shows {data.get('trade_date')}, not the checkpointed {checkpoint.trade_date}; "
+                              "run a full collection instead", "ERROR"); return None
+                checkpoint.record(checkpoint.trade_date, source_key, settlement, currency, data)
+        finally:
+            close_driver(driver)
+    return checkpoint.data_row(currencies)
+
+def collect_data_from_source(driver, source_key, currencies):
+    """Loads a source page once and collects each currency on it in turn."""
+    if isinstance(currencies, str): currencies = [currencies]
+    source_info = DATA_SOURCES[source_key]; url = source_info['url']
+    log_debug(f"\n{'='*80}\nCollecting from: {source_key} at {url}\n{'='*80}")
+    load_page(driver, url, source_key)
+    combined_data = {}
+    for currency in currencies:
+        data = collect_currency_on_page(driver, source_key, currency)
+        if data: combined_data.update(data)
+    return combined_data
+
+def run_full_collection(currencies):
+    if isinstance(currencies, str): currencies = [currencies]
     log_debug("\n" + "="*80 + "\nSTARTING FULL DATA COLLECTION\n" + "="*80)
     driver = None
     try:
         driver = setup_driver()
-        data_row = {col: None for col in DATA_COLUMNS}
-        volume_data = collect_data_from_source(driver, 'swapinfosellvol', currency)
+        data_row = {col: None for col in get_data_columns(currencies)}
+        volume_data = collect_data_from_source(driver, 'swapinfosellvol', currencies)
         if volume_data: data_row.update(volume_data)
-        terms_data = collect_data_from_source(driver, 'swap_info_sell', currency)
+        terms_data = collect_data_from_source(driver, 'swap_info_sell', currencies)
         if terms_data: data_row.update(terms_data)
         log_debug("\n" + "="*80 + "\nDATA COLLECTION COMPLETE\n" + "="*80)
         return data_row
     except Exception as e:
         log_debug(f"A critical error occurred in the full collection process: {e}", "ERROR"); return None
     finally:
-        if driver: log_debug("Closing WebDriver..."); driver.quit()
+        if driver: close_driver(driver)
+
+def run_collection(currencies, engine=COLLECTION_ENGINE, workers=COLLECTION_WORKERS, resume=False):
+    """Runs the selected engine; an incomplete HTTP result falls back to Selenium."""
+    if isinstance(currencies, str): currencies = [currencies]
+    if resume: return resume_collection(currencies)
+    cached_row = cached_latest_row(currencies)
+    if cached_row:
+        log_debug("All tables served from the response cache", "SUCCESS"); return cached_row
+    if engine == 'http':
+        from http_collector import run_http_collection
+        data_row = run_http_collection(currencies)
+        if data_row and data_row.get('trade_date') and all(data_row.get(col) is not None for col in get_data_columns(currencies)):
+            return data_row
+        log_debug("HTTP collection incomplete, falling back to Selenium", "WARNING")
+    elif engine == 'fetch':
+        from browser_fetch import run_fetch_collection
+        return run_fetch_collection(currencies)
+    if workers > 1:
+        from browser_pool import run_parallel_collection
+        return run_parallel_collection(currencies, workers)
+    return run_full_collection(currencies)
 
 # =============================================================================
 # MAIN EXECUTION (Updated to call export_to_excel)
 # =============================================================================
-def main():
+def main(engine=COLLECTION_ENGINE, workers=COLLECTION_WORKERS, currencies=(DEFAULT_CURRENCY,), export=True, resume=False):
     start_time = time.time()
     print("\n" + "="*80 + "\nRUSSD DATA COLLECTION SCRIPT\n" + "="*80)
+    headers = get_excel_headers(currencies)
     
-    final_data = run_full_collection(DEFAULT_CURRENCY)
+    final_data = run_collection(list(currencies), engine, workers, resume)
     
     if final_data:
         print("\n" + "="*80 + "\nCOLLECTED DATA SUMMARY\n" + "="*80)
         if final_data.get('trade_date'):
             print(f"Trade Date: {final_data.get('trade_date')}\n")
-            for col in DATA_COLUMNS:
-                value = final_data.get(col); header_info = EXCEL_HEADERS[col]
+            for col in get_data_columns(currencies):
+                value = final_data.get(col); header_info = headers[col]
                 print(f"Column {col} ({header_info['code']}): {value}")
             
+            missing = [col for col in get_data_columns(currencies) if final_data.get(col) is None]
+            if missing:
+                print(f"\n⚠️  Missing columns {', '.join(missing)}; `python orchastrator.py --resume` "
+                      "re-collects only the failed source/settlement tables")
             print("\n✅ Data collection successful!")
             
             # --- ADDED: Call the export function ---
-            export_to_excel(final_data)
+            store_rows([final_data], headers)
+            if export: export_to_excel(final_data, headers)
 
         else:
             print("\n❌ Collection finished, but no data was extracted. Please check the logs.")
@@ -278,40 +557,106 @@ def main():
 
     elapsed_time = time.time() - start_time
     print(f"\n⏱️  Total collection time: {elapsed_time:.2f} seconds")
+    for name, (count, total, failures) in sorted(summarize().items(), key=lambda item: -item[1][1]):
+        print(f"   {name:<16} {count:4d} span(s) {total:8.2f} s" + (f"  ({failures} failed)" if failures else ""))
 
     return final_data
 
-if __name__ == "__main__":
+def record_package(zip_file, trade_date):
+    """Records a finished package in the run state; returns its SHA-256."""
+    from package_creator import package_digest
+    from run_state import load_state, update_state
+    digest = package_digest(zip_file); state = load_state()
+    if digest == state.get('last_package_sha256'):
+        print(f"♻️  {zip_file} is byte-identical to the previous package; nothing new to upload")
+    # A backfill packages older dates; the probe must keep seeing the newest one
+    latest = max(filter(None, [state.get('last_packaged_date'), trade_date]))
+    update_state(last_packaged_date=latest, last_package_sha256=digest)
+    return digest
+
+def run_pipeline(engine=COLLECTION_ENGINE, workers=COLLECTION_WORKERS, currencies=(DEFAULT_CURRENCY,),
+                 in_memory=IN_MEMORY_PACKAGE, resume=False):
+    """Collects (or resumes the checkpoint), exports, writes metadata and packages; returns the trade date or None."""
+    with span('run', engine=engine, mode='resume' if resume else None) as timing:
+        trade_date = _run_pipeline(engine, workers, currencies, in_memory, resume)
+        timing['ok'] = bool(trade_date)
+    flush_metrics(success=bool(trade_date))
+    return trade_date
+
+def _run_pipeline(engine, workers, currencies, in_memory, resume):
     from metadata_writer import create_metadata_file
-    from package_creator import create_package
-    
-    result = main()
+    from package_creator import create_package, create_package_from_rows
+    from validation import gate_rows
+
+    result = main(engine, workers, currencies, export=not in_memory, resume=resume)
     
     if result and result.get('trade_date'):
         trade_date = result['trade_date']
         timestamp = datetime.strptime(trade_date, OUTPUT_DATE_FORMAT).strftime('%Y%m%d')
+        headers = get_excel_headers(currencies)
+        
+        # Garbage from a broken page must not ship
+        if not gate_rows([result], headers):
+            print("\n❌ Validation failed, no package created (RUSSD_NO_VALIDATION=1 packages anyway)")
+            return None
         
         # File names
         data_file = f'RUSSD_DATA_{timestamp}.xlsx'
         meta_file = f'RUSSD_META_{timestamp}.xls'
         
-        # Create metadata file
-        print("\n" + "="*80)
-        print("CREATING METADATA FILE")
-        print("="*80)
-        create_metadata_file(trade_date)
-        
-        # Create ZIP package
-        print("\n" + "="*80)
-        print("CREATING ZIP PACKAGE")
-        print("="*80)
-        create_package(data_file, meta_file)
+        if in_memory:
+            # Both workbooks are rendered straight into the ZIP
+            print("\n" + "="*80)
+            print("CREATING ZIP PACKAGE (IN MEMORY)")
+            print("="*80)
+            zip_file = create_package_from_rows([result], trade_date, headers)
+        else:
+            # Create metadata file
+            print("\n" + "="*80)
+            print("CREATING METADATA FILE")
+            print("="*80)
+            create_metadata_file(trade_date, headers)
+            
+            # Create ZIP package
+            print("\n" + "="*80)
+            print("CREATING ZIP PACKAGE")
+            print("="*80)
+            zip_file = create_package(data_file, meta_file)
+        digest = record_package(zip_file, trade_date)
         
         print("\n" + "="*80)
         print("🎉 COMPLETE RUSSD PACKAGE READY!")
         print("="*80)
         print(f"📦 Files created:")
-        print(f"   - {data_file}")
-        print(f"   - {meta_file}")
-        print(f"   - RUSSD_{timestamp}.ZIP")
-        print("="*80)
\ No newline at end of file
+        if not in_memory:
+            print(f"   - {data_file}")
+            print(f"   - {meta_file}")
+        print(f"   - {zip_file} (sha256 {digest[:12]})")
+        print("="*80)
+        return trade_date
+    return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RUSSD data collection")
+    parser.add_argument('--engine', choices=['selenium', 'http', 'fetch'], default=COLLECTION_ENGINE,
+                        help="Collection engine; 'http' falls back to Selenium on failure, "
+                             "'fetch' requests every table from inside one loaded page")
+    parser.add_argument('--workers', type=int, default=COLLECTION_WORKERS,
+                        help="Number of concurrent browsers for the Selenium engine")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore and do not write the response cache")
+    parser.add_argument('--lean', action='store_true', help="Headless Chrome that skips images, fonts and trackers")
+    parser.add_argument('--no-validation', action='store_true', help="Package even if the consistency checks fail")
+    parser.add_argument('--currencies', nargs='+', choices=list(CURRENCIES), default=[DEFAULT_CURRENCY],
+                        help="Currencies to collect; each adds its 18 columns to the data file")
+    parser.add_argument('--in-memory', action='store_true', default=IN_MEMORY_PACKAGE,
+                        help="Build the ZIP from in-memory workbooks without writing RUSSD_DATA/RUSSD_META files")
+    parser.add_argument('--resume', action='store_true',
+                        help="Re-collect only the tables missing from the last run's checkpoint, then rebuild the package")
+    args = parser.parse_args()
+    if args.no_cache: os.environ['RUSSD_NO_CACHE'] = '1'
+    if args.lean: os.environ['RUSSD_LEAN_BROWSER'] = '1'
+    if args.no_validation: os.environ['RUSSD_NO_VALIDATION'] = '1'
+    
+    run_pipeline(args.engine, args.workers, args.currencies, args.in_memory, args.resume)
@@ -3,25 +3,37 @@ RUSSD Package Creator
 Creates the final ZIP file with DATA and META files
 """
 
+import hashlib
+import io
 import zipfile
 import os
 from datetime import datetime
 
+from config import EXCEL_HEADERS, OUTPUT_DATE_FORMAT
+from metrics import timed
 
-def create_package(data_file, meta_file):
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+ZIP_COMPRESSION_LEVEL = 6  # zlib level for the package entries: 1 fastest ... 9 smallest
+
+
+@timed('package')
+def create_package(data_file, meta_file, compresslevel=ZIP_COMPRESSION_LEVEL):
     """
     Create RUSSD_YYYYMMDD.ZIP containing both files
     
     Args:
         data_file: Path to RUSSD_DATA_YYYYMMDD.xlsx
         meta_file: Path to RUSSD_META_YYYYMMDD.xls
+        compresslevel: zlib compression level (0-9)
     """
     # Extract timestamp from data file
     timestamp = data_file.split('_')[-1].replace('.xlsx', '').replace('.xls', '')
     zip_filename = f'RUSSD_{timestamp}.ZIP'
     
     # Create ZIP file
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
         if os.path.exists(data_file):
             zipf.write(data_file, os.path.basename(data_file))
             print(f"  Added: {data_file}")
@@ -34,6 +46,71 @@ def create_package(data_file, meta_file):
     return zip_filename
 
 
+@timed('package', mode='memory')
+def create_package_from_rows(data_rows, trade_date_str, headers=EXCEL_HEADERS, compresslevel=ZIP_COMPRESSION_LEVEL,
+                             output_dir=None):
+    """
+    Create RUSSD_YYYYMMDD.ZIP with both workbooks rendered in memory
+    
+    Neither RUSSD_DATA nor RUSSD_META touches the disk. Every entry (and the
+    parts inside the xlsx) is stamped with the trade date instead of the
+    current time, so identical data produces a byte-identical ZIP.
+    
+    Args:
+        data_rows: Data rows keyed by column letter plus 'trade_date'
+        trade_date_str: Trade date in YYYY-MM-DD format
+        headers: Excel headers (config.get_excel_headers of the selected currencies)
+        compresslevel: zlib compression level (0-9)
+        output_dir: Directory for the ZIP (default: current directory)
+    """
+    from metadata_writer import render_metadata_file
+    members = [render_data_file(data_rows, trade_date_str, headers), render_metadata_file(trade_date_str, headers)]
+    return write_package(members, trade_date_str, compresslevel, output_dir)
+
+
+def render_data_file(data_rows, trade_date_str, headers=EXCEL_HEADERS):
+    """Renders RUSSD_DATA_YYYYMMDD.xlsx into memory; returns (file name, workbook bytes)."""
+    from excel_writer import write_data_workbook
+    trade_date = datetime.strptime(trade_date_str, OUTPUT_DATE_FORMAT)
+    buffer = io.BytesIO()
+    write_data_workbook(data_rows, buffer, headers, timestamp=trade_date)
+    return f"RUSSD_DATA_{trade_date.strftime('%Y%m%d')}.xlsx", buffer.getvalue()
+
+
+def write_package(members, trade_date_str, compresslevel=ZIP_COMPRESSION_LEVEL, output_dir=None):
+    """
+    Writes RUSSD_YYYYMMDD.ZIP from (file name, bytes) members
+    
+    Entries carry the trade date as timestamp and fixed permissions; the ZIP
+    is written next to the target and renamed, so a watcher never picks up a
+    partial file.
+    """
+    trade_date = datetime.strptime(trade_date_str, OUTPUT_DATE_FORMAT)
+    zip_filename = f"RUSSD_{trade_date.strftime('%Y%m%d')}.ZIP"
+    if output_dir: zip_filename = os.path.join(output_dir, zip_filename)
+    
+    tmp_filename = f'{zip_filename}.{os.getpid()}.tmp'
+    with zipfile.ZipFile(tmp_filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
+        for name, content in members:
+            entry = zipfile.ZipInfo(name, trade_date.timetuple()[:6])
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            entry.external_attr = 0o644 << 16
+            zipf.writestr(entry, content, compresslevel=compresslevel)  # A ZipInfo ignores the ZipFile level
+            print(f"  Added: {name} ({len(content)} bytes, in memory)")
+    os.replace(tmp_filename, zip_filename)
+    
+    print(f"\n✅ Package created: {zip_filename}")
+    return zip_filename
+
+
+def package_digest(zip_filename):
+    """SHA-256 of a package; equal digests mean there is nothing new to upload."""
+    digest = hashlib.sha256()
+    with open(zip_filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''): digest.update(block)
+    return digest.hexdigest()
+
+
 if __name__ == "__main__":
     # Example usage
     data_file = "RUSSD_DATA_20250211.xlsx"
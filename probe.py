@@ -0,0 +1,85 @@
+"""
+RUSSD Release Probe
+Cheap check whether CBR has published a trade date newer than the last package
+"""
+
+import glob
+import os
+import re
+import sys
+import urllib.request
+from datetime import datetime
+
+from config import DATA_SOURCES, HTTP_HEADERS, SOURCE_DATE_FORMAT, OUTPUT_DATE_FORMAT, DATE_INT_FORMAT
+from run_state import load_state
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+PROBE_SOURCE = 'swapinfosellvol'
+PROBE_TIMEOUT = 5
+MAX_DATE_PATTERN = re.compile(r'data-max-date="(\d{2}\.\d{2}\.\d{4})"')
+PACKAGE_PATTERN = re.compile(r'RUSSD_(\d{8})\.ZIP$')
+
+# Exit codes of `python probe.py`
+EXIT_NEW, EXIT_NOTHING_NEW, EXIT_UNKNOWN = 0, 1, 2
+
+
+def fetch_max_available_date(url=DATA_SOURCES[PROBE_SOURCE]['url'], timeout=PROBE_TIMEOUT):
+    """
+    Reads the datepicker's data-max-date with one plain HTTP request
+
+    Returns:
+        Latest available trade date (YYYY-MM-DD), or None if it could not be read
+    """
+    request = urllib.request.Request(url, headers=HTTP_HEADERS)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            html = response.read().decode('utf-8', errors='replace')
+    except OSError:
+        return None
+    match = MAX_DATE_PATTERN.search(html)
+    if not match: return None
+    return datetime.strptime(match.group(1), SOURCE_DATE_FORMAT).strftime(OUTPUT_DATE_FORMAT)
+
+def latest_packaged_date(output_dir='.'):
+    """Most recent trade date (YYYY-MM-DD) among existing RUSSD_YYYYMMDD.ZIP files and the state file."""
+    dates = [load_state().get('last_packaged_date')]
+    for path in glob.glob(os.path.join(output_dir, 'RUSSD_*.ZIP')):
+        match = PACKAGE_PATTERN.search(os.path.basename(path))
+        if match: dates.append(datetime.strptime(match.group(1), DATE_INT_FORMAT).strftime(OUTPUT_DATE_FORMAT))
+    dates = [d for d in dates if d]
+    return max(dates) if dates else None
+
+def check_for_new_data(output_dir='.'):
+    """
+    Compares the latest available date with the latest package
+
+    Returns:
+        (is_new, available date, packaged date); is_new is None when CBR could not be read
+    """
+    available = fetch_max_available_date()
+    packaged = latest_packaged_date(output_dir)
+    if available is None: return None, None, packaged
+    return packaged is None or available > packaged, available, packaged
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check whether CBR has published data newer than the last package")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--run', action='store_true',
+                        help="Run the full pipeline when there is new data (or when CBR could not be read)")
+    parser.add_argument('--engine', choices=['selenium', 'http'], default=None)
+    args = parser.parse_args()
+
+    is_new, available, packaged = check_for_new_data(args.output_dir)
+    if is_new is None: print(f"⚠️  Could not read the latest available date (last package: {packaged})")
+    elif is_new: print(f"🆕 New trade date available: {available} (last package: {packaged})")
+    else: print(f"✅ Nothing new: latest available {available} is already packaged")
+
+    if args.run and is_new is not False:
+        from orchastrator import run_pipeline, COLLECTION_ENGINE
+        sys.exit(0 if run_pipeline(args.engine or COLLECTION_ENGINE) else 1)
+    sys.exit(EXIT_UNKNOWN if is_new is None else EXIT_NEW if is_new else EXIT_NOTHING_NEW)
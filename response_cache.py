@@ -0,0 +1,155 @@
+"""
+RUSSD Response Cache
+Content-addressed on-disk cache of table HTML and parsed rows
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from config import STATE_DIR, SOURCE_DATE_FORMAT
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+CACHE_DIR = os.path.join(STATE_DIR, 'cache')
+CACHE_TTL = 7 * 24 * 3600  # Seconds a dated entry, or a range that had already ended, stays valid
+LATEST_TTL = 15 * 60  # Seconds a range that had not ended stays valid; CBR may publish a new date after that
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+ORPHAN_GRACE = 10 * 60  # Seconds an unreferenced blob is kept; another process may not have written its index entry yet
+
+
+class ResponseCache:
+    """
+    Stores table HTML once per content hash under blobs/, plus one small index
+    entry per (source, currency, settlement, date) pointing at the blob and
+    holding the parsed rows. `date` is a trade date or a 'from-to' range.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, latest_ttl=LATEST_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.latest_ttl = latest_ttl
+        self.max_bytes = max_bytes
+        self.index_dir = os.path.join(directory, 'index')
+        self.blob_dir = os.path.join(directory, 'blobs')
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def ttl_for(self, date, created):
+        """
+        Seconds an entry stays valid: date ranges that had not ended when they
+        were fetched can still gain rows, so they get latest_ttl
+        """
+        if '-' in date:
+            try: end = datetime.strptime(date.rsplit('-', 1)[1], SOURCE_DATE_FORMAT).date()
+            except ValueError: return self.ttl
+            if end >= datetime.fromtimestamp(created).date(): return self.latest_ttl
+        return self.ttl
+
+    @staticmethod
+    def make_key(source, currency, settlement, date):
+        return hashlib.sha256(json.dumps([source, currency, settlement, date]).encode()).hexdigest()
+
+    def _index_path(self, key):
+        return os.path.join(self.index_dir, f"{key}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, f"{digest}.html")
+
+    def get(self, source, currency, settlement, date):
+        """
+        Returns the cached entry or None when missing or expired
+
+        Returns:
+            {'rows': parsed rows, 'blob': content hash, 'created': epoch seconds}
+        """
+        path = self._index_path(self.make_key(source, currency, settlement, date))
+        try:
+            with open(path, encoding='utf-8') as f: entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['created'] > self.ttl_for(date, entry['created']):
+            self._remove(path); return None
+        os.utime(path)  # Keeps recently used entries last in line for size eviction
+        return entry
+
+    def put(self, source, currency, settlement, date, html, rows):
+        """Stores the raw table HTML (deduplicated by content) and its parsed rows."""
+        digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        blob_path = self._blob_path(digest)
+        try:
+            os.utime(blob_path)  # A fresh mtime keeps the blob out of another process's orphan sweep
+        except FileNotFoundError:
+            self._atomic_write(blob_path, html)
+        entry = {'key': [source, currency, settlement, date], 'blob': digest, 'rows': rows, 'created': time.time()}
+        self._atomic_write(self._index_path(self.make_key(source, currency, settlement, date)), json.dumps(entry))
+        self.evict()
+
+    def evict(self):
+        """
+        Drops expired entries, then the least recently used ones until under max_bytes,
+        then orphaned blobs older than ORPHAN_GRACE
+
+        Several processes may share the directory, so files that vanish midway
+        (evicted by another process) are skipped.
+        """
+        now = time.time(); entries = []
+        for name in os.listdir(self.index_dir):
+            if not name.endswith('.json'): continue
+            path = self._index_path(name[:-5])
+            try:
+                with open(path, encoding='utf-8') as f: entry = json.load(f)
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                self._remove(path); continue
+            if now - entry['created'] > self.ttl_for(entry['key'][3], entry['created']): self._remove(path); continue
+            entries.append((stat.st_mtime, path, entry['blob'], stat.st_size))
+        blob_sizes, blob_mtimes = {}, {}
+        for name in os.listdir(self.blob_dir):
+            if not name.endswith('.html'): continue
+            try: stat = os.stat(os.path.join(self.blob_dir, name))
+            except FileNotFoundError: continue
+            blob_sizes[name[:-5]], blob_mtimes[name[:-5]] = stat.st_size, stat.st_mtime
+        blob_refs = {}
+        for _, _, blob, _ in entries: blob_refs[blob] = blob_refs.get(blob, 0) + 1
+        total = sum(size for _, _, _, size in entries) + sum(blob_sizes.values())
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, path, blob, size = entries.pop(0)
+            self._remove(path); total -= size
+            blob_refs[blob] -= 1
+            if not blob_refs[blob]: total -= blob_sizes.get(blob, 0)
+        for digest in set(blob_sizes) - {blob for blob, refs in blob_refs.items() if refs}:
+            if now - blob_mtimes[digest] > ORPHAN_GRACE: self._remove(self._blob_path(digest))
+
+    @staticmethod
+    def _atomic_write(path, text):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f: f.write(text)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove(path):
+        try: os.remove(path)
+        except OSError: pass
+
+
+_cache = None
+
+def get_cache():
+    """Process-wide cache instance, created on first use; None when RUSSD_NO_CACHE is set."""
+    global _cache
+    if os.environ.get('RUSSD_NO_CACHE'): return None
+    if _cache is None: _cache = ResponseCache()
+    return _cache
+
+def use_cache_dir(directory):
+    """Points the process-wide cache at `directory`, e.g. a private one for a worker process."""
+    global _cache
+    _cache = ResponseCache(directory)
+    return _cache
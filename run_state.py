@@ -0,0 +1,28 @@
+"""
+RUSSD Run State
+Small JSON state file shared between runs (last packaged date and similar markers)
+"""
+
+import json
+import os
+
+from config import STATE_DIR
+
+STATE_FILE = os.path.join(STATE_DIR, 'state.json')
+
+
+def load_state(path=STATE_FILE):
+    """Returns the saved state, or {} when there is none yet."""
+    try:
+        with open(path, encoding='utf-8') as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def update_state(path=STATE_FILE, **values):
+    """Merges `values` into the state file, replacing it atomically."""
+    state = load_state(path); state.update(values)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f: json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+    return state
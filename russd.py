@@ -0,0 +1,201 @@
+"""
+RUSSD Command Line
+Single entry point; every subcommand imports only the modules it needs
+"""
+
+import argparse
+import os
+import sys
+
+from config import CURRENCIES, DEFAULT_CURRENCY
+
+# Modules each subcommand loads before doing any work; `startup` times them
+COMMAND_IMPORTS = {
+    'collect': ['orchastrator', 'http_collector', 'selenium.webdriver', 'undetected_chromedriver'],
+    'export': ['orchastrator', 'timeseries_store', 'excel_writer'],
+    'meta': ['metadata_writer'],
+    'package': ['package_creator'],
+    'probe': ['probe'],
+    'schedule': ['scheduler'],
+    'validate': ['validation', 'timeseries_store'],
+}
+
+
+# =============================================================================
+# COMMANDS
+# =============================================================================
+def cmd_collect(args):
+    if args.no_cache: os.environ['RUSSD_NO_CACHE'] = '1'
+    if args.lean: os.environ['RUSSD_LEAN_BROWSER'] = '1'
+    if args.no_validation: os.environ['RUSSD_NO_VALIDATION'] = '1'
+    from orchastrator import run_pipeline, COLLECTION_ENGINE, COLLECTION_WORKERS, IN_MEMORY_PACKAGE
+    engine, workers = args.engine or COLLECTION_ENGINE, args.workers or COLLECTION_WORKERS
+    in_memory = args.in_memory or IN_MEMORY_PACKAGE
+    if args.use_async:
+        import asyncio
+        from async_pipeline import run_daily
+        return 0 if asyncio.run(run_daily(engine, workers, args.currencies, in_memory, args.resume)) else 1
+    return 0 if run_pipeline(engine, workers, args.currencies, in_memory, args.resume) else 1
+
+def cmd_export(args):
+    from config import get_excel_headers
+    from orchastrator import export_from_store
+    filename = export_from_store(args.date_from, args.date_to, get_excel_headers(args.currencies))
+    if filename: print(filename)
+    return 0 if filename else 1
+
+def cmd_meta(args):
+    from config import get_excel_headers
+    from metadata_writer import create_metadata_file, create_metadata_files, METADATA_WORKERS
+    headers = get_excel_headers(args.currencies)
+    if not args.date_to:
+        create_metadata_file(args.date, headers, args.output_dir)
+        return 0
+    from cbr_calendar import business_days
+    create_metadata_files([d.strftime('%Y-%m-%d') for d in business_days(args.date, args.date_to)], headers,
+                          args.output_dir or '.', args.workers or METADATA_WORKERS)
+    return 0
+
+def cmd_package(args):
+    from datetime import datetime
+    from config import get_excel_headers, OUTPUT_DATE_FORMAT, DATE_INT_FORMAT
+    from package_creator import create_package, create_package_from_rows
+    if args.from_store:
+        from timeseries_store import TimeSeriesStore
+        headers = get_excel_headers(args.currencies)
+        with TimeSeriesStore() as store: rows = store.get_rows(args.date, args.date, headers)
+        if not rows: print(f"❌ No stored data for {args.date}"); return 1
+        from validation import gate_rows
+        if not gate_rows(rows, headers): print(f"❌ {args.date} failed validation"); return 1
+        zip_file = create_package_from_rows(rows, args.date, headers)
+    else:
+        stamp = datetime.strptime(args.date, OUTPUT_DATE_FORMAT).strftime(DATE_INT_FORMAT)
+        data_file, meta_file = f'RUSSD_DATA_{stamp}.xlsx', f'RUSSD_META_{stamp}.xls'
+        missing = [f for f in (data_file, meta_file) if not os.path.exists(f)]
+        if missing: print(f"❌ Missing {', '.join(missing)}"); return 1
+        zip_file = create_package(data_file, meta_file)
+    from orchastrator import record_package
+    record_package(zip_file, args.date)
+    return 0
+
+def cmd_probe(args):
+    from probe import check_for_new_data, EXIT_NEW, EXIT_NOTHING_NEW, EXIT_UNKNOWN
+    is_new, available, packaged = check_for_new_data(args.output_dir)
+    if is_new is None: print(f"⚠️  Could not read the latest available date (last package: {packaged})")
+    elif is_new: print(f"🆕 New trade date available: {available} (last package: {packaged})")
+    else: print(f"✅ Nothing new: latest available {available} is already packaged")
+    return EXIT_UNKNOWN if is_new is None else EXIT_NEW if is_new else EXIT_NOTHING_NEW
+
+def cmd_schedule(args):
+    from scheduler import run_scheduler
+    run_scheduler(args.engine, args.workers, args.currencies, args.in_memory or None, args.output_dir)
+    return 0
+
+def cmd_validate(args):
+    from config import get_excel_headers
+    from validation import check_history
+    return 0 if check_history(args.date_from, args.date_to, get_excel_headers(args.currencies), args.limit) else 1
+
+def cmd_startup(args):
+    """Times a fresh interpreter loading each subcommand's modules, against a bare interpreter."""
+    import statistics
+    import subprocess
+    import time
+
+    unknown = set(args.commands) - set(COMMAND_IMPORTS)
+    if unknown: print(f"❌ Unknown commands: {', '.join(sorted(unknown))}"); return 2
+
+    def measure(code):
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    baseline = measure('pass')
+    print(f"{'command':<10} {'median ms':>10} {'over bare python':>17}")
+    print(f"{'(python)':<10} {baseline:10.1f} {0:17.1f}")
+    for command, modules in COMMAND_IMPORTS.items():
+        if args.commands and command not in args.commands: continue
+        elapsed = measure('import russd; ' + '; '.join(f'import {m}' for m in modules))
+        print(f"{command:<10} {elapsed:10.1f} {elapsed - baseline:17.1f}")
+    return 0
+
+
+# =============================================================================
+# ARGUMENTS
+# =============================================================================
+def build_parser():
+    parser = argparse.ArgumentParser(prog='russd', description="RUSSD collection, export and packaging")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def currencies_option(p):
+        p.add_argument('--currencies', nargs='+', choices=list(CURRENCIES), default=[DEFAULT_CURRENCY],
+                       help="Currencies of the data file; each adds its 18 columns")
+
+    collect = sub.add_parser('collect', help="Collect the latest trade date and build the package")
+    collect.add_argument('--engine', choices=['selenium', 'http', 'fetch'], help="Defaults to COLLECTION_ENGINE")
+    collect.add_argument('--workers', type=int, help="Defaults to COLLECTION_WORKERS")
+    collect.add_argument('--no-cache', action='store_true')
+    collect.add_argument('--lean', action='store_true', help="Headless Chrome that skips images, fonts and trackers")
+    collect.add_argument('--no-validation', action='store_true', help="Package even if the consistency checks fail")
+    collect.add_argument('--in-memory', action='store_true')
+    collect.add_argument('--resume', action='store_true', help="Re-collect only the tables missing from the checkpoint")
+    collect.add_argument('--async', dest='use_async', action='store_true', help="Overlap collection with packaging")
+    currencies_option(collect)
+    collect.set_defaults(func=cmd_collect)
+
+    export = sub.add_parser('export', help="Write RUSSD_DATA for a stored date or range")
+    export.add_argument('--from', dest='date_from', required=True, help="First trade date (YYYY-MM-DD)")
+    export.add_argument('--to', dest='date_to', help="Last trade date (YYYY-MM-DD); defaults to --from")
+    currencies_option(export)
+    export.set_defaults(func=cmd_export)
+
+    meta = sub.add_parser('meta', help="Regenerate RUSSD_META for a trade date or every CBR business day of a range")
+    meta.add_argument('--date', required=True, help="Trade date (YYYY-MM-DD); the first one with --to")
+    meta.add_argument('--to', dest='date_to', help="Last trade date (YYYY-MM-DD) of a batch")
+    meta.add_argument('--output-dir')
+    meta.add_argument('--workers', type=int, help="Worker processes for large batches")
+    currencies_option(meta)
+    meta.set_defaults(func=cmd_meta)
+
+    package = sub.add_parser('package', help="Zip RUSSD_DATA and RUSSD_META of a trade date")
+    package.add_argument('--date', required=True, help="Trade date (YYYY-MM-DD)")
+    package.add_argument('--from-store', action='store_true',
+                         help="Render both files in memory from the time-series store instead of reading them from disk")
+    currencies_option(package)
+    package.set_defaults(func=cmd_package)
+
+    probe = sub.add_parser('probe', help="Check whether CBR has published a new trade date (exit 0 new, 1 not, 2 unknown)")
+    probe.add_argument('--output-dir', default='.')
+    probe.set_defaults(func=cmd_probe)
+
+    schedule = sub.add_parser('schedule', help="Stay running and collect each new trade date as soon as CBR publishes it")
+    schedule.add_argument('--engine', choices=['selenium', 'http', 'fetch'], help="Defaults to COLLECTION_ENGINE")
+    schedule.add_argument('--workers', type=int, help="Defaults to COLLECTION_WORKERS")
+    schedule.add_argument('--in-memory', action='store_true')
+    schedule.add_argument('--output-dir', default='.')
+    currencies_option(schedule)
+    schedule.set_defaults(func=cmd_schedule)
+
+    validate = sub.add_parser('validate', help="Check the stored history for inconsistent values (exit 1 on errors)")
+    validate.add_argument('--from', dest='date_from', help="First trade date (YYYY-MM-DD)")
+    validate.add_argument('--to', dest='date_to', help="Last trade date (YYYY-MM-DD)")
+    validate.add_argument('--limit', type=int, default=50, help="Issues to list (0 lists all)")
+    currencies_option(validate)
+    validate.set_defaults(func=cmd_validate)
+
+    startup = sub.add_parser('startup', help="Benchmark the import cost of each subcommand")
+    startup.add_argument('commands', nargs='*', metavar='command', help=f"Subset of {', '.join(COMMAND_IMPORTS)}")
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.set_defaults(func=cmd_startup)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+RUSSD Scheduler
+Long-running mode that polls for new CBR releases inside their learned publication window
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from cbr_calendar import is_business_day
+from config import DEFAULT_CURRENCY
+from probe import fetch_max_available_date, latest_packaged_date
+from run_state import load_state, update_state
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+CBR_TIMEZONE = timezone(timedelta(hours=3), 'MSK')  # Moscow has no DST; release times are learned in MSK
+DEFAULT_RELEASE_WINDOW = ('09:00', '20:00')  # Used until MIN_RELEASE_OBSERVATIONS releases have been seen
+MIN_RELEASE_OBSERVATIONS = 5
+RELEASE_HISTORY = 60  # Most recent releases the window is learned from
+WINDOW_MARGIN = 20  # Minutes added on both sides of the 10th-90th percentile of past releases
+POLL_MIN = 30  # Seconds between probes at the typical release minute
+POLL_MAX = 5 * 60  # Seconds between probes at the edges of the window
+POLL_OUTSIDE_WINDOW = 30 * 60  # Outside the window and on non-business days, still probe occasionally
+OBSERVATION_MAX_GAP = 15 * 60  # A new date seen after a longer gap between probes says little about when it appeared
+PROBE_BACKOFF_MAX = 15 * 60  # Ceiling of the backoff while CBR cannot be read
+RETRY_AFTER_FAILURE = 10 * 60  # Seconds before a failed pipeline run is retried; doubled for every further failure
+RETRY_MAX_DELAY = 4 * 60 * 60  # Ceiling of that backoff
+MAX_PIPELINE_ATTEMPTS = 5  # Pipeline runs per trade date before it is recorded as failed and no longer retried
+
+
+# =============================================================================
+# RELEASE WINDOW
+# =============================================================================
+def minute_of_day(timestamp):
+    moment = datetime.fromtimestamp(timestamp, CBR_TIMEZONE)
+    return moment.hour * 60 + moment.minute
+
+def parse_minute(hhmm):
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def record_release(previous_poll, seen_at):
+    """
+    Stores when a new data-max-date appeared, estimated as the midpoint of the
+    last probe that still saw the old date and the first one that saw the new date
+    """
+    published_at = (previous_poll + seen_at) / 2
+    releases = (load_state().get('release_minutes', []) + [minute_of_day(published_at)])[-RELEASE_HISTORY:]
+    update_state(release_minutes=releases, last_release_seen_at=seen_at)
+    return releases
+
+def release_window(releases=None):
+    """
+    (start, end, center) minutes of day (MSK) in which new dates usually appear
+
+    Learned from the 10th-90th percentile of past releases plus WINDOW_MARGIN;
+    the default window applies until enough releases have been observed.
+    """
+    if releases is None: releases = load_state().get('release_minutes', [])
+    if len(releases) < MIN_RELEASE_OBSERVATIONS:
+        start, end = map(parse_minute, DEFAULT_RELEASE_WINDOW)
+        return start, end, (start + end) // 2
+    deciles = statistics.quantiles(releases, n=10)
+    start = max(0, int(deciles[0]) - WINDOW_MARGIN); end = min(24 * 60 - 1, int(deciles[-1]) + WINDOW_MARGIN)
+    return start, end, int(statistics.median(releases))
+
+def next_poll_delay(now, window, done_today=False):
+    """
+    Seconds until the next probe
+
+    Inside the window the interval shrinks from POLL_MAX at the edges to POLL_MIN
+    at the typical release minute. Outside it, on CBR holidays and once today's
+    release has been handled, the scheduler backs off to POLL_OUTSIDE_WINDOW but
+    never sleeps past the start of the next window.
+    """
+    start, end, center = window
+    moment = datetime.fromtimestamp(now, CBR_TIMEZONE); minute = minute_of_day(now)
+    day_start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if not done_today and is_business_day(moment) and start <= minute <= end:
+        half_width = max(center - start, end - center, 1)
+        return POLL_MIN + (POLL_MAX - POLL_MIN) * min(1.0, abs(minute - center) / half_width)
+    next_start = day_start + timedelta(minutes=start)
+    if done_today or minute > end: next_start += timedelta(days=1)
+    while not is_business_day(next_start): next_start += timedelta(days=1)
+    until_window = next_start.timestamp() - now
+    # Today's release is in; nothing more to look for before the next window
+    if done_today: return max(POLL_MIN, until_window)
+    return max(POLL_MIN, min(POLL_OUTSIDE_WINDOW, until_window))
+
+def released_today(now, state=None):
+    """Whether a new date was seen appearing on the current MSK day, so none is expected before tomorrow."""
+    seen_at = (state if state is not None else load_state()).get('last_release_seen_at')
+    if not seen_at: return False
+    return datetime.fromtimestamp(seen_at, CBR_TIMEZONE).date() == datetime.fromtimestamp(now, CBR_TIMEZONE).date()
+
+def record_pipeline_failure(trade_date, now):
+    """
+    Counts a failed pipeline run for `trade_date` (YYYY-MM-DD as probed)
+
+    Returns:
+        Seconds until the next attempt, or None once MAX_PIPELINE_ATTEMPTS runs
+        have failed and the date has been added to 'failed_dates'
+    """
+    state = load_state(); failure = state.get('pipeline_failure') or {}
+    attempts = (failure.get('attempts', 0) if failure.get('trade_date') == trade_date else 0) + 1
+    if attempts >= MAX_PIPELINE_ATTEMPTS:
+        failed = (state.get('failed_dates', []) + [trade_date])[-RELEASE_HISTORY:]
+        update_state(pipeline_failure=None, failed_dates=failed)
+        return None
+    delay = min(RETRY_MAX_DELAY, RETRY_AFTER_FAILURE * 2 ** (attempts - 1))
+    update_state(pipeline_failure={'trade_date': trade_date, 'attempts': attempts, 'retry_at': now + delay})
+    return delay
+
+def pipeline_wait(trade_date, now, state=None):
+    """Seconds until the pipeline may run for `trade_date` again (0 if now), or None if the date has failed for good."""
+    state = state if state is not None else load_state()
+    if trade_date in state.get('failed_dates', []): return None
+    failure = state.get('pipeline_failure') or {}
+    if failure.get('trade_date') != trade_date: return 0
+    return max(0, failure['retry_at'] - now)
+
+
+# =============================================================================
+# DAEMON
+# =============================================================================
+def run_scheduler(engine=None, workers=None, currencies=(DEFAULT_CURRENCY,), in_memory=None, output_dir='.',
+                  max_runs=None, clock=time.time, sleep=time.sleep):
+    """
+    Probes CBR on an adaptive schedule and runs the pipeline as soon as a new date appears
+
+    Args:
+        engine, workers, in_memory: Passed to run_pipeline (None uses its defaults)
+        currencies: Currencies to collect
+        output_dir: Where existing RUSSD_YYYYMMDD.ZIP packages are looked up
+        max_runs: Stop after this many pipeline runs (None runs forever)
+        clock, sleep: Injectable time source and sleep for replaying a schedule
+
+    Returns:
+        Number of pipeline runs that produced a package
+    """
+    from orchastrator import log_debug, run_pipeline, COLLECTION_ENGINE, COLLECTION_WORKERS, IN_MEMORY_PACKAGE
+    engine = engine or COLLECTION_ENGINE; workers = workers or COLLECTION_WORKERS
+    in_memory = IN_MEMORY_PACKAGE if in_memory is None else in_memory
+    last_seen = load_state().get('last_available_date'); last_poll = None
+    probe_failures = runs = packaged = 0
+    log_debug(f"Scheduler started; release window {format_window(release_window())} MSK")
+    while max_runs is None or runs < max_runs:
+        polled_at = clock()
+        available = fetch_max_available_date()
+        window = release_window()
+        if available is None:
+            probe_failures += 1
+            delay = min(PROBE_BACKOFF_MAX, POLL_MIN * 2 ** probe_failures)
+            log_debug(f"Could not read the latest available date, next probe in {delay:.0f}s", "WARNING")
+            sleep(delay); continue
+        probe_failures = 0
+        if last_seen and available > last_seen and last_poll and polled_at - last_poll <= OBSERVATION_MAX_GAP:
+            record_release(last_poll, polled_at)
+            log_debug(f"New date {available} appeared; release window now {format_window(release_window())} MSK")
+        if available != last_seen:
+            update_state(last_available_date=available); last_seen = available
+        last_poll = polled_at
+
+        latest = latest_packaged_date(output_dir)
+        wait = pipeline_wait(available, polled_at) if latest is None or available > latest else None
+        if wait == 0:
+            log_debug(f"🆕 {available} is available (last package: {latest}), running the pipeline", "SUCCESS")
+            runs += 1
+            if run_pipeline(engine, workers, list(currencies), in_memory):
+                packaged += 1; update_state(pipeline_failure=None)
+                delay = next_poll_delay(clock(), window, released_today(clock()))
+            else:
+                delay = record_pipeline_failure(available, clock())
+                if delay is None:
+                    log_debug(f"Giving up on {available} after {MAX_PIPELINE_ATTEMPTS} failed runs; "
+                              f"waiting for the next date", "ERROR")
+                    delay = next_poll_delay(clock(), window, released_today(clock()))
+        else:
+            delay = next_poll_delay(polled_at, window, released_today(polled_at))
+            # Keep probing while a failed date backs off, so a newer date is picked up right away
+            if wait: delay = min(delay, wait)
+        log_debug(f"Next probe in {delay:.0f}s")
+        if max_runs is None or runs < max_runs: sleep(delay)
+    return packaged
+
+def format_window(window):
+    start, end, center = window
+    return f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d} (typically {center // 60:02d}:{center % 60:02d})"
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import CURRENCIES
+
+    parser = argparse.ArgumentParser(description="Run the RUSSD pipeline whenever CBR publishes a new trade date")
+    parser.add_argument('--engine', choices=['selenium', 'http', 'fetch'])
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--currencies', nargs='+', choices=list(CURRENCIES), default=[DEFAULT_CURRENCY])
+    parser.add_argument('--in-memory', action='store_true', default=None)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--window', action='store_true', help="Print the learned release window and exit")
+    args = parser.parse_args()
+
+    if args.window:
+        releases = load_state().get('release_minutes', [])
+        print(f"Release window {format_window(release_window(releases))} MSK from {len(releases)} observed releases")
+    else:
+        run_scheduler(args.engine, args.workers, args.currencies, args.in_memory, args.output_dir)
@@ -0,0 +1,165 @@
+"""
+RUSSD Sharded Backfill
+Splits a backfill range across worker processes, each with its own browser profile and output directory
+"""
+
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from config import CURRENCIES, DEFAULT_CURRENCY, STATE_DIR, OUTPUT_DATE_FORMAT, DATE_INT_FORMAT, get_excel_headers
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+SHARD_WORKERS = os.cpu_count() or 1
+SHARD_WORK_DIR = '.russd_shards'  # Under the output directory, so the final renames stay on one filesystem
+SHARD_PROFILE_DIR = os.path.join(STATE_DIR, 'profiles')  # One Chrome profile per shard, kept between runs
+SHARD_CACHE_DIR = os.path.join(STATE_DIR, 'shard_cache')  # One response cache per currency and shard range, kept for reruns
+
+
+def split_range(date_from: str, date_to: str, shards: int):
+    """
+    Splits a YYYY-MM-DD range into at most `shards` contiguous, non-overlapping ranges
+
+    Returns:
+        [(from, to), ...] in YYYY-MM-DD, in date order
+    """
+    start = datetime.strptime(date_from, OUTPUT_DATE_FORMAT)
+    days = (datetime.strptime(date_to, OUTPUT_DATE_FORMAT) - start).days + 1
+    shards = max(1, min(shards, days))
+    bounds = [start + timedelta(days=days * i // shards) for i in range(shards + 1)]
+    return [(a.strftime(OUTPUT_DATE_FORMAT), (b - timedelta(days=1)).strftime(OUTPUT_DATE_FORMAT))
+            for a, b in zip(bounds, bounds[1:])]
+
+
+def shard_cache_dir(currency, date_from, date_to):
+    return os.path.join(SHARD_CACHE_DIR, f"{currency}_{date_from}_{date_to}")
+
+def prune_shard_caches(max_age=None):
+    """Removes shard caches not written to for longer than the response cache TTL; every entry has expired by then."""
+    from response_cache import CACHE_TTL
+    if not os.path.isdir(SHARD_CACHE_DIR): return
+    now = time.time()
+    for name in os.listdir(SHARD_CACHE_DIR):
+        path = os.path.join(SHARD_CACHE_DIR, name)
+        try: written = os.path.getmtime(os.path.join(path, 'index'))
+        except OSError: written = 0
+        if now - written > (max_age or CACHE_TTL): shutil.rmtree(path, ignore_errors=True)
+
+
+# =============================================================================
+# WORKER PROCESS
+# =============================================================================
+def init_worker(startup_lock):
+    """Shares the coordinator's Chrome startup lock with a worker process."""
+    import orchastrator
+    orchastrator.DRIVER_STARTUP_LOCK = startup_lock
+
+def run_shard(index, date_from, date_to, currency, engine, work_dir):
+    """
+    Backfills one shard and packages every trade date into its own directory
+
+    Runs in a worker process; apart from the shard's browser profile and its
+    response cache (both private to the shard and kept for reruns) nothing is
+    written outside `work_dir`, so shards never clobber each other's files.
+
+    Returns:
+        (data rows, [(trade date, package path)], spans recorded in this process)
+    """
+    import metrics
+    from backfill import run_backfill
+    from package_creator import create_package_from_rows
+    from response_cache import use_cache_dir
+    from validation import gate_rows
+    os.makedirs(work_dir, exist_ok=True)
+    use_cache_dir(shard_cache_dir(currency, date_from, date_to))
+    profile = os.path.abspath(os.path.join(SHARD_PROFILE_DIR, f"shard-{index}")) if engine != 'http' else None
+    with metrics.span('shard', engine=engine, currency=currency, what=f"{date_from} - {date_to}"):
+        data_rows = run_backfill(date_from, date_to, currency, engine, user_data_dir=profile)
+        headers = get_excel_headers([currency])
+        packages = [(row['trade_date'], create_package_from_rows([row], row['trade_date'], headers, output_dir=work_dir))
+                    for row in gate_rows(data_rows, headers)]
+    return data_rows, packages, metrics.drain()
+
+
+# =============================================================================
+# COORDINATOR
+# =============================================================================
+def move_into_place(path, output_dir):
+    """Atomically renames a finished file from a shard directory into the output directory."""
+    target = os.path.join(output_dir, os.path.basename(path))
+    os.replace(path, target)
+    return target
+
+def run_sharded_backfill(date_from: str, date_to: str, currency: str = DEFAULT_CURRENCY, engine: str = 'selenium',
+                         workers: int = SHARD_WORKERS, output_dir: str = '.'):
+    """
+    Backfills a range on `workers` processes and merges the shards
+
+    Each shard packages its trade dates in a private directory; finished
+    packages are renamed into `output_dir`, the merged rows go into the
+    time-series store and one RUSSD_DATA range file.
+
+    Returns:
+        (data rows ordered by trade date, final package paths)
+    """
+    from metrics import SPANS, RUN_ID, span, flush as flush_metrics
+    from orchastrator import log_debug, store_rows, export_rows_to_excel, record_package
+    shards = split_range(date_from, date_to, workers)
+    prune_shard_caches()
+    run_dir = os.path.join(output_dir, SHARD_WORK_DIR, f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}")
+    log_debug("\n" + "="*80 + f"\nSTARTING SHARDED BACKFILL {date_from} - {date_to} ({len(shards)} shards)\n" + "="*80)
+    rows, packages = {}, []
+    with span('backfill', engine=engine, currency=currency, mode='sharded') as timing:
+        # spawn: Chrome and the driver must not inherit a forked copy of this process
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(len(shards), mp_context=context, initializer=init_worker,
+                                 initargs=(context.Lock(),)) as executor:
+            futures = {executor.submit(run_shard, i, shard_from, shard_to, currency, engine,
+                                       os.path.join(run_dir, f"shard-{i}")): (shard_from, shard_to)
+                       for i, (shard_from, shard_to) in enumerate(shards)}
+            for future in as_completed(futures):
+                shard_from, shard_to = futures[future]
+                try:
+                    shard_rows, shard_packages, shard_spans = future.result()
+                except Exception as e:
+                    log_debug(f"Shard {shard_from} - {shard_to} failed: {e}", "ERROR"); timing['ok'] = False; continue
+                SPANS.extend(dict(entry, run=RUN_ID) for entry in shard_spans)  # Report shards as part of this run
+                for row in shard_rows: rows[row['trade_date']] = row
+                for trade_date, path in shard_packages:
+                    packages.append(move_into_place(path, output_dir)); record_package(packages[-1], trade_date)
+                log_debug(f"Shard {shard_from} - {shard_to}: {len(shard_rows)} trade dates", "SUCCESS")
+
+        data_rows = [rows[d] for d in sorted(rows)]
+        headers = get_excel_headers([currency])
+        store_rows(data_rows, headers)  # One writer for the store, after all shards are in
+        if data_rows:
+            stamp_from, stamp_to = (datetime.strptime(d, OUTPUT_DATE_FORMAT).strftime(DATE_INT_FORMAT) for d in (date_from, date_to))
+            range_file = os.path.join(run_dir, f"RUSSD_DATA_{stamp_from}_{stamp_to}.xlsx")
+            if export_rows_to_excel(data_rows, range_file, headers): move_into_place(range_file, output_dir)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    flush_metrics(success=bool(data_rows))
+    return data_rows, sorted(packages)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RUSSD historical backfill sharded across processes")
+    parser.add_argument('--from', dest='date_from', required=True, help="First trade date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', required=True, help="Last trade date (YYYY-MM-DD)")
+    parser.add_argument('--currency', choices=list(CURRENCIES), default=DEFAULT_CURRENCY)
+    parser.add_argument('--engine', choices=['selenium', 'http'], default='selenium')
+    parser.add_argument('--workers', type=int, default=SHARD_WORKERS, help="Worker processes, one browser each")
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    data_rows, packages = run_sharded_backfill(args.date_from, args.date_to, args.currency, args.engine,
+                                               args.workers, args.output_dir)
+    print(f"\n✅ Backfilled {len(data_rows)} trade dates into {len(packages)} package(s)")
+    print(f"⏱️  Total backfill time: {time.time() - start_time:.2f} seconds")
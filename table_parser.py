@@ -0,0 +1,181 @@
+"""
+RUSSD Table Parser
+Fast lxml-based parsing of the CBR swap tables into typed rows
+"""
+
+from lxml import html as lxml_html
+
+from config import DEFAULT_CURRENCY, SOURCE_SERIES, get_column_mapping_by_source
+from orchastrator import parse_number, parse_date_to_standard, parse_date_to_integer
+
+# =============================================================================
+# TABLE LAYOUT
+# =============================================================================
+CONVERTERS = {'number': parse_number, 'date': parse_date_to_integer}
+
+# Per source, in Excel series order: (header keywords, converter, fallback cell index),
+# compiled from the series declared in config.DATA_SOURCES. A field is located by
+# the table header that contains all of its keywords; if any field cannot be
+# matched uniquely the fixed positions are used instead.
+SOURCE_FIELDS = {source: [(keywords, CONVERTERS[value_type], position) for keywords, value_type, position in fields]
+                 for source, fields in SOURCE_SERIES.items()}
+
+TABLE_XPATH = '//table[contains(concat(" ", normalize-space(@class), " "), " data ")]'
+BATCH_MIN_ROWS = 64  # From this many rows, cells are converted a column at a time (see cell_conversion.py)
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+def cell_text(cell):
+    """Same text as BeautifulSoup's get_text(strip=True): stripped fragments joined together."""
+    return ''.join(t.strip() for t in cell.itertext())
+
+def read_table(html):
+    """
+    Reads the header labels and raw cell strings of the first `table.data`
+
+    Args:
+        html: `table.data` outerHTML or a full page
+
+    Returns:
+        (header labels, list of data rows as lists of cell strings)
+    """
+    if not html or not html.strip(): return [], []
+    tables = lxml_html.fromstring(html).xpath(TABLE_XPATH)
+    if not tables: return [], []
+    headers, rows = [], []
+    for tr in tables[0].iter('tr'):
+        cells = [c for c in tr if c.tag in ('td', 'th')]
+        if any(c.tag == 'td' for c in cells): rows.append([cell_text(c) for c in cells])
+        elif cells and not headers: headers = [cell_text(c) for c in cells]
+    return headers, rows
+
+def resolve_field_indexes(source, headers):
+    """Maps each field of a source to a cell index, by header label where possible."""
+    fields = SOURCE_FIELDS[source]
+    labels = [h.lower() for h in headers]
+    matched = []
+    for keywords, _, _ in fields:
+        hits = [i for i, label in enumerate(labels) if i > 0 and all(kw in label for kw in keywords)]
+        matched.append(hits[0] if len(hits) == 1 else None)
+    if None in matched or len(set(matched)) != len(matched):
+        return [position for _, _, position in fields]
+    return matched
+
+def parse_typed_rows(html, source, errors=None):
+    """
+    Parses every data row into typed values in one pass
+
+    Args:
+        errors: Optional list that receives (row index, cell index, raw cell)
+                for every non-empty cell that could not be converted
+
+    Returns:
+        List of (trade date YYYY-MM-DD, [typed values in series order]) tuples;
+        the values list is empty for rows too short for the source layout
+    """
+    from cell_conversion import blank
+    headers, rows = read_table(html)
+    indexes = resolve_field_indexes(source, headers)
+    converters = [converter for _, converter, _ in SOURCE_FIELDS[source]]
+    required = max(indexes) + 1
+    if len(rows) >= BATCH_MIN_ROWS: return convert_rows(rows, source, indexes, converters, required, errors)
+    typed = []
+    for r, cells in enumerate(rows):
+        values = [convert(cells[i]) for convert, i in zip(converters, indexes)] if len(cells) >= required else []
+        trade_date = parse_date_to_standard(cells[0]) if cells else None
+        if errors is not None:
+            checked = [(parse_date_to_standard, 0, trade_date)] if cells else []
+            checked += [(convert, i, value) for convert, i, value in zip(converters, indexes, values)]
+            errors.extend((r, i, cells[i]) for convert, i, value in checked if value is None and not blank(convert, cells[i]))
+        typed.append((trade_date, values))
+    return typed
+
+def convert_rows(rows, source, indexes, converters, required, errors=None):
+    """Column-at-a-time counterpart of the per-cell loop in parse_typed_rows; same result, one warning per column."""
+    from cell_conversion import convert_column
+    complete = [len(cells) >= required for cells in rows]
+    full_rows = [r for r, ok in enumerate(complete) if ok]
+    columns, bad_cells = [], []
+    for convert, i in zip(converters, indexes):
+        values, bad = convert_column(convert, [rows[r][i] for r in full_rows], f"{source} column {i}")
+        columns.append(values)
+        bad_cells += [(full_rows[k], i, rows[full_rows[k]][i]) for k, is_bad in enumerate(bad) if is_bad]
+    dates, bad = convert_column(parse_date_to_standard, [cells[0] if cells else None for cells in rows], f"{source} dates")
+    bad_cells += [(r, 0, rows[r][0]) for r, is_bad in enumerate(bad) if is_bad]
+    if errors is not None: errors.extend(sorted(bad_cells))
+    values = iter(zip(*columns))
+    return [(trade_date, list(next(values)) if ok else []) for trade_date, ok in zip(dates, complete)]
+
+def parse_table(html, source, settlement, currency=DEFAULT_CURRENCY, errors=None):
+    """
+    Parses every data row into Excel columns; `errors` as in parse_typed_rows
+
+    Returns:
+        {trade date: {column letter: value}} for rows with a valid trade date
+    """
+    mapping = get_column_mapping_by_source(source, settlement, currency)
+    parsed = {}
+    for trade_date, values in parse_typed_rows(html, source, errors):
+        if trade_date: parsed[trade_date] = dict(zip(mapping, values))
+    return parsed
+
+def parse_first_row(html, source, settlement, currency=DEFAULT_CURRENCY):
+    """Parses only the first (latest) data row; {} when the table has no data rows."""
+    typed = parse_typed_rows(html, source)
+    if not typed: return {}
+    trade_date, values = typed[0]
+    return {'trade_date': trade_date, **dict(zip(get_column_mapping_by_source(source, settlement, currency), values))}
+
+
+# =============================================================================
+# MICROBENCHMARK
+# =============================================================================
+def build_synthetic_table(source, rows):
+    """Builds a backfill-sized `table.data` page in the CBR layout."""
+    if source == 'swapinfosellvol':
+        header = ['Date', 'Volume, millions of foreign currency', 'Volume, millions of RUB']
+        cells = lambda i: [f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.{2000 + i % 25}", f"{i * 1.5:,.2f}", f"{i * 90.25:,.2f}"]
+    else:
+        header = ['Date', 'FC sell date', 'RUB sell date', 'RUB interest rate, % p.a.', 'FC interest rate, % p.a.',
+                  'Base swap rate RUB/FC', 'Swap points, rubles', 'Maximum allotment amount, billions of FC']
+        cells = lambda i: [f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.{2000 + i % 25}"] * 3 + \
+                          [f"{i % 20}.{i % 100:02d}", "0.25", f"{90 + i % 10}.1234", "0.0123", "5.0"]
+    head = ''.join(f"<th>{h}</th>" for h in header)
+    body = ''.join('<tr>' + ''.join(f"<td>{c}</td>" for c in cells(i)) + '</tr>' for i in range(rows))
+    return f'<html><body><table class="data"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></body></html>'
+
+def parse_with_beautifulsoup(html, source, settlement):
+    """The previous BeautifulSoup html.parser path, kept as the benchmark baseline."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = [r for r in soup.select('table.data tbody tr') if r.find('td')]
+    mapping = get_column_mapping_by_source(source, settlement)
+    converters = [converter for _, converter, _ in SOURCE_FIELDS[source]]
+    parsed = {}
+    for row in rows:
+        cells = [c.get_text(strip=True) for c in row.find_all('td')]
+        parsed[parse_date_to_standard(cells[0])] = {col: convert(cells[i + 1]) for i, (col, convert) in enumerate(zip(mapping, converters))}
+    return parsed
+
+def benchmark(rows=5000, repeat=3):
+    """Times the BeautifulSoup and lxml paths on synthetic backfill tables and prints the speedup."""
+    import timeit
+    for source in SOURCE_FIELDS:
+        html = build_synthetic_table(source, rows)
+        assert parse_with_beautifulsoup(html, source, 'TODTOM') == parse_table(html, source, 'TODTOM')
+        bs_time = min(timeit.repeat(lambda: parse_with_beautifulsoup(html, source, 'TODTOM'), number=1, repeat=repeat))
+        lxml_time = min(timeit.repeat(lambda: parse_table(html, source, 'TODTOM'), number=1, repeat=repeat))
+        print(f"{source:<16} {rows} rows   BeautifulSoup {bs_time * 1000:8.1f} ms   lxml {lxml_time * 1000:8.1f} ms   "
+              f"speedup {bs_time / lxml_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the lxml table parser against BeautifulSoup")
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The RUSSD modules are flat scripts at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def scratch_state(tmp_path, monkeypatch):
+    """Runs every test in a temporary directory, so .russd_state and output files never touch the checkout."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RUSSD_NO_CACHE', '1')
+    import checkpoint, orchastrator
+    monkeypatch.setattr(orchastrator, 'DEBUG_MODE', False)
+    monkeypatch.setattr(checkpoint, '_checkpoint', None)  # A fresh checkpoint in each test's .russd_state
+    return tmp_path
@@ -0,0 +1,21 @@
+"""
+The fixtures.py benchmark stages as pytest-benchmark tests; skipped without the plugin
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import fixtures
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BACKFILL_ROWS = 500  # Smaller than the CLI default, so the suite stays quick
+
+STAGES = fixtures.build_stages(FIXTURE_DIR, BACKFILL_ROWS)
+
+
+@pytest.mark.parametrize('stage', sorted(STAGES))
+def test_stage(benchmark, stage):
+    benchmark(fixtures._quiet(STAGES[stage]))
@@ -0,0 +1,62 @@
+"""
+Timeouts and requeueing in browser_pool.py, with fake drivers instead of Chrome
+"""
+
+import itertools
+import threading
+
+import browser_pool
+from config import DATA_SOURCES
+
+TRADE_DATE = '2026-10-15'
+STUCK = ('swap_info_sell', 'TODTOM', 'USD')
+
+
+class FakeDriver:
+    """Stands in for a WebDriver; quitting it makes a hung page call fail, as a real session would."""
+
+    def __init__(self, number):
+        self.number, self.quit_called = number, threading.Event()
+
+    def quit(self):
+        self.quit_called.set()
+
+
+def test_timed_out_task_is_requeued_on_a_new_driver(monkeypatch):
+    numbers = itertools.count()
+    drivers, calls = [], []
+
+    def factory():
+        drivers.append(FakeDriver(next(numbers))); return drivers[-1]
+
+    def collect_settlement(driver, source, settlement, currency):
+        calls.append(((source, settlement, currency), driver.number))
+        if (source, settlement, currency) == STUCK and driver.number == 0:
+            driver.quit_called.wait()  # Hangs until the pool gives up on it
+            raise RuntimeError('invalid session id')
+        return {'trade_date': TRADE_DATE, f'{source} {settlement}': driver.number}
+
+    monkeypatch.setattr(browser_pool, 'collect_settlement', collect_settlement)
+    data_row = browser_pool.run_parallel_collection(['USD'], workers=2, task_timeout=0.2, factory=factory)
+
+    tasks = [(source, settlement, 'USD') for source, info in DATA_SOURCES.items() for settlement in info['settlements']]
+    assert all(data_row[f'{source} {settlement}'] is not None for source, settlement, _ in tasks)
+    stuck_runs = [number for task, number in calls if task == STUCK]
+    assert stuck_runs[0] == 0 and stuck_runs[-1] != 0  # Ran again, on another driver
+    assert data_row['swap_info_sell TODTOM'] == stuck_runs[-1]
+    assert drivers[0].quit_called.is_set()
+    assert len(drivers) <= 3  # Never more than `workers` drivers alive at once
+
+
+def test_task_is_given_up_after_its_requeues(monkeypatch):
+    def collect_settlement(driver, source, settlement, currency):
+        if (source, settlement, currency) == STUCK:
+            driver.quit_called.wait(); raise RuntimeError('invalid session id')
+        return {'trade_date': TRADE_DATE}
+
+    numbers = itertools.count()
+    monkeypatch.setattr(browser_pool, 'collect_settlement', collect_settlement)
+    monkeypatch.setattr(browser_pool, 'TASK_REQUEUES', 1)
+    data_row = browser_pool.run_parallel_collection(['USD'], workers=2, task_timeout=0.2,
+                                                    factory=lambda: FakeDriver(next(numbers)))
+    assert data_row is not None and all(value is None for col, value in data_row.items() if col in 'FGHIJKL')
@@ -0,0 +1,47 @@
+"""
+Business days of cbr_calendar.py: decreed transfers and the fixed-holiday fallback
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from cbr_calendar import business_days, is_business_day, next_business_day
+
+
+@pytest.mark.parametrize('day, working', [
+    ('2024-12-28', True),    # Saturday worked in exchange for 2024-12-30
+    ('2024-12-30', False),   # Monday off by decree
+    ('2025-01-08', False),   # New Year holidays
+    ('2025-01-09', True),
+    ('2025-11-01', True),    # Saturday worked in exchange for 2025-11-03
+    ('2025-11-03', False),
+    ('2026-03-09', False),   # 8 March falls on a Sunday and moves to Monday
+    ('2026-10-15', True),
+    ('2026-10-17', False),   # An ordinary Saturday
+])
+def test_decreed_years(day, working):
+    assert is_business_day(day) is working
+
+
+@pytest.mark.parametrize('day, working', [
+    ('2027-01-07', False),   # Fixed holidays of the Labour Code
+    ('2027-03-08', False),
+    ('2027-11-04', False),
+    ('2027-01-11', True),
+    ('2027-03-09', True),    # No decree for 2027 yet, so nothing is transferred
+    ('2027-01-09', False),   # Weekends stay off
+])
+def test_fallback_without_a_decree(day, working):
+    assert is_business_day(day) is working
+
+
+def test_next_business_day_skips_holidays():
+    assert next_business_day('2024-12-27') == date(2024, 12, 28)
+    assert next_business_day('2024-12-28') == date(2025, 1, 9)
+    assert next_business_day(datetime(2027, 1, 6, 18)) == date(2027, 1, 11)
+
+
+def test_business_days_in_range():
+    assert business_days('2024-12-27', '2025-01-09') == [date(2024, 12, 27), date(2024, 12, 28), date(2025, 1, 9)]
+    assert business_days(date(2026, 10, 17), date(2026, 10, 18)) == []
@@ -0,0 +1,55 @@
+"""
+Column converters of cell_conversion.py against the scalar parse_* functions
+"""
+
+import math
+
+import pytest
+
+import cell_conversion
+from orchastrator import parse_date_to_integer, parse_date_to_standard, parse_number
+from table_parser import build_synthetic_table, parse_typed_rows
+
+NUMBER_CELLS = ['', None, 'N/A', '-', '1 234,5', '1,234.56', '-0.25', '+3', '.5', '5.', '1e3', 'inf', 'nan',
+                '1_000', '٣٫٥', '١٢٣', '１２', '−1', '1.2.3', 'abc', '0x10', ' 7 ', '12 345 678.9', 'N/A ', 42]
+DATE_CELLS = ['', None, 'N/A', '-', '15.10.2026', '29.02.2024', '29.02.2023', '31.04.2025', '32.01.2024', '00.01.2024',
+              '01.13.2024', '1.2.2024', '01.02.24', '01-02-2024', '2024-02-01', '15.10.0999', '15.10.1000',
+              '٠١.٠٢.٢٠٢٤', '01.02.２０２４', '15.10.2026 ', ' 15.10.2026', '15/10/2026', 'ab.cd.efgh']
+
+
+def same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+def assert_matches(column, scalar, cells):
+    values, errors = column(cells)
+    expected = [scalar(c) for c in cells]
+    assert len(values) == len(expected) and all(same(v, e) for v, e in zip(values, expected)), \
+        [(c, v, e) for c, v, e in zip(cells, values, expected) if not same(v, e)]
+    # Exactly the non-empty cells the scalar parser rejected are errors
+    assert errors.tolist() == [e is None and not cell_conversion.blank(scalar, c) for c, e in zip(cells, expected)]
+
+
+def test_numbers_match_parse_number():
+    assert_matches(cell_conversion.numbers, parse_number, NUMBER_CELLS)
+
+
+@pytest.mark.parametrize('column, scalar', [(cell_conversion.dates_to_integer, parse_date_to_integer),
+                                            (cell_conversion.dates_to_standard, parse_date_to_standard)])
+def test_dates_match_parse_date(column, scalar):
+    assert_matches(column, scalar, DATE_CELLS)
+
+
+def test_convert_column_returns_the_error_mask():
+    values, errors = cell_conversion.convert_column(parse_number, ['1.5', 'abc', '', 'N/A', '2'])
+    assert values == [1.5, None, None, None, 2.0]
+    assert errors.tolist() == [False, True, False, False, False]
+
+
+def test_table_parser_reports_bad_cells_on_both_paths():
+    for rows in (5, 100):  # Below and above BATCH_MIN_ROWS
+        html = build_synthetic_table('swap_info_sell', rows)
+        html = html.replace('<td>0.25</td>', '<td>abc</td>', 1).replace('<td>01.01.2000</td>', '<td>31.02.2000</td>', 1)
+        errors = []
+        typed = parse_typed_rows(html, 'swap_info_sell', errors)
+        assert errors == [(0, 0, '31.02.2000'), (0, 4, 'abc')]
+        assert typed[0][0] is None and typed[0][1][3] is None
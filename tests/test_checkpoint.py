@@ -0,0 +1,117 @@
+"""
+Checkpoint, retry backoff and circuit breaker of checkpoint.py
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+import async_pipeline
+import checkpoint
+import orchastrator
+from checkpoint import BREAKER_COOLDOWN, BREAKER_THRESHOLD, RETRY_ATTEMPTS, Checkpoint, all_cells, collect_with_retry
+
+TRADE_DATE = '2026-10-15'
+
+
+@pytest.fixture
+def cp(tmp_path):
+    return Checkpoint(str(tmp_path / 'checkpoint.json'))
+
+
+class Collector:
+    """attempt_fn that fails `failures` times (None or an exception), then returns `result`."""
+
+    def __init__(self, failures, result=None, error=None):
+        self.failures, self.result, self.error, self.attempts = failures, result, error, []
+
+    def __call__(self, attempt):
+        self.attempts.append(attempt)
+        if len(self.attempts) <= self.failures:
+            if self.error: raise self.error
+            return None
+        return self.result
+
+
+def test_record_and_missing(cp):
+    cells = all_cells(['USD'])
+    assert cp.missing(['USD']) == cells
+    cp.record(TRADE_DATE, 'swapinfosellvol', 'TODTOM', 'USD', {'B': 1.0, 'C': 2.0})
+    cp.record(TRADE_DATE, 'swapinfosellvol', 'TOMSPT', 'USD', {})  # An empty table counts as missing
+    assert cp.missing(['USD']) == cells[1:]
+    assert cp.data_row(['USD'])['B'] == 1.0 and cp.data_row(['USD'])['D'] is None
+
+    reloaded = Checkpoint(cp.path)
+    assert reloaded.trade_date == TRADE_DATE and reloaded.missing(['USD']) == cells[1:]
+
+    cp.record('2026-10-16', 'swap_info_sell', 'TODTOM', 'USD', {'F': 20261016})  # A new trade date starts over
+    assert cp.get(TRADE_DATE, 'swapinfosellvol', 'TODTOM', 'USD') is None
+    assert len(cp.missing(['USD'])) == len(cells) - 1
+
+
+def test_retry_backs_off_then_succeeds(cp):
+    sleeps = []
+    collector = Collector(2, result={'B': 1.0}, error=RuntimeError('stale element'))
+    assert collect_with_retry(cp, 'src', 'cell', collector, sleep=sleeps.append) == {'B': 1.0}
+    assert collector.attempts == [1, 2, 3]
+    assert len(sleeps) == 2 and 0 <= sleeps[0] <= checkpoint.RETRY_BASE_DELAY and 0 <= sleeps[1] <= 2 * checkpoint.RETRY_BASE_DELAY
+    assert cp.breaker_allows('src') and 'src' not in cp.state['breakers']
+
+
+def test_empty_table_is_a_result_not_a_failure(cp):
+    collector = Collector(0, result={})
+    assert collect_with_retry(cp, 'src', 'cell', collector, sleep=lambda s: None) == {}
+    assert collector.attempts == [1]
+
+
+def test_breaker_counts_cells_not_tries(cp):
+    for _ in range(BREAKER_THRESHOLD - 1):
+        collector = Collector(RETRY_ATTEMPTS)
+        assert collect_with_retry(cp, 'src', 'cell', collector, sleep=lambda s: None) is None
+        assert collector.attempts == list(range(1, RETRY_ATTEMPTS + 1))
+    assert cp.breaker_allows('src')
+
+    collect_with_retry(cp, 'src', 'cell', Collector(RETRY_ATTEMPTS), sleep=lambda s: None)
+    assert not cp.breaker_allows('src')
+    skipped = Collector(0, result={'B': 1.0})
+    assert collect_with_retry(cp, 'src', 'cell', skipped, sleep=lambda s: None) is None
+    assert skipped.attempts == []
+    assert cp.breaker_allows('other')
+
+    # Half-open after the cooldown; one success closes it
+    opened_at = cp.state['breakers']['src']['opened_at']
+    assert cp.breaker_allows('src', now=opened_at + BREAKER_COOLDOWN)
+    cp.breaker_success('src')
+    assert cp.breaker_allows('src')
+
+
+def test_cancelled_cell_stops_without_counting(cp):
+    cancelled = threading.Event()
+    def abandoned(attempt):
+        cancelled.set(); raise RuntimeError('invalid session id')  # The pool quit the driver mid-try
+    assert collect_with_retry(cp, 'src', 'cell', abandoned, sleep=lambda s: None, cancelled=cancelled) is None
+    assert 'src' not in cp.state['breakers']
+    skipped = Collector(0, result={'B': 1.0})
+    assert collect_with_retry(cp, 'src', 'cell', skipped, sleep=lambda s: None, cancelled=cancelled) is None
+    assert skipped.attempts == []
+
+
+def test_page_collection_ignores_the_checkpoint_without_resume(monkeypatch):
+    checkpoint.get_checkpoint().record(TRADE_DATE, 'swapinfosellvol', 'TODTOM', 'USD', {'trade_date': TRADE_DATE, 'B': -1.0, 'C': -1.0})
+    fresh = {'TODTOM': {'trade_date': TRADE_DATE, 'B': 1.0, 'C': 2.0}, 'TOMSPT': {'trade_date': TRADE_DATE, 'D': 3.0, 'E': 4.0}}
+    selected = {}
+    monkeypatch.setattr(orchastrator, 'get_max_available_date', lambda driver: '15.10.2026')
+    monkeypatch.setattr(orchastrator, 'set_currency', lambda driver, currency: True)
+    monkeypatch.setattr(orchastrator, 'set_date_to_latest', lambda driver: True)
+    monkeypatch.setattr(orchastrator, 'set_settlement', lambda driver, settlement: selected.update(now=settlement) or True)
+    monkeypatch.setattr(orchastrator, 'extract_table_data', lambda driver, *args: fresh[selected['now']])
+    data = orchastrator.collect_currency_on_page(None, 'swapinfosellvol', 'USD')
+    assert data == {'trade_date': TRADE_DATE, 'B': 1.0, 'C': 2.0, 'D': 3.0, 'E': 4.0}
+
+
+def test_async_daily_passes_resume_through(monkeypatch):
+    calls = []
+    monkeypatch.setattr(async_pipeline, 'run_collection', lambda *args: calls.append(args) or {})
+    assert asyncio.run(async_pipeline.run_daily('selenium', 1, ['USD'], resume=True)) == []
+    assert calls == [(['USD'], 'selenium', 1, True)]
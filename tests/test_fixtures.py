@@ -0,0 +1,62 @@
+"""
+Replays the synthetic CBR tables in tests/fixtures through the parser and export path
+"""
+
+import os
+
+import openpyxl
+
+import fixtures
+from config import get_excel_headers
+from orchastrator import export_rows_to_excel
+from table_parser import parse_table
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# The first (latest) row of every USD fixture, as one data row
+LATEST_ROW = {
+    'trade_date': '2026-10-15',
+    'B': 1250.4, 'C': 101532.58, 'D': 312.75, 'E': 25401.55,
+    'F': 20261015, 'G': 20261016, 'H': 16.5, 'I': 4.25, 'J': 81.2345, 'K': 0.0312, 'L': 5.0,
+    'M': 20261016, 'N': 20261019, 'O': 16.5, 'P': 4.25, 'Q': 81.2655, 'R': 0.0935, 'S': 5.0,
+}
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f: return f.read()
+
+
+def test_manifest_lists_every_fixture():
+    manifest = fixtures.load_manifest(FIXTURE_DIR)
+    assert sorted(manifest) == sorted(n for n in os.listdir(FIXTURE_DIR) if n.endswith('.html'))
+    assert {(e['source'], e['settlement']) for e in manifest.values()} == {
+        ('swapinfosellvol', 'TODTOM'), ('swapinfosellvol', 'TOMSPT'),
+        ('swap_info_sell', 'TODTOM'), ('swap_info_sell', 'TOMSPT')}
+
+
+def test_parse_table_maps_every_row():
+    volumes = parse_table(read_fixture('swapinfosellvol__TOMSPT__USD.html'), 'swapinfosellvol', 'TOMSPT', 'USD')
+    assert volumes == {'2026-10-15': {'D': 312.75, 'E': 25401.55},
+                       '2026-10-14': {'D': 0.0, 'E': 0.0},
+                       '2026-10-13': {'D': 145.1, 'E': 11776.32}}
+
+    terms = parse_table(read_fixture('swap_info_sell__TODTOM__USD.html'), 'swap_info_sell', 'TODTOM', 'USD')
+    assert list(terms) == ['2026-10-15', '2026-10-14', '2026-10-13']
+    assert terms['2026-10-13'] == {'F': 20261013, 'G': 20261014, 'H': 16.5, 'I': 4.25, 'J': 81.472, 'K': 0.0313, 'L': 5.0}
+
+
+def test_replay_builds_the_latest_row():
+    assert fixtures.replay(('USD',), FIXTURE_DIR) == LATEST_ROW
+
+
+def test_export_writes_codes_and_values(tmp_path):
+    headers = get_excel_headers(['USD'])
+    path = export_rows_to_excel([LATEST_ROW], str(tmp_path / 'data.xlsx'), headers)
+    rows = list(openpyxl.load_workbook(path).active.iter_rows(values_only=True))
+    assert len(rows) == 3  # Code row, description row, one data row
+    assert rows[0][1:] == tuple(info['code'] for info in headers.values())
+    assert rows[2] == ('2026-10-15', *(LATEST_ROW[col] for col in headers))
+
+
+def test_replay_pipeline_packages_data_and_metadata():
+    assert fixtures.replay_pipeline(('USD',), FIXTURE_DIR) == ['RUSSD_DATA_20261015.xlsx', 'RUSSD_META_20261015.xls']
@@ -0,0 +1,118 @@
+"""
+Runs the HTTP engine against a local http.server that serves saved CBR pages
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import http_collector
+import orchastrator
+from config import CURRENCIES, DATA_SOURCES, QUERY_PARAMS, SETTLEMENTS, get_data_columns
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MAX_DATE = '15.10.2026'
+
+# An unfiltered swap_info page: the datepicker carries data-max-date, the table shows the latest rows
+PAGE = """<html><body>
+<div class="filter"><button class="filter_title">Settlement</button></div>
+<div class="datepicker-filter"{max_date} data-min-date="01.01.2009">
+  <button class="datepicker-filter_button"></button>
+</div>
+{table}
+</body></html>"""
+EMPTY_TABLE = '<table class="data"><tr><th>Date</th></tr></table>'
+
+
+class StubCBR(BaseHTTPRequestHandler):
+    """Answers like cbr.ru: the page without a query, the filtered table with one."""
+    max_date = MAX_DATE
+    empty = set()  # (source, settlement) tables served without data rows
+    queries = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        source = url.path.strip('/')
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.queries.append((source, query))
+        settlement = 'TODTOM'
+        if query:
+            settlement = next(s for s, info in SETTLEMENTS.items() if info['value'] == query[QUERY_PARAMS['settlement']])
+            currency = next(c for c, info in CURRENCIES.items() if info['value'] == query[QUERY_PARAMS['currency']])
+        else:
+            currency = 'USD'
+        if (source, settlement) in self.empty:
+            table = EMPTY_TABLE
+        else:
+            with open(os.path.join(FIXTURE_DIR, f"{source}__{settlement}__{currency}.html"), encoding='utf-8') as f:
+                table = f.read()
+        max_date = f' data-max-date="{self.max_date}"' if self.max_date else ''
+        body = PAGE.format(max_date=max_date, table=table).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cbr(monkeypatch):
+    """Starts the stub server; returns DATA_SOURCES pointed at it."""
+    monkeypatch.setattr(StubCBR, 'max_date', MAX_DATE)
+    monkeypatch.setattr(StubCBR, 'empty', set())
+    monkeypatch.setattr(StubCBR, 'queries', [])
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubCBR)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield {source: dict(info, url=f"{base}/{source}/") for source, info in DATA_SOURCES.items()}
+    server.shutdown(); server.server_close()
+
+
+def test_collects_the_max_date_table(cbr):
+    with http_collector.create_session() as session:
+        data = http_collector.collect_data_from_source_http(session, 'swap_info_sell', 'USD', cbr)
+    assert data == {'trade_date': '2026-10-15',
+                    'F': 20261015, 'G': 20261016, 'H': 16.5, 'I': 4.25, 'J': 81.2345, 'K': 0.0312, 'L': 5.0,
+                    'M': 20261016, 'N': 20261019, 'O': 16.5, 'P': 4.25, 'Q': 81.2655, 'R': 0.0935, 'S': 5.0}
+    page, *tables = StubCBR.queries
+    assert page == ('swap_info_sell', {})
+    # Both settlements are queried for exactly the advertised data-max-date
+    assert [(q[QUERY_PARAMS['settlement']], q[QUERY_PARAMS['date_from']], q[QUERY_PARAMS['date_to']])
+            for _, q in tables] == [('0', MAX_DATE, MAX_DATE), ('1', MAX_DATE, MAX_DATE)]
+
+
+def test_missing_max_date_halts_the_source(cbr):
+    StubCBR.max_date = None
+    with http_collector.create_session() as session:
+        assert http_collector.collect_data_from_source_http(session, 'swap_info_sell', 'USD', cbr) is None
+    assert StubCBR.queries == [('swap_info_sell', {})]  # No table is requested without a date
+
+
+def run_http_collection_against(cbr, monkeypatch):
+    """Points run_collection's HTTP engine at the stub and replaces the Selenium engine with a recorder."""
+    run_http_collection = http_collector.run_http_collection
+    monkeypatch.setattr(http_collector, 'run_http_collection', lambda currencies: run_http_collection(currencies, cbr))
+    selenium_runs = []
+    monkeypatch.setattr(orchastrator, 'run_full_collection', lambda currencies: selenium_runs.append(currencies) or 'selenium')
+    return selenium_runs
+
+
+def test_complete_http_result_skips_selenium(cbr, monkeypatch):
+    selenium_runs = run_http_collection_against(cbr, monkeypatch)
+    data_row = orchastrator.run_collection(['USD'], engine='http', workers=1)
+    assert selenium_runs == []
+    assert data_row['trade_date'] == '2026-10-15'
+    assert all(data_row[col] is not None for col in get_data_columns(['USD']))
+
+
+def test_incomplete_http_result_falls_back_to_selenium(cbr, monkeypatch):
+    StubCBR.empty = {('swapinfosellvol', 'TOMSPT')}
+    selenium_runs = run_http_collection_against(cbr, monkeypatch)
+    assert orchastrator.run_collection(['USD'], engine='http', workers=1) == 'selenium'
+    assert selenium_runs == [['USD']]
@@ -0,0 +1,31 @@
+"""
+Byte-for-byte reproducibility of the in-memory package in package_creator.py
+"""
+
+import os
+import time
+import zipfile
+
+import fixtures
+from config import EXCEL_HEADERS
+from package_creator import create_package_from_rows
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def build(row, output_dir):
+    os.makedirs(output_dir)
+    with open(create_package_from_rows([row], row['trade_date'], EXCEL_HEADERS, output_dir=output_dir), 'rb') as f:
+        return f.read()
+
+
+def test_same_row_builds_identical_bytes(tmp_path):
+    row = fixtures.replay(('USD',), FIXTURE_DIR)
+    first = build(row, tmp_path / 'first')
+    time.sleep(2.1)  # ZIP times have two-second resolution; a leaked wall-clock time would now differ
+    assert build(row, tmp_path / 'second') == first
+
+    with zipfile.ZipFile(tmp_path / 'first' / 'RUSSD_20261015.ZIP') as zf:
+        assert {info.date_time for info in zf.infolist()} == {(2026, 10, 15, 0, 0, 0)}
+    row['H'] += 0.01
+    assert build(row, tmp_path / 'changed') != first
@@ -0,0 +1,89 @@
+"""
+TTL selection, LRU eviction and orphan sweep of response_cache.py
+"""
+
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+FETCHED = datetime(2026, 10, 15, 12).timestamp()
+ROWS = [['15.10.2026', 1.0]]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'cache'), ttl=3600, latest_ttl=60)
+
+def age(path, seconds):
+    """Moves a file's mtime `seconds` into the past."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+def index_files(cache):
+    return sorted(os.listdir(cache.index_dir))
+
+
+@pytest.mark.parametrize('date, ttl', [('15.10.2026', 3600),              # A trade date never changes
+                                       ('01.10.2026-14.10.2026', 3600),   # Ended before it was fetched
+                                       ('01.10.2026-15.10.2026', 60),     # Reaches the fetch date
+                                       ('01.10.2026-31.12.2026', 60),     # Reaches past it
+                                       ('not-a-date', 3600)])
+def test_ttl_for_ranges_that_had_not_ended(cache, date, ttl):
+    assert cache.ttl_for(date, FETCHED) == ttl
+
+
+def test_get_drops_expired_entries(cache, monkeypatch):
+    cache.put('swap_info_sell', 'USD', 'TODTOM', '15.10.2026', '<table>1</table>', ROWS)
+    cache.put('swap_info_sell', 'USD', 'TODTOM', '01.10.2026-31.12.2026', '<table>2</table>', ROWS)
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '15.10.2026')['rows'] == ROWS
+
+    later = time.time() + 120
+    monkeypatch.setattr(response_cache.time, 'time', lambda: later)
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '01.10.2026-31.12.2026') is None
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '15.10.2026')['rows'] == ROWS
+    assert len(index_files(cache)) == 1
+
+
+def test_eviction_drops_least_recently_used_first(cache):
+    for i, date in enumerate(['13.10.2026', '14.10.2026', '15.10.2026']):
+        cache.put('swap_info_sell', 'USD', 'TODTOM', date, f'<table>{i}</table>', ROWS)
+        age(cache._index_path(cache.make_key('swap_info_sell', 'USD', 'TODTOM', date)), 300 - i * 100)
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '13.10.2026')
+    sizes = [os.path.getsize(os.path.join(cache.index_dir, name)) for name in index_files(cache)]
+    blob_size = os.path.getsize(os.path.join(cache.blob_dir, os.listdir(cache.blob_dir)[0]))
+    cache.max_bytes = sum(sizes) + 3 * blob_size - 1  # One byte too many
+    cache.evict()
+
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '14.10.2026') is None
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '13.10.2026')
+    assert cache.get('swap_info_sell', 'USD', 'TODTOM', '15.10.2026')
+
+
+def test_orphaned_blobs_survive_the_grace_period(cache):
+    cache.put('swap_info_sell', 'USD', 'TODTOM', '15.10.2026', '<table>kept</table>', ROWS)
+    orphan = cache._blob_path('0' * 64)
+    with open(orphan, 'w', encoding='utf-8') as f: f.write('<table>in flight</table>')
+    cache.evict()
+    assert os.path.exists(orphan)  # Another process may be about to write its index entry
+
+    age(orphan, response_cache.ORPHAN_GRACE + 1)
+    cache.evict()
+    assert not os.path.exists(orphan)
+    assert len(os.listdir(cache.blob_dir)) == 1  # The referenced blob stays
+
+
+def test_shared_blob_outlives_one_of_its_entries(cache):
+    for date in ['14.10.2026', '15.10.2026']:
+        cache.put('swap_info_sell', 'USD', 'TODTOM', date, '<table>same</table>', ROWS)
+    assert len(os.listdir(cache.blob_dir)) == 1
+    os.remove(cache._index_path(cache.make_key('swap_info_sell', 'USD', 'TODTOM', '14.10.2026')))
+    (blob,) = os.listdir(cache.blob_dir)
+    age(os.path.join(cache.blob_dir, blob), response_cache.ORPHAN_GRACE + 1)
+    cache.evict()
+    assert os.listdir(cache.blob_dir) == [blob]
@@ -0,0 +1,84 @@
+"""
+Per-date retry backoff of scheduler.py, replayed with a fake clock and sleep
+"""
+
+from datetime import datetime
+
+import pytest
+
+import orchastrator
+import scheduler
+from run_state import load_state, update_state
+from scheduler import CBR_TIMEZONE, MAX_PIPELINE_ATTEMPTS, RETRY_AFTER_FAILURE, pipeline_wait, record_pipeline_failure
+
+NOON = datetime(2026, 10, 15, 12, tzinfo=CBR_TIMEZONE).timestamp()  # Inside the default window on a Thursday
+
+
+class FakeTime:
+    """clock and sleep for run_scheduler: sleeping moves the clock forward."""
+
+    def __init__(self, now):
+        self.now, self.sleeps = now, []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds); self.now += seconds
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    """Stubs the probe and the pipeline; returns (probed dates, pipeline results, pipeline calls)."""
+    available, results, calls = [], [], []
+    monkeypatch.setattr(scheduler, 'fetch_max_available_date', lambda: available.pop(0) if len(available) > 1 else available[0])
+    monkeypatch.setattr(scheduler, 'latest_packaged_date', lambda output_dir: '2026-10-14')
+    monkeypatch.setattr(orchastrator, 'run_pipeline', lambda *args: calls.append(args) or results.pop(0))
+    return available, results, calls
+
+
+def test_failure_backoff_doubles_per_date():
+    assert [record_pipeline_failure('2026-10-15', NOON) for _ in range(MAX_PIPELINE_ATTEMPTS - 1)] == \
+        [RETRY_AFTER_FAILURE * 2 ** n for n in range(MAX_PIPELINE_ATTEMPTS - 1)]
+    assert pipeline_wait('2026-10-15', NOON + 60) == 8 * RETRY_AFTER_FAILURE - 60
+    # A newer date starts its own count and is not held back by the older one
+    assert pipeline_wait('2026-10-16', NOON) == 0
+    assert record_pipeline_failure('2026-10-16', NOON) == RETRY_AFTER_FAILURE
+
+
+def test_gives_up_after_max_attempts():
+    for _ in range(MAX_PIPELINE_ATTEMPTS - 1): record_pipeline_failure('2026-10-15', NOON)
+    assert record_pipeline_failure('2026-10-15', NOON) is None
+    state = load_state()
+    assert state['failed_dates'] == ['2026-10-15'] and state['pipeline_failure'] is None
+    assert pipeline_wait('2026-10-15', NOON) is None
+
+
+def test_scheduler_retries_then_gives_up(daemon):
+    available, results, calls = daemon
+    available.append('2026-10-15'); results.extend([False] * MAX_PIPELINE_ATTEMPTS)
+    fake = FakeTime(NOON)
+    assert scheduler.run_scheduler(max_runs=MAX_PIPELINE_ATTEMPTS, clock=fake.clock, sleep=fake.sleep) == 0
+    assert len(calls) == MAX_PIPELINE_ATTEMPTS
+    assert fake.sleeps == [600, 1200, 2400, 4800]  # Nothing runs between the retries
+    assert load_state()['failed_dates'] == ['2026-10-15']
+
+
+def test_failed_date_is_left_alone_until_a_newer_one(daemon):
+    available, results, calls = daemon
+    update_state(failed_dates=['2026-10-15'], last_available_date='2026-10-15')
+    available.extend(['2026-10-15', '2026-10-15', '2026-10-16']); results.append(True)
+    fake = FakeTime(NOON)
+    assert scheduler.run_scheduler(max_runs=1, clock=fake.clock, sleep=fake.sleep) == 1
+    assert len(calls) == 1 and len(fake.sleeps) == 2  # Two probes of the failed date, then the run
+    assert load_state()['last_available_date'] == '2026-10-16'
+
+
+def test_success_clears_the_failure_count(daemon):
+    available, results, calls = daemon
+    available.extend(['2026-10-15', '2026-10-15']); results.extend([False, True])
+    fake = FakeTime(NOON)
+    assert scheduler.run_scheduler(max_runs=2, clock=fake.clock, sleep=fake.sleep) == 1
+    # The failed run sleeps exactly its retry delay, then the next probe runs the pipeline again
+    assert fake.sleeps == [RETRY_AFTER_FAILURE] and len(calls) == 2
+    assert load_state()['pipeline_failure'] is None
@@ -0,0 +1,106 @@
+"""
+Package gate and vectorized checks of validation.py
+"""
+
+import io
+import os
+import zipfile
+from datetime import date, timedelta
+
+import numpy as np
+import openpyxl
+import pytest
+
+import fixtures
+import validation
+from config import CURRENCY_COLUMNS, EXCEL_HEADERS, get_excel_headers
+from package_creator import create_package_from_rows
+from timeseries_store import TimeSeriesStore
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def usd_row():
+    """A complete, consistent USD row for 2026-10-15 replayed from the fixtures."""
+    return fixtures.replay(('USD',), FIXTURE_DIR)
+
+def as_currency(row, currency):
+    """The USD row's values moved to the matrix columns of `currency`."""
+    moved = dict(zip(CURRENCY_COLUMNS[currency], (row[col] for col in CURRENCY_COLUMNS['USD'])))
+    return {'trade_date': row['trade_date'], **moved}
+
+def with_date(row, trade_date):
+    """The row for another trade date, with its value dates shifted along."""
+    shift = (date.fromisoformat(trade_date) - date.fromisoformat(row['trade_date'])).days
+    moved = {'trade_date': trade_date}
+    for col, value in row.items():
+        if col != 'trade_date' and EXCEL_HEADERS.get(col, {}).get('type') == 'date':
+            value = int((date(value // 10000, value // 100 % 100, value % 100) + timedelta(days=shift)).strftime('%Y%m%d'))
+        moved.setdefault(col, value)
+    return moved
+
+
+def test_clean_row_passes(usd_row):
+    assert validation.gate_rows([usd_row], EXCEL_HEADERS) == [usd_row]
+
+
+def test_missing_required_column_fails(usd_row):
+    usd_row['H'] = None
+    assert validation.gate_rows([usd_row], EXCEL_HEADERS) == []
+
+
+def test_no_validation_packages_anyway(usd_row, monkeypatch):
+    monkeypatch.setenv('RUSSD_NO_VALIDATION', '1')
+    usd_row['H'] = None
+    assert validation.gate_rows([usd_row], EXCEL_HEADERS) == [usd_row]
+
+
+def test_inconsistent_swap_points_fail(usd_row):
+    usd_row['K'] = 1.5
+    assert validation.gate_rows([usd_row], EXCEL_HEADERS) == []
+
+
+def test_volume_outlier_is_only_a_warning():
+    headers = {col: EXCEL_HEADERS[col] for col in 'BCDE'}  # The volume columns alone
+    trade_dates = [str(np.datetime64('2026-01-01') + i) for i in range(40)]
+    rng = np.random.default_rng(0)
+    matrix = 1000 * np.exp(rng.normal(0, 0.1, (40, 4)))
+    matrix[-1, 0] = 1e9
+    issues = validation.validate_matrix(trade_dates, matrix, headers)
+    assert [(i['trade_date'], i['check'], i['severity'], i['column']) for i in issues] == \
+        [(trade_dates[-1], 'volume_outlier', 'warning', 'B')]
+
+
+def test_trailing_zscores_need_history():
+    values = np.array([1.0, 2.0, 3.0, 2.0, 1.0, np.nan, 2.0, 10.0])
+    z = validation.trailing_zscores(values, window=4, min_history=3)
+    assert np.isnan(z[:3]).all() and np.isnan(z[5])
+    mean, std = np.mean([3.0, 2.0, 1.0, 2.0]), np.std([3.0, 2.0, 1.0, 2.0])
+    assert z[7] == pytest.approx((10.0 - mean) / std)
+
+
+def test_new_rows_between_stored_dates_must_be_complete(usd_row):
+    # Stored history on both sides of the new date, one stored date incomplete
+    before, after = with_date(usd_row, '2026-10-14'), with_date(usd_row, '2026-10-16')
+    after['C'] = None
+    with TimeSeriesStore() as store: store.upsert_rows([before, after])
+    assert validation.gate_rows([usd_row], EXCEL_HEADERS) == [usd_row]
+    usd_row['H'] = None
+    assert validation.gate_rows([usd_row], EXCEL_HEADERS) == []
+
+
+@pytest.mark.parametrize('currencies', [['EUR'], ['USD', 'EUR'], ['CNY']])
+def test_currency_subset_is_gated_and_packaged(usd_row, currencies):
+    row = {'trade_date': usd_row['trade_date']}
+    for currency in currencies: row.update(as_currency(usd_row, currency))
+    headers = get_excel_headers(currencies)
+    assert len(headers) == 18 * len(currencies)
+    assert validation.gate_rows([row], headers) == [row]
+
+    path = create_package_from_rows([row], row['trade_date'], headers)
+    with zipfile.ZipFile(path) as zf:
+        data = openpyxl.load_workbook(io.BytesIO(zf.read('RUSSD_DATA_20261015.xlsx')))
+    codes, _, values = data.active.iter_rows(values_only=True)
+    assert codes[1:] == tuple(info['code'] for info in headers.values())
+    assert None not in values[1:]
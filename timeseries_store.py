@@ -0,0 +1,147 @@
+"""
+RUSSD Time-Series Store
+Local SQLite history of every collected value, indexed by trade date and series code
+"""
+
+import os
+import sqlite3
+
+from config import STATE_DIR, EXCEL_HEADERS
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+STORE_PATH = os.path.join(STATE_DIR, 'russd.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    trade_date TEXT NOT NULL,      -- YYYY-MM-DD
+    code       TEXT NOT NULL,      -- EXCEL_HEADERS[*]['code']
+    value      NUMERIC,
+    loaded_at  TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now')),
+    PRIMARY KEY (trade_date, code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_code_date ON observations (code, trade_date);
+"""
+
+UPSERT = """
+INSERT INTO observations (trade_date, code, value) VALUES (?, ?, ?)
+ON CONFLICT (trade_date, code) DO UPDATE SET
+    value = excluded.value, loaded_at = excluded.loaded_at
+WHERE observations.value IS NOT excluded.value
+"""
+
+
+class TimeSeriesStore:
+    """
+    Rows are never deleted; re-loading the same values is a no-op and a changed
+    value replaces the stored one. Missing (None) values never overwrite data.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def upsert_rows(self, data_rows, headers=EXCEL_HEADERS):
+        """
+        Loads data rows keyed by column letter (plus 'trade_date')
+
+        Returns:
+            Number of observations inserted or changed
+        """
+        params = [(row['trade_date'], info['code'], row[col])
+                  for row in data_rows if row.get('trade_date')
+                  for col, info in headers.items() if row.get(col) is not None]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(UPSERT, params)
+            return self.conn.total_changes - before
+
+    def get_rows(self, date_from, date_to=None, headers=EXCEL_HEADERS):
+        """Data rows keyed by column letter for every stored trade date in [date_from, date_to]."""
+        return list(self.iter_rows(date_from, date_to, headers))
+
+    def iter_rows(self, date_from, date_to=None, headers=EXCEL_HEADERS):
+        """Yields the rows of get_rows one trade date at a time, straight off the cursor."""
+        date_to = date_to or date_from
+        columns = {info['code']: col for col, info in headers.items()}
+        placeholders = ','.join('?' * len(columns))
+        cursor = self.conn.execute(
+            f"SELECT trade_date, code, value FROM observations "
+            f"WHERE trade_date BETWEEN ? AND ? AND code IN ({placeholders}) ORDER BY trade_date",
+            [date_from, date_to, *columns])
+        row = None
+        for trade_date, code, value in cursor:
+            if row is None or row['trade_date'] != trade_date:
+                if row is not None: yield row
+                row = {'trade_date': trade_date, **{col: None for col in headers}}
+            row[columns[code]] = value
+        if row is not None: yield row
+
+    def get_matrix(self, date_from=None, date_to=None, headers=EXCEL_HEADERS):
+        """
+        Stored history as one array for vectorized checks
+
+        Returns:
+            (YYYY-MM-DD trade dates, float array of shape (dates, len(headers)) with NaN where nothing is stored)
+        """
+        import numpy as np
+        columns = {info['code']: j for j, info in enumerate(headers.values())}
+        placeholders = ','.join('?' * len(columns))
+        observations = self.conn.execute(
+            f"SELECT trade_date, code, value FROM observations "
+            f"WHERE trade_date >= COALESCE(?, '') AND trade_date <= COALESCE(?, '9999') AND code IN ({placeholders})",
+            [date_from, date_to, *columns]).fetchall()
+        if not observations: return [], np.empty((0, len(headers)))
+        trade_dates, codes, values = zip(*observations)
+        dates, rows = np.unique(trade_dates, return_inverse=True)
+        matrix = np.full((len(dates), len(headers)), np.nan)
+        matrix[rows, [columns[code] for code in codes]] = np.array(values, dtype=float)
+        return dates.tolist(), matrix
+
+    def get_series(self, code, date_from=None, date_to=None):
+        """[(trade_date, value)] for one series code, ordered by date."""
+        cursor = self.conn.execute(
+            "SELECT trade_date, value FROM observations WHERE code = ? "
+            "AND trade_date >= COALESCE(?, '') AND trade_date <= COALESCE(?, '9999') ORDER BY trade_date",
+            (code, date_from, date_to))
+        return cursor.fetchall()
+
+    def trade_dates(self):
+        return [d for (d,) in self.conn.execute("SELECT DISTINCT trade_date FROM observations ORDER BY trade_date")]
+
+    def latest_date(self):
+        return self.conn.execute("SELECT MAX(trade_date) FROM observations").fetchone()[0]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query or re-export the RUSSD time-series store")
+    parser.add_argument('command', choices=['export', 'series', 'dates'])
+    parser.add_argument('--from', dest='date_from', help="First trade date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', help="Last trade date (YYYY-MM-DD); defaults to --from")
+    parser.add_argument('--code', help="Series code for 'series'")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        from orchastrator import export_from_store
+        print(export_from_store(args.date_from, args.date_to))
+    else:
+        with TimeSeriesStore() as store:
+            if args.command == 'dates':
+                print('\n'.join(store.trade_dates()))
+            else:
+                for trade_date, value in store.get_series(args.code, args.date_from, args.date_to):
+                    print(f"{trade_date}\t{value}")
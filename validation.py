@@ -0,0 +1,256 @@
+"""
+RUSSD Validation
+Vectorized consistency checks over the stored history; only trade dates that pass are packaged
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config import DATA_SOURCES, COLUMN_INDEX, EXCEL_HEADERS, OUTPUT_DATE_FORMAT
+
+# =============================================================================
+# SCRIPT CONFIGURATION
+# =============================================================================
+# 'error' keeps a trade date out of its package, 'warning' is only logged
+SEVERITY = {
+    'missing': 'error',
+    'range': 'error',
+    'value_dates': 'error',
+    'swap_points': 'error',
+    'volume_outlier': 'warning',
+}
+RATE_RANGE = (-5.0, 100.0)  # Plausible RUB and FC interest rates, % p.a.
+DAY_COUNT = 365
+SWAP_POINTS_TOLERANCE = 0.25  # Relative deviation from base rate * rate differential * days / DAY_COUNT
+SWAP_POINTS_ABS_TOLERANCE = 0.001  # Rubles; absorbs the rounding of published points on one-day swaps
+MAX_VALUE_DATE_GAP = 14  # Calendar days between value dates; the New Year holidays are the longest gap
+NEAR_LEG_OFFSET = {'TODTOM': (0, 0), 'TOMSPT': (1, MAX_VALUE_DATE_GAP)}  # Calendar days trade date -> near leg
+VOLUME_WINDOW = 250  # Earlier trade dates each volume is compared with
+VOLUME_MIN_HISTORY = 20  # No z-score with fewer earlier volumes than this
+VOLUME_Z_LIMIT = 6.0  # Outlier threshold for the z-score of log(1 + volume)
+HISTORY_DAYS = 400  # Calendar days of stored history loaded to validate new rows
+
+
+def _position(source, suffix):
+    return next(i for i, series in enumerate(DATA_SOURCES[source]['series']) if series[0].endswith(suffix))
+
+# Series positions within COLUMN_INDEX[(source, settlement, currency)]
+VOLUME_FC, VOLUME_RUB = _position('swapinfosellvol', '.{currency}'), _position('swapinfosellvol', '.RUB')
+FC_SELL_DATE, RUB_SELL_DATE = _position('swap_info_sell', '.FCSELLDATE'), _position('swap_info_sell', '.RUBSELLDATE')
+RUB_RATE, FC_RATE = _position('swap_info_sell', '.RUBINTERESTRATE'), _position('swap_info_sell', '.FCINTERESTRATE')
+BASE_RATE, SWAP_POINTS = _position('swap_info_sell', '.BASESWAPRATE'), _position('swap_info_sell', '.SWAPPOINTSRUB')
+MAX_ALLOTMENT = _position('swap_info_sell', '.MAXALLOTMENTAMOUNT')
+
+
+# =============================================================================
+# ARRAY HELPERS
+# =============================================================================
+def rows_to_matrix(data_rows, headers=EXCEL_HEADERS):
+    """(YYYY-MM-DD trade dates, float array with NaN for None) of data rows, in their order."""
+    matrix = np.array([[row.get(col) for col in headers] for row in data_rows], dtype=float)
+    return [row['trade_date'] for row in data_rows], matrix.reshape(len(data_rows), len(headers))
+
+def integer_dates(values):
+    """
+    YYYYMMDD values (float, NaN allowed) as datetime64[D]
+
+    Returns:
+        (dates, mask of values that are real calendar dates)
+    """
+    present = np.isfinite(values)
+    filled = np.where(present, values, 19700101)
+    whole = filled.astype(np.int64)
+    year, month, day = whole // 10000, whole // 100 % 100, whole % 100
+    months = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1)
+    valid = present & (whole == filled) & (month >= 1) & (month <= 12) & (day >= 1)
+    return dates, valid & (dates.astype('datetime64[M]') == months)
+
+def trailing_zscores(values, window=VOLUME_WINDOW, min_history=VOLUME_MIN_HISTORY):
+    """
+    z-score of each value against the up to `window` present values before it
+
+    One pass of cumulative sums over the column; NaN values are skipped and get
+    NaN, as do values with fewer than `min_history` earlier observations.
+    """
+    present = np.isfinite(values)
+    x = np.where(present, values, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    squares = np.concatenate(([0.0], np.cumsum(x * x)))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    # Index where each value's window starts: `window` present observations back
+    positions = np.flatnonzero(present)
+    rank = counts[:-1]
+    start = np.where(rank >= window, positions[np.maximum(rank - window, 0)] if positions.size else 0, 0)
+    n = rank - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (sums[:-1] - sums[start]) / n
+        variance = (squares[:-1] - squares[start]) / n - mean * mean
+        z = (values - mean) / np.sqrt(np.maximum(variance, 0.0))
+    return np.where(present & (n >= min_history) & (variance > 0), z, np.nan)
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+def validate_matrix(trade_dates, matrix, headers=EXCEL_HEADERS, required=None):
+    """
+    Runs every check over a (trade dates x columns) array
+
+    Args:
+        trade_dates: YYYY-MM-DD strings in ascending order, one per matrix row
+        matrix: Values by column of `headers`, NaN where missing
+        headers: Excel headers the matrix columns follow
+        required: Row mask of trade dates that must be complete; by default a
+                  currency must be complete on every date it has any value
+
+    Returns:
+        List of issues {'trade_date', 'check', 'severity', 'column', 'message'}, by date
+    """
+    column_index = {col: j for j, col in enumerate(headers)}
+    dates = np.array(trade_dates, dtype='datetime64[D]')
+    required = np.zeros(len(dates), dtype=bool) if required is None else np.asarray(required, dtype=bool)
+    issues = []
+
+    def flag(check, mask, col, text, detail=None, label='expected'):
+        j = column_index[col]
+        for i in np.flatnonzero(mask):
+            value = f" = {matrix[i, j]:.10g}" if np.isfinite(matrix[i, j]) else ''
+            extra = f", {label} {detail[i]:.6g}" if detail is not None else ''
+            issues.append({'trade_date': trade_dates[i], 'check': check, 'severity': SEVERITY[check], 'column': col,
+                           'message': f"{headers[col]['code']}{value}: {text}{extra}"})
+
+    for (source, settlement, currency), cols in COLUMN_INDEX.items():
+        if not all(col in column_index for col in cols): continue
+        collected = required | ~np.isnan(matrix[:, [column_index[col] for col in headers
+                                                    if headers[col]['currency'] == currency]]).all(axis=1)
+        values = {k: matrix[:, column_index[col]] for k, col in enumerate(cols)}
+        for k, col in enumerate(cols):
+            flag('missing', collected & np.isnan(values[k]), col, "missing")
+
+        if source == 'swapinfosellvol':
+            for k in (VOLUME_FC, VOLUME_RUB):
+                flag('range', values[k] < 0, cols[k], "negative volume")
+                z = trailing_zscores(np.log1p(np.where(values[k] >= 0, values[k], np.nan)))
+                flag('volume_outlier', np.abs(z) > VOLUME_Z_LIMIT, cols[k], f"log-volume z-score above {VOLUME_Z_LIMIT:g}", z, 'z')
+            continue
+
+        for k in (RUB_RATE, FC_RATE):
+            flag('range', (values[k] < RATE_RANGE[0]) | (values[k] > RATE_RANGE[1]), cols[k],
+                 f"interest rate outside {RATE_RANGE[0]:g}..{RATE_RANGE[1]:g}")
+        flag('range', values[BASE_RATE] <= 0, cols[BASE_RATE], "base swap rate not positive")
+        flag('range', values[MAX_ALLOTMENT] < 0, cols[MAX_ALLOTMENT], "negative allotment")
+
+        # Value dates: both legs are real dates, the near leg follows the settlement convention
+        # and the far leg comes after it
+        fc_date, fc_valid = integer_dates(values[FC_SELL_DATE])
+        rub_date, rub_valid = integer_dates(values[RUB_SELL_DATE])
+        for k, date_valid in ((FC_SELL_DATE, fc_valid), (RUB_SELL_DATE, rub_valid)):
+            flag('value_dates', ~np.isnan(values[k]) & ~date_valid, cols[k], "not a YYYYMMDD date")
+        legs = fc_valid & rub_valid
+        near, far = np.minimum(fc_date, rub_date), np.maximum(fc_date, rub_date)
+        offset = (near - dates).astype(int); gap = (far - near).astype(int)
+        low, high = NEAR_LEG_OFFSET[settlement]
+        apart = (gap >= 1) & (gap <= MAX_VALUE_DATE_GAP)
+        flag('value_dates', legs & ((offset < low) | (offset > high)), cols[FC_SELL_DATE],
+             f"near leg {'on' if low == high else 'after'} the trade date expected for {settlement}")
+        flag('value_dates', legs & ~apart, cols[RUB_SELL_DATE], f"legs must be 1-{MAX_VALUE_DATE_GAP} days apart")
+
+        # Swap points against the interest rate differential over the swap's days
+        days = np.where(legs & apart, gap, np.nan)
+        implied = values[BASE_RATE] * (values[RUB_RATE] - values[FC_RATE]) / 100 * days / DAY_COUNT
+        with np.errstate(invalid='ignore'):
+            off = np.abs(values[SWAP_POINTS] - implied) > SWAP_POINTS_TOLERANCE * np.abs(implied) + SWAP_POINTS_ABS_TOLERANCE
+        flag('swap_points', off, cols[SWAP_POINTS], "inconsistent with base rate and rate differential", implied)
+
+    return sorted(issues, key=lambda issue: issue['trade_date'])
+
+
+def load_history(date_from=None, date_to=None, headers=EXCEL_HEADERS):
+    """Stored history as (trade dates, matrix); empty if the store cannot be read."""
+    from orchastrator import log_debug
+    from timeseries_store import TimeSeriesStore
+    try:
+        with TimeSeriesStore() as store: return store.get_matrix(date_from, date_to, headers)
+    except Exception as e:
+        log_debug(f"Could not read the time-series store for validation: {e}", "WARNING")
+        return [], np.empty((0, len(headers)))
+
+def validate_history(date_from=None, date_to=None, headers=EXCEL_HEADERS):
+    """Checks every stored trade date in [date_from, date_to]; returns the issues."""
+    return validate_matrix(*load_history(date_from, date_to, headers), headers)
+
+
+# =============================================================================
+# PACKAGE GATE
+# =============================================================================
+def gate_rows(data_rows, headers=EXCEL_HEADERS):
+    """
+    Validates data rows about to be packaged against the stored history
+
+    The rows replace any stored values of their trade dates and must be
+    complete. Issues are logged; rows with an error are dropped unless
+    RUSSD_NO_VALIDATION is set.
+
+    Returns:
+        The rows that may be packaged
+    """
+    from metrics import span
+    from orchastrator import log_debug
+    data_rows = [row for row in data_rows if row.get('trade_date')]
+    if not data_rows: return data_rows
+    with span('validate', what=f"{len(data_rows)} trade date(s)") as timing:
+        first, last = min(r['trade_date'] for r in data_rows), max(r['trade_date'] for r in data_rows)
+        history_from = (datetime.strptime(first, OUTPUT_DATE_FORMAT) - timedelta(days=HISTORY_DAYS)).strftime(OUTPUT_DATE_FORMAT)
+        stored_dates, stored = load_history(history_from, last, headers)
+        new_dates, new = rows_to_matrix(data_rows, headers)
+        keep = np.isin(stored_dates, new_dates, invert=True) if stored_dates else np.zeros(0, dtype=bool)
+        trade_dates = [d for d, k in zip(stored_dates, keep) if k] + new_dates
+        matrix = np.vstack([stored[keep], new])
+        order = np.argsort(trade_dates, kind='stable')
+        required = np.arange(len(trade_dates))[order] >= keep.sum()
+        issues = validate_matrix([trade_dates[i] for i in order], matrix[order], headers, required)
+
+        packaged = set(new_dates)
+        issues = [issue for issue in issues if issue['trade_date'] in packaged]
+        for issue in issues:
+            log_debug(f"{issue['trade_date']} {issue['check']}: {issue['message']}",
+                      "ERROR" if issue['severity'] == 'error' else "WARNING")
+        failed = {issue['trade_date'] for issue in issues if issue['severity'] == 'error'}
+        timing['ok'] = not failed
+    if failed and os.environ.get('RUSSD_NO_VALIDATION'):
+        log_debug(f"Packaging {len(failed)} trade date(s) with validation errors (RUSSD_NO_VALIDATION)", "WARNING")
+        return data_rows
+    if failed: log_debug(f"Not packaging {', '.join(sorted(failed))}: validation failed", "ERROR")
+    return [row for row in data_rows if row['trade_date'] not in failed]
+
+
+def check_history(date_from=None, date_to=None, headers=EXCEL_HEADERS, limit=50):
+    """Prints the stored history's issues (the first `limit`, 0 for all) and a count per check; True if no errors."""
+    import time
+    from collections import Counter
+    trade_dates, matrix = load_history(date_from, date_to, headers)
+    start_time = time.perf_counter()
+    issues = validate_matrix(trade_dates, matrix, headers)
+    elapsed = time.perf_counter() - start_time
+    for issue in issues[:limit or None]:
+        print(f"{issue['trade_date']}  {issue['severity']:<7}  {issue['check']:<14}  {issue['message']}")
+    print(f"\n{len(trade_dates)} trade dates x {matrix.shape[1]} columns checked in {elapsed * 1000:.1f} ms")
+    for (check, severity), count in sorted(Counter((i['check'], i['severity']) for i in issues).items()):
+        print(f"  {check:<14} {severity:<7} {count}")
+    return not any(issue['severity'] == 'error' for issue in issues)
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import CURRENCIES, DEFAULT_CURRENCY, get_excel_headers
+
+    parser = argparse.ArgumentParser(description="Check the stored RUSSD history for inconsistent values")
+    parser.add_argument('--from', dest='date_from', help="First trade date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', help="Last trade date (YYYY-MM-DD)")
+    parser.add_argument('--currencies', nargs='+', choices=list(CURRENCIES), default=[DEFAULT_CURRENCY])
+    parser.add_argument('--limit', type=int, default=50, help="Issues to list (0 lists all)")
+    args = parser.parse_args()
+    raise SystemExit(0 if check_history(args.date_from, args.date_to, get_excel_headers(args.currencies), args.limit) else 1)